@@ -0,0 +1,47 @@
+#!/usr/bin/python3
+'''
+bench_compact:
+    measures the memory of the instances of the models and of their
+    compact variant.
+
+    Usage: python3 -m benchmarks.bench_compact [count]
+'''
+import gc
+import sys
+import tracemalloc
+from models.place import Place
+from models.review import Review
+from models.user import User
+
+DATES = {'created_at': '2024-01-01T00:00:00.000001',
+         'updated_at': '2024-01-02T00:00:00.000001'}
+RECORDS = {
+    User: {'email': 'betty@example.com', 'password': 'pwd',
+           'first_name': 'Betty', 'last_name': 'Holberton'},
+    Place: {'city_id': 'c', 'user_id': 'u', 'name': 'Loft',
+            'description': 'A loft', 'number_rooms': 3,
+            'number_bathrooms': 1, 'max_guest': 4, 'price_by_night': 90,
+            'latitude': 37.77, 'longitude': -122.41, 'amenity_ids': []},
+    Review: {'place_id': 'p', 'user_id': 'u', 'text': 'Great stay'}}
+
+
+def bytes_per_instance(cls, record, count):
+    '''Returns the memory allocated per instance created from record'''
+    gc.collect()
+    tracemalloc.start()
+    instances = [cls.from_dict({**record, 'id': str(i), **DATES})
+                 for i in range(count)]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del instances
+    return size / count
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    for model, record in RECORDS.items():
+        regular = bytes_per_instance(model, record, count)
+        compact = bytes_per_instance(model.compact(), record, count)
+        print('{:7} {:6.0f} B -> {:6.0f} B ({:.0%} less)'.format(
+            model.__name__, regular, compact, 1 - compact / regular))
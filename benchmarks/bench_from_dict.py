@@ -0,0 +1,40 @@
+#!/usr/bin/python3
+'''
+bench_from_dict:
+    measures creating instances from their dictionary representation,
+    with the kwargs constructor and with 'from_dict'.
+
+    Usage: python3 -m benchmarks.bench_from_dict [count]
+'''
+import sys
+from time import perf_counter
+from models.place import Place
+
+
+def records(count):
+    '''Returns count dictionary representations of places'''
+    return [{'__class__': 'Place', 'id': str(i),
+             'created_at': '2024-01-01T00:00:00.{:06d}'.format(i % 999999),
+             'updated_at': '2024-01-02T00:00:00.{:06d}'.format(i % 999999),
+             'name': 'Place {}'.format(i), 'city_id': str(i % 1000),
+             'number_rooms': i % 7} for i in range(count)]
+
+
+def throughput(create, dictionaries):
+    '''Returns the instances created per second'''
+    start = perf_counter()
+    for v in dictionaries:
+        create(v)
+    return len(dictionaries) / (perf_counter() - start)
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    dictionaries = records(count)
+
+    kwargs = throughput(lambda v: Place(**v), dictionaries)
+    from_dict = throughput(Place.from_dict, dictionaries)
+    print('{} records'.format(count))
+    print('Place(**v):         {:,.0f}/s'.format(kwargs))
+    print('Place.from_dict(v): {:,.0f}/s ({:.2f}x)'.format(
+        from_dict, from_dict / kwargs))
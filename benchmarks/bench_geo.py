@@ -0,0 +1,84 @@
+#!/usr/bin/python3
+'''
+bench_geo:
+    measures the bounding box and nearest places lookups of the storage
+    spatial index against a linear scan of the places, the places being
+    clustered around cities.
+
+    Usage: python3 -m benchmarks.bench_geo [places] [cities] [queries]
+'''
+import heapq
+import sys
+from random import Random
+from time import perf_counter
+from models.engine.file_storage import FileStorage
+from models.engine.geo_index import distance
+from models.place import Place
+
+DATES = {'created_at': '2024-01-01T00:00:00.000001',
+         'updated_at': '2024-01-02T00:00:00.000001'}
+
+
+def add_places(storage, rand, count, cities):
+    '''Adds count places around the cities, returns the seconds taken'''
+    start = perf_counter()
+    for i in range(count):
+        lat, lon = cities[i % len(cities)]
+        storage.new(Place.from_dict({
+            'id': str(i), **DATES,
+            'latitude': max(-90, min(90, rand.gauss(lat, 0.1))),
+            'longitude': max(-180, min(180, rand.gauss(lon, 0.1)))}))
+    return perf_counter() - start
+
+
+def scan_bbox(places, south, west, north, east):
+    '''Returns the places in a bounding box with a linear scan'''
+    return [v for v in places if south <= v.latitude <= north and
+            west <= v.longitude <= east]
+
+
+def scan_nearest(places, lat, lon, count):
+    '''Returns the places nearest to a position with a linear scan'''
+    return heapq.nsmallest(count, places, key=lambda v: distance(
+        lat, lon, v.latitude, v.longitude))
+
+
+def per_query(lookup, queries):
+    '''Returns the average seconds per query'''
+    start = perf_counter()
+    for query in queries:
+        lookup(*query)
+    return (perf_counter() - start) / len(queries)
+
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    count, city_count, query_count = args + [1000000, 1000, 20][len(args):]
+
+    rand = Random(0)
+    cities = [(rand.uniform(-60, 70), rand.uniform(-180, 180))
+              for _ in range(city_count)]
+    storage = FileStorage()
+    storage.update_file_path('bench_geo.json')
+    build = add_places(storage, rand, count, cities)
+    places = list(storage.all(Place).values())
+
+    boxes = []
+    positions = []
+    for lat, lon in rand.sample(cities, query_count):
+        boxes.append((lat - 0.05, lon - 0.08, lat + 0.05, lon + 0.08))
+        positions.append((lat + 0.01, lon - 0.01, 10))
+
+    bbox = per_query(lambda *v: storage.lookup_bbox(Place, *v), boxes)
+    bbox_scan = per_query(lambda *v: scan_bbox(places, *v), boxes)
+    nearest = per_query(lambda *v: storage.lookup_nearest(Place, *v),
+                        positions)
+    nearest_scan = per_query(lambda *v: scan_nearest(places, *v),
+                             positions)
+
+    print('{} places around {} cities, added in {:.1f}s'.format(
+        count, city_count, build))
+    print('bbox:       index {:8.3f} ms, scan {:8.1f} ms ({:,.0f}x)'.format(
+        bbox * 1000, bbox_scan * 1000, bbox_scan / bbox))
+    print('nearest 10: index {:8.3f} ms, scan {:8.1f} ms ({:,.0f}x)'.format(
+        nearest * 1000, nearest_scan * 1000, nearest_scan / nearest))
@@ -0,0 +1,70 @@
+#!/usr/bin/python3
+'''
+bench_intern:
+    measures the memory of the objects reloaded from a JSON file of
+    reviews, with and without interning the foreign key values.
+
+    Usage: python3 -m benchmarks.bench_intern [reviews] [places] [users]
+'''
+import gc
+import os
+import sys
+import tracemalloc
+from tempfile import TemporaryDirectory
+from uuid import uuid4
+from models.base_model import BaseModel
+from models.engine.file_storage import FileStorage
+from models.review import Review
+
+DATES = {'created_at': '2024-01-01T00:00:00.000001',
+         'updated_at': '2024-01-02T00:00:00.000001'}
+
+
+def write_reviews(path, reviews, places, users):
+    '''Writes a JSON file with reviews of places by users'''
+    place_ids = [str(uuid4()) for _ in range(places)]
+    user_ids = [str(uuid4()) for _ in range(users)]
+
+    storage = FileStorage()
+    storage.update_file_path(path)
+    storage.update_durability('none')
+    for i in range(reviews):
+        storage.new(Review.from_dict({
+            'id': str(uuid4()), **DATES,
+            'place_id': place_ids[i % places],
+            'user_id': user_ids[i % users], 'text': 'Great'}))
+    storage.save()
+
+
+def reload_size(path):
+    '''Returns the memory allocated by reloading the JSON file'''
+    gc.collect()
+    tracemalloc.start()
+    storage = FileStorage()
+    storage.update_file_path(path)
+    storage.reload()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del storage
+    return size
+
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    reviews, places, users = args + [200000, 1000, 5000][len(args):]
+
+    with TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'file.json')
+        write_reviews(path, reviews, places, users)
+
+        interned = BaseModel._interned
+        BaseModel.update_interned(())
+        before = reload_size(path)
+        BaseModel.update_interned(interned)
+        after = reload_size(path)
+
+    print('{} reviews of {} places by {} users'.format(
+        reviews, places, users))
+    print('not interned: {:.1f} MiB'.format(before / 2 ** 20))
+    print('interned:     {:.1f} MiB ({:.0%} less)'.format(
+        after / 2 ** 20, 1 - after / before))
@@ -0,0 +1,67 @@
+#!/usr/bin/python3
+'''
+bench_mmap:
+    measures the cold start (reload and first lookup) and the memory of
+    a storage reading the JSON file and of a storage mapping the indexed
+    file.
+
+    Usage: python3 -m benchmarks.bench_mmap [count]
+'''
+import gc
+import os
+import sys
+import tracemalloc
+from time import perf_counter
+from tempfile import TemporaryDirectory
+from models.engine.file_storage import FileStorage
+from models.place import Place
+
+DATES = {'created_at': '2024-01-01T00:00:00.000001',
+         'updated_at': '2024-01-02T00:00:00.000001'}
+
+
+def write_places(path, map_path, count):
+    '''Writes the JSON and the indexed files of count places'''
+    storage = FileStorage()
+    storage.update_file_path(path)
+    storage.update_durability('none')
+    for i in range(count):
+        storage.new(Place.from_dict({'id': str(i), **DATES,
+                                     'name': 'Place {}'.format(i),
+                                     'city_id': str(i % 1000)}))
+    storage.save()
+    storage.write_mapped_file(map_path)
+
+
+def cold_start(path, mmap, key):
+    '''Returns the seconds and the memory to reload and get one object'''
+    gc.collect()
+    tracemalloc.start()
+    start = perf_counter()
+    storage = FileStorage()
+    storage.update_file_path(path)
+    storage.update_mmap_mode(mmap)
+    storage.reload()
+    storage.all()[key]
+    elapsed = perf_counter() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    storage.update_mmap_mode(False)
+    return elapsed, size
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    key = 'Place.{}'.format(count // 2)
+
+    with TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'file.json')
+        map_path = os.path.join(tmp, 'file.map')
+        write_places(path, map_path, count)
+
+        json_time, json_size = cold_start(path, False, key)
+        mmap_time, mmap_size = cold_start(map_path, True, key)
+
+    print('{} places'.format(count))
+    print('JSON: {:.3f}s {:7.1f} MiB'.format(json_time, json_size / 2 ** 20))
+    print('mmap: {:.3f}s {:7.1f} MiB'.format(mmap_time, mmap_size / 2 ** 20))
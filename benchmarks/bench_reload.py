@@ -0,0 +1,56 @@
+#!/usr/bin/python3
+'''
+bench_reload:
+    measures 'reload' of a JSON file, in this process and with
+    parallel processes.
+
+    Usage: python3 -m benchmarks.bench_reload [count] [workers ...]
+'''
+import os
+import sys
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from models.engine.file_storage import FileStorage
+from models.place import Place
+
+
+def write_places(path, count):
+    '''Writes a JSON file with count places'''
+    storage = FileStorage()
+    storage.update_file_path(path)
+    storage.update_durability('none')
+    for i in range(count):
+        place = Place(id=str(i), created_at='2024-01-01T00:00:00.000001',
+                      updated_at='2024-01-01T00:00:00.000001')
+        place.name = 'Place {}'.format(i)
+        place.city_id = str(i % 1000)
+        place.number_rooms = i % 7
+        storage.new(place)
+    storage.save()
+
+
+def time_reload(path, workers):
+    '''Returns the seconds 'reload' takes with workers processes'''
+    storage = FileStorage()
+    storage.update_file_path(path)
+    storage.update_parallel_reload(workers)
+    start = perf_counter()
+    storage.reload()
+    return perf_counter() - start
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    workers = [int(w) for w in sys.argv[2:]] or [os.cpu_count() or 1]
+
+    with TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'file.json')
+        write_places(path, count)
+
+        serial = time_reload(path, 0)
+        print('{} objects, {} CPUs'.format(count, os.cpu_count()))
+        print('serial: {:.2f}s'.format(serial))
+        for w in workers:
+            elapsed = time_reload(path, w)
+            print('{} workers: {:.2f}s ({:.2f}x)'.format(
+                w, elapsed, serial / elapsed))
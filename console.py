@@ -4,8 +4,10 @@ HBNBCommand:
     the entry point of the command interpreter.
 '''
 import cmd
+import re
 import shlex
 from models import storage
+from models.engine.query import coerce_value
 from models.base_model import BaseModel
 from models.user import User
 from models.state import State
@@ -49,8 +51,12 @@ class HBNBCommand(cmd.Cmd):
         if not is_valid:
             return
 
-        obj = self.__classes[inputs[0]]()
-        obj.save()
+        try:
+            obj = self.__classes[inputs[0]]()
+            obj.save()
+        except PermissionError:
+            print('** storage is read-only **')
+            return
         print(obj.id)
 
     def do_update(self, arg):
@@ -64,13 +70,15 @@ class HBNBCommand(cmd.Cmd):
         if not is_valid:
             return
 
-        objects = storage.all()
-        k = '{}.{}'.format(inputs[0], inputs[1])
-        obj = objects.get(k)
+        obj = storage.get(inputs[0], inputs[1])
+        value = coerce_value(self.__classes[inputs[0]], inputs[2], inputs[3])
 
-        setattr(obj, inputs[2], inputs[3])
+        setattr(obj, inputs[2], value)
 
-        storage.save()
+        try:
+            obj.save()
+        except PermissionError:
+            print('** storage is read-only **')
 
     def do_show(self, arg):
         '''Prints the string representation of an instance
@@ -82,12 +90,7 @@ class HBNBCommand(cmd.Cmd):
         if not is_valid:
             return
 
-        objects = storage.all()
-        k = '{}.{}'.format(inputs[0], inputs[1])
-
-        obj = objects.get(k, None)
-
-        print(obj)
+        print(storage.get(inputs[0], inputs[1]))
 
     def do_destroy(self, arg):
         '''Deletes an instance based on the class name and id
@@ -99,45 +102,203 @@ class HBNBCommand(cmd.Cmd):
         if not is_valid:
             return
 
-        objects = storage.all()
-        k = '{}.{}'.format(inputs[0], inputs[1])
-
-        del objects[k]
-        storage.save()
+        try:
+            storage.delete(storage.get(inputs[0], inputs[1]))
+            storage.save()
+        except PermissionError:
+            print('** storage is read-only **')
 
     def do_all(self, arg):
         '''Prints all string representation of all instances
         based or not on the class name.
         '''
         inputs = arg.split()
-        objects = storage.all()
 
-        res = []
-        if len(inputs) < 1:
-            for _, v in objects.items():
-                res.append(str(v))
-            print(res)
+        classname = None
+        if len(inputs) > 0:
+            classname = inputs[0]
+            if classname not in self.__classes:
+                print('** class doesn\'t exist **')
+                return
+
+        objects = storage.all(classname)
+        with storage.read_lock():
+            res = [str(v) for v in objects.values()]
+        print(res)
+
+    def do_query(self, arg):
+        '''Prints the instances of a class matching conditions.
+        Usage: query <class name> [<attribute><operator><value> ...]
+                     [--fields=<attribute>,...] [--order=[-]<attribute>]
+                     [--limit=<number>] [--offset=<number>]
+        The operators are ==, =, !=, <, <=, > and >=.
+        Example: query Place price_by_night<100 max_guest>=4 --limit=10
+        '''
+        try:
+            inputs = shlex.split(arg)
+        except ValueError:
+            print('** invalid query **')
             return
 
-        classname = inputs[0]
-        if classname not in self.__classes:
-            print('** class doesn\'t exist **')
+        if not self.validate_input(inputs, ['classname']):
             return
 
-        for _, v in objects.items():
-            if v.__class__.__name__ == classname:
-                res.append(str(v))
+        cls = self.__classes[inputs[0]]
+        where = []
+        options = {'fields': None, 'order': None, 'limit': None,
+                   'offset': 0}
+        for inp in inputs[1:]:
+            if inp.startswith('--'):
+                name, _, value = inp[2:].partition('=')
+                if name not in options or value == '':
+                    print('** invalid option: {} **'.format(inp))
+                    return
+                if name in ('limit', 'offset'):
+                    if not value.isdigit():
+                        print('** invalid option: {} **'.format(inp))
+                        return
+                    value = int(value)
+                elif name == 'fields':
+                    value = value.split(',')
+                options[name] = value
+                continue
+
+            match = re.fullmatch(r'(\w+)(==|!=|<=|>=|<|>|=)(.*)', inp)
+            if match is None:
+                print('** invalid condition: {} **'.format(inp))
+                return
+            attr, op, value = match.groups()
+            where.append((attr, '==' if op == '=' else op,
+                          coerce_value(cls, attr, value)))
+
+        try:
+            res = storage.query(cls, where, options['fields'],
+                                options['order'], options['limit'],
+                                options['offset'])
+        except ValueError as e:
+            print('** {} **'.format(e))
+            return
+
+        if options['fields'] is None:
+            res = [str(v) for v in res]
         print(res)
 
+    def do_range(self, arg):
+        '''Prints the instances of a class with a numeric attribute
+        between two values, sorted by this attribute.
+        Usage: range <class name> <attribute> [<min>|*] [<max>|*]
+                     [--limit=<number>] [--desc]
+        Example: range Place price_by_night 50 100
+                 range Place max_guest --desc --limit=3
+        '''
+        inputs = arg.split()
+        if not self.validate_input(inputs, ['classname', 'attribute_name']):
+            return
+
+        cls = self.__classes[inputs[0]]
+        bounds = []
+        limit = None
+        reverse = False
+        for inp in inputs[2:]:
+            if inp == '--desc':
+                reverse = True
+            elif inp.startswith('--limit=') and inp[8:].isdigit():
+                limit = int(inp[8:])
+            elif inp.startswith('--') or len(bounds) == 2:
+                print('** invalid option: {} **'.format(inp))
+                return
+            elif inp == '*':
+                bounds.append(None)
+            else:
+                try:
+                    bounds.append(float(inp))
+                except ValueError:
+                    print('** invalid value: {} **'.format(inp))
+                    return
+
+        low, high = bounds + [None] * (2 - len(bounds))
+        res = storage.lookup_range(cls, inputs[1], low, high, limit, reverse)
+        print([str(v) for v in res])
+
+    def do_bbox(self, arg):
+        '''Prints the instances of a class in a bounding box.
+        Usage: bbox <class name> <south> <west> <north> <east>
+        Example: bbox Place 37.70 -122.52 37.81 -122.35
+        '''
+        inputs = arg.split()
+        if not self.validate_input(inputs, ['classname']):
+            return
+
+        if len(inputs) != 5:
+            print('** usage: bbox <class name> <south> <west> <north> '
+                  '<east> **')
+            return
+
+        bounds = self.parse_numbers(inputs[1:])
+        if bounds is None:
+            return
+
+        res = storage.lookup_bbox(self.__classes[inputs[0]], *bounds)
+        print([str(v) for v in res])
+
+    def do_nearest(self, arg):
+        '''Prints the instances of a class nearest to a position, with
+        their distance in km.
+        Usage: nearest <class name> <latitude> <longitude> [<count>]
+                       [--km=<maximum distance>]
+        Example: nearest Place 37.77 -122.41 5 --km=10
+        '''
+        inputs = arg.split()
+        if not self.validate_input(inputs, ['classname']):
+            return
+
+        args = [v for v in inputs[1:] if not v.startswith('--km=')]
+        max_km = [v[5:] for v in inputs[1:] if v.startswith('--km=')]
+        if len(args) not in (2, 3) or len(max_km) > 1:
+            print('** usage: nearest <class name> <latitude> <longitude> '
+                  '[<count>] [--km=<maximum distance>] **')
+            return
+
+        if len(args) == 3 and not args[2].isdigit():
+            print('** invalid count: {} **'.format(args[2]))
+            return
+        count = int(args[2]) if len(args) == 3 else 1
+
+        numbers = self.parse_numbers(args[:2] + max_km)
+        if numbers is None:
+            return
+        max_km = numbers[2] if len(numbers) == 3 else None
+
+        try:
+            res = storage.lookup_nearest(self.__classes[inputs[0]],
+                                         numbers[0], numbers[1], count,
+                                         max_km)
+        except ValueError as e:
+            print('** {} **'.format(e))
+            return
+        print(['{:.3f} km {}'.format(d, v) for d, v in res])
+
+    def parse_numbers(self, inputs):
+        '''Returns the inputs as floats, None if one is not a number
+
+        Args:
+            inputs (list): the inputs.
+        '''
+        try:
+            return [float(v) for v in inputs]
+        except ValueError:
+            print('** invalid number in: {} **'.format(' '.join(inputs)))
+            return None
+
     def do_count(self, arg):
         '''Retrieve the number of instances of a class.
         '''
-        counter = 0
-        objects = storage.all()
-        for _, v in objects.items():
-            if v.__class__.__name__ == arg:
-                counter += 1
-        print(counter)
+        print(storage.count(arg))
+
+    def do_compact(self, _):
+        '''Folds the storage journal into the JSON file.
+        '''
+        storage.compact(wait=True)
 
     def default(self, line):
         args = line.split('.')
@@ -223,11 +384,7 @@ class HBNBCommand(cmd.Cmd):
                     print('** instance id missing **')
                     return False
 
-                objects = storage.all()
-                k = '{}.{}'.format(inputs[0], inputs[1])
-
-                obj = objects.get(k, None)
-                if obj is None:
+                if not storage.exists(inputs[0], inputs[1]):
                     print('** no instance found **')
                     return False
 
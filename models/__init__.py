@@ -2,8 +2,58 @@
 '''
 __init__ file for models package
 '''
-from models.engine.file_storage import FileStorage
+import sys
+from os import getenv
 
-storage = FileStorage()
+if getenv('HBNB_TYPE_STORAGE') == 'db':
+    from models.engine.db_storage import DBStorage
 
-storage.reload()
+    storage = DBStorage()
+
+    if getenv('HBNB_DB_PATH'):
+        storage.update_file_path(getenv('HBNB_DB_PATH'))
+else:
+    from models.engine.file_storage import FileStorage
+
+    storage = FileStorage()
+
+    if getenv('HBNB_STORAGE_FORMAT'):
+        storage.update_serializer(getenv('HBNB_STORAGE_FORMAT'))
+
+    if getenv('HBNB_STORAGE_DURABILITY'):
+        storage.update_durability(getenv('HBNB_STORAGE_DURABILITY'))
+
+    if getenv('HBNB_STORAGE_GROUP_COMMIT'):
+        storage.update_group_commit(
+            float(getenv('HBNB_STORAGE_GROUP_COMMIT')) / 1000)
+
+    if getenv('HBNB_STORAGE_WRITER'):
+        storage.update_background_writer(True)
+
+    if getenv('HBNB_STORAGE_JOURNAL'):
+        storage.update_journal_mode(True)
+
+    if getenv('HBNB_STORAGE_LAZY'):
+        storage.update_lazy_mode(True)
+
+    if getenv('HBNB_STORAGE_SHARDS'):
+        storage.update_shards(int(getenv('HBNB_STORAGE_SHARDS')))
+
+    if getenv('HBNB_STORAGE_RELOAD_WORKERS'):
+        storage.update_parallel_reload(
+            int(getenv('HBNB_STORAGE_RELOAD_WORKERS')))
+
+    if getenv('HBNB_STORAGE_MMAP'):
+        if getenv('HBNB_STORAGE_MMAP_PATH'):
+            storage.update_file_path(getenv('HBNB_STORAGE_MMAP_PATH'))
+        storage.update_mmap_mode(True)
+
+if getenv('HBNB_STORAGE_COMPACT'):
+    storage.update_compact_mode(True)
+
+try:
+    storage.reload()
+except ValueError as error:
+    if not getenv('HBNB_STORAGE_MMAP'):
+        raise
+    sys.exit('** {}, see HBNB_STORAGE_MMAP_PATH **'.format(error))
@@ -4,10 +4,13 @@ BaseModel:
     is a class that defines all common attributes/methods for other classes.
 '''
 
+from sys import intern
 from uuid import uuid4
 from datetime import datetime
 import models
 
+COMPACT_CLASSES = {}
+
 
 class BaseModel():
     '''Base class that defines all common attributes/methods for other classes
@@ -17,8 +20,14 @@ class BaseModel():
         created_at (datetime): The datetime when an instance is created.
         updated_at (datetime): The datetime when an instance is created
                                and it will be updated with every changes.
+        _interned (frozenset): the attributes whose string values are
+                               interned, so that the instances referring
+                               to the same object share one string.
     '''
 
+    _interned = frozenset(('id', 'state_id', 'city_id', 'user_id',
+                           'place_id'))
+
     def __init__(self, **kwargs):
         '''Initialize the instance
 
@@ -36,14 +45,121 @@ class BaseModel():
                 if k == '__class__':
                     continue
 
-                if k in dates_attrs:
-                    v = datetime.strptime(v, '%Y-%m-%dT%H:%M:%S.%f')
+                if k in dates_attrs and isinstance(v, str):
+                    v = datetime.fromisoformat(v)
 
                 setattr(self, k, v)
 
         if len(kwargs) == 0:
             models.storage.new(self)
 
+    @classmethod
+    def from_dict(cls, dictionary):
+        '''Creates an instance from its dictionary representation
+
+        Unlike 'cls(**dictionary)', no id or date is generated when the
+        dictionary has them, and the attributes are set without marking
+        the instance as changed.
+
+        Args:
+            dictionary (dict): the dictionary representation.
+
+        Returns:
+            BaseModel: the instance, not added to the storage.
+        '''
+        attrs = {**dictionary}
+        attrs.pop('__class__', None)
+
+        if 'id' not in attrs:
+            attrs['id'] = str(uuid4())
+        for k in ('created_at', 'updated_at'):
+            v = attrs.get(k)
+            if isinstance(v, str):
+                attrs[k] = datetime.fromisoformat(v)
+            elif v is None:
+                attrs[k] = datetime.now()
+        for k in cls._interned:
+            v = attrs.get(k)
+            if type(v) is str:
+                attrs[k] = intern(v)
+
+        obj = cls.__new__(cls)
+        obj.load_attributes(attrs)
+        return obj
+
+    @classmethod
+    def update_interned(cls, attrs):
+        '''Update the attributes whose string values are interned
+
+        Args:
+            attrs (iterable): the attribute names, for this class and its
+                              subclasses which don't set their own.
+        '''
+        cls._interned = frozenset(attrs)
+
+    @classmethod
+    def compact(cls):
+        '''Returns the compact variant of the class
+
+        Its instances keep the id, the dates and the attributes declared
+        on the class (e.g. 'Place.number_rooms') in slots instead of a
+        dictionary per instance, the other attributes are kept in a
+        dictionary created when the first one is set.
+
+        Returns:
+            type: a subclass with the same name, see 'CompactModel'.
+        '''
+        if issubclass(cls, CompactModel):
+            return cls
+
+        compact = COMPACT_CLASSES.get(cls)
+        if compact is not None:
+            return compact
+
+        defaults = {}
+        for klass in reversed(cls.__mro__):
+            for k, v in vars(klass).items():
+                if k.startswith('_') or callable(v) or \
+                        isinstance(v, (classmethod, staticmethod, property)):
+                    continue
+                defaults[k] = v
+
+        fields = ('id', 'created_at', 'updated_at')
+        fields += tuple(k for k in defaults if k not in fields)
+        compact = type(cls.__name__, (CompactModel, cls), {
+            '__slots__': fields + ('_extra',),
+            '__module__': cls.__module__,
+            '__qualname__': cls.__qualname__,
+            '__doc__': cls.__doc__,
+            '__dict__': CompactModel.__dict__['__dict__'],
+            '_model': cls,
+            '_fields': fields,
+            '_field_set': frozenset(fields),
+            '_defaults': defaults})
+        COMPACT_CLASSES[cls] = compact
+        return compact
+
+    def load_attributes(self, attrs):
+        '''Sets attributes without marking the instance as changed
+
+        Args:
+            attrs (dict): the attribute values by name.
+        '''
+        self.__dict__.update(attrs)
+
+    def own_attribute(self, name):
+        '''Returns an attribute set on the instance, None if it's unset
+        (the class default, e.g. 'Place.latitude', is not returned)
+        '''
+        return self.__dict__.get(name)
+
+    def __setattr__(self, name, value):
+        '''Sets an attribute and marks the instance as changed'''
+        if type(value) is str and name in self._interned:
+            value = intern(value)
+        super().__setattr__(name, value)
+        models.storage.mark_dirty(self)
+
     def to_dict(self):
         '''Returns a dictionary representation of a instance.
 
@@ -69,3 +185,98 @@ class BaseModel():
         classname = self.__class__.__name__
         instance_dict = self.__dict__
         return '[{}] ({}) {}'.format(classname, instance_id, instance_dict)
+
+
+class CompactModel():
+    '''Base of the compact variants of the models, see 'BaseModel.compact'
+
+    The attributes declared on the model are kept in slots, an unset one
+    reads as its class default; the other attributes are kept in the
+    '_extra' dictionary. '__dict__' returns a new dictionary with all the
+    attributes, so 'to_dict' and '__str__' work as for the model.
+
+    Attributes:
+        _model (type): the model class.
+        _fields (tuple): the attributes kept in slots.
+        _field_set (frozenset): the attributes kept in slots.
+        _defaults (dict): the class default of the declared attributes.
+    '''
+
+    __slots__ = ()
+
+    @property
+    def __dict__(self):
+        '''Returns a new dictionary with the attributes of the instance'''
+        attrs = {}
+        for name in self._fields:
+            try:
+                attrs[name] = object.__getattribute__(self, name)
+            except AttributeError:
+                pass
+
+        extra = getattr(self, '_extra', None)
+        if extra is not None:
+            attrs.update(extra)
+        return attrs
+
+    def __getattr__(self, name):
+        '''Returns an attribute not in a slot or an unset slot'''
+        if name != '_extra':
+            extra = getattr(self, '_extra', None)
+            if extra is not None and name in extra:
+                return extra[name]
+            if name in self._defaults:
+                return self._defaults[name]
+
+        raise AttributeError('{!r} object has no attribute {!r}'.format(
+            self.__class__.__name__, name))
+
+    def __setattr__(self, name, value):
+        '''Sets an attribute and marks the instance as changed'''
+        if type(value) is str and name in self._interned:
+            value = intern(value)
+        self.load_attributes({name: value})
+        models.storage.mark_dirty(self)
+
+    def __reduce__(self):
+        return load_compact, (self._model, self.__dict__)
+
+    def own_attribute(self, name):
+        '''Returns an attribute set on the instance, None if it's unset'''
+        if name in self._field_set:
+            try:
+                return object.__getattribute__(self, name)
+            except AttributeError:
+                return None
+
+        extra = getattr(self, '_extra', None)
+        return None if extra is None else extra.get(name)
+
+    def load_attributes(self, attrs):
+        '''Sets attributes without marking the instance as changed
+
+        Args:
+            attrs (dict): the attribute values by name.
+        '''
+        for k, v in attrs.items():
+            if k in self._field_set:
+                object.__setattr__(self, k, v)
+                continue
+
+            extra = getattr(self, '_extra', None)
+            if extra is None:
+                extra = {}
+                object.__setattr__(self, '_extra', extra)
+            extra[k] = v
+
+
+def load_compact(model, attrs):
+    '''Creates an instance of the compact variant of a model
+
+    Args:
+        model (type): the model class.
+        attrs (dict): the attribute values by name.
+    '''
+    obj = model.compact().__new__(model.compact())
+    obj.load_attributes(attrs)
+    return obj
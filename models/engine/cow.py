@@ -0,0 +1,117 @@
+#!/usr/bin/python3
+'''
+cow:
+    copy-on-write dictionaries and their immutable snapshots.
+
+    A COWDict spreads its items over buckets. Taking a snapshot only
+    copies the list of buckets; a bucket is copied the first time it is
+    changed after a snapshot, so the snapshots and the dictionary share
+    the buckets which didn't change.
+'''
+from collections.abc import Mapping
+
+
+class COWDict():
+    '''Dictionary whose snapshots share its unchanged buckets
+
+    Attributes:
+        size (int): number of buckets.
+        buckets (list): the items, in the bucket of the hash of their key.
+        owners (list): the epoch each bucket was created at.
+        epoch (int): incremented by every snapshot, the buckets created
+                     before the current epoch are shared with a snapshot.
+        length (int): number of items.
+    '''
+
+    size = 256
+
+    def __init__(self, items=()):
+        '''Initialize the dictionary
+
+        Args:
+            items (iterable): (key, value) pairs.
+        '''
+        self.buckets = [{} for _ in range(self.size)]
+        self.owners = [0] * self.size
+        self.epoch = 0
+        self.length = 0
+        for k, v in items:
+            self[k] = v
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, k):
+        return self.buckets[hash(k) % self.size][k]
+
+    def __setitem__(self, k, v):
+        bucket = self.writable(k)
+        if k not in bucket:
+            self.length += 1
+        bucket[k] = v
+
+    def pop(self, k, default=None):
+        '''Removes the item with key k and returns its value'''
+        if k not in self.buckets[hash(k) % self.size]:
+            return default
+
+        self.length -= 1
+        return self.writable(k).pop(k)
+
+    def writable(self, k):
+        '''Returns the bucket of key k, copied if a snapshot shares it'''
+        i = hash(k) % self.size
+        if self.owners[i] != self.epoch:
+            self.buckets[i] = dict(self.buckets[i])
+            self.owners[i] = self.epoch
+        return self.buckets[i]
+
+    def freeze(self):
+        '''Returns the (buckets, length) part of a snapshot
+
+        Note:
+            the buckets returned are never changed afterwards.
+        '''
+        part = (tuple(self.buckets), self.length)
+        self.epoch += 1
+        return part
+
+    def snapshot(self):
+        '''Returns a snapshot of the dictionary'''
+        return Snapshot([self.freeze()])
+
+
+class Snapshot(Mapping):
+    '''Immutable point-in-time view of one or more COWDict
+
+    Attributes:
+        parts (tuple): the (buckets, length) parts frozen by the
+                       dictionaries, which have distinct keys.
+    '''
+
+    def __init__(self, parts):
+        '''Initialize the snapshot
+
+        Args:
+            parts (iterable): parts returned by 'COWDict.freeze'.
+        '''
+        self.parts = tuple(parts)
+
+    def __getitem__(self, k):
+        h = hash(k)
+        for buckets, _ in self.parts:
+            bucket = buckets[h % len(buckets)]
+            if k in bucket:
+                return bucket[k]
+        raise KeyError(k)
+
+    def __iter__(self):
+        for buckets, _ in self.parts:
+            for bucket in buckets:
+                yield from bucket
+
+    def __len__(self):
+        return sum(length for _, length in self.parts)
+
+    def __repr__(self):
+        return 'Snapshot({})'.format(dict(self))
@@ -0,0 +1,411 @@
+#!/usr/bin/python3
+'''
+DBStorage:
+    is a class that stores the instances in a SQLite database,
+    one row per instance.
+'''
+import json
+import sqlite3
+from threading import Lock
+from types import MappingProxyType
+from models.engine.query import check_predicates, index_predicate, select
+from models.engine.geo_index import GeoIndex
+from models.engine.range_index import RangeIndex
+from models.engine.rwlock import RWLock
+from models.base_model import BaseModel
+from models.user import User
+from models.state import State
+from models.city import City
+from models.amenity import Amenity
+from models.place import Place
+from models.review import Review
+
+
+class DBStorage():
+    '''
+    DBStorage:
+        is a class that stores the instances in a SQLite database,
+        one row per instance, with the same interface as FileStorage.
+
+    The database has one table 'objects' with the key, the class name and
+    the JSON text of each instance, and a column per foreign key
+    attribute, indexed for 'lookup'.
+
+    Private Attributes:
+        __file_path (str): path to the database file.
+        __objects (dict): all objects by <class name>.id.
+        __partitions (dict): the objects of __objects by class name.
+        __classes (dict): dictionary contains all classes.
+        __columns (tuple): the foreign key attributes stored in their own
+                           indexed column.
+        __pending (dict): objects changed since the last 'save' by key,
+                          None marks a destroyed object.
+        __conn (Connection): the database connection, opened on first use.
+        __db_lock (Lock): serializes the use of the connection.
+        __rwlock (RWLock): guards the objects, held for reading while
+                           they are read and for writing while they are
+                           changed or collected to be written.
+        __compact (bool): if True, the objects read from the database are
+                          instances of the compact variant of their class,
+                          see 'BaseModel.compact'.
+    '''
+
+    __classes = {'BaseModel': BaseModel, 'User': User, 'State': State,
+                 'City': City, 'Amenity': Amenity,
+                 'Place': Place, 'Review': Review}
+    __columns = ('state_id', 'city_id', 'user_id', 'place_id')
+
+    def __init__(self):
+        '''Initialize the storage, the database is opened on first use'''
+        self.__file_path = 'file.db'
+        self.__objects = {}
+        self.__partitions = {}
+        self.__pending = {}
+        self.__conn = None
+        self.__db_lock = Lock()
+        self.__rwlock = RWLock()
+        self.__compact = False
+
+    def all(self, cls=None):
+        '''Returns the dictionary __objects
+
+        Args:
+            cls (type or str): if given, only the objects of this class
+                               (or class name) are returned.
+        '''
+        if cls is None:
+            return self.__objects
+
+        classname = cls if isinstance(cls, str) else cls.__name__
+        return self.__partitions.get(classname, {})
+
+    def count(self, cls=None):
+        '''Returns the number of objects
+
+        Args:
+            cls (type or str): if given, only the objects of this class
+                               (or class name) are counted.
+        '''
+        return len(self.all(cls))
+
+    def get(self, cls, id):
+        '''Returns an object by class and id, None if there is none
+
+        Args:
+            cls (type or str): the class or class name.
+            id (str): the object id.
+        '''
+        classname = cls if isinstance(cls, str) else cls.__name__
+        return self.__objects.get('{}.{}'.format(classname, id))
+
+    def exists(self, cls, id):
+        '''Returns True if there is an object with a class and id
+
+        Args:
+            cls (type or str): the class or class name.
+            id (str): the object id.
+        '''
+        return self.get(cls, id) is not None
+
+    def snapshot(self, cls=None):
+        '''Returns a point-in-time read-only copy of the objects
+
+        Args:
+            cls (type or str): if given, only the objects of this class
+                               (or class name) are copied.
+        '''
+        with self.__rwlock.read():
+            return MappingProxyType(dict(self.all(cls)))
+
+    def read_lock(self):
+        '''Returns a context manager holding the storage for reading'''
+        return self.__rwlock.read()
+
+    def new(self, obj):
+        '''Sets in __objects the obj with key <obj class name>.id'''
+        classname = obj.__class__.__name__
+        k = '{}.{}'.format(classname, obj.id)
+        with self.__rwlock.write():
+            self.__objects[k] = obj
+            self.__partitions.setdefault(classname, {})[k] = obj
+            self.__pending[k] = obj
+
+    def mark_dirty(self, obj):
+        '''Marks obj as changed so that the next 'save' writes it again'''
+        k = '{}.{}'.format(obj.__class__.__name__, getattr(obj, 'id', None))
+        if self.__objects.get(k) is not obj:
+            return
+
+        with self.__rwlock.write():
+            self.__pending[k] = obj
+
+    def delete(self, obj=None):
+        '''Deletes obj from __objects if it's inside'''
+        if obj is None:
+            return
+
+        classname = obj.__class__.__name__
+        k = '{}.{}'.format(classname, obj.id)
+        with self.__rwlock.write():
+            self.__objects.pop(k, None)
+            self.__partitions.get(classname, {}).pop(k, None)
+            self.__pending[k] = None
+
+    def lookup(self, cls, attr, value):
+        '''Returns the objects of a class having an attribute value
+
+        Args:
+            cls (type or str): the class or class name.
+            attr (str): the attribute name.
+            value: the attribute value.
+
+        Returns:
+            dict: the matching objects by key.
+
+        Note:
+            the foreign key attributes are looked up with their index,
+            the other attributes with a full scan.
+        '''
+        classname = cls if isinstance(cls, str) else cls.__name__
+
+        with self.__rwlock.read():
+            objects = self.__partitions.get(classname, {})
+            if attr not in self.__columns:
+                return {k: v for k, v in objects.items()
+                        if getattr(v, attr, None) == value}
+
+            rows = self.execute(
+                'SELECT key FROM objects WHERE class = ? AND {} = ?'
+                .format(attr), (classname, value))
+
+            res = {k: objects[k] for k, in rows
+                   if k not in self.__pending and k in objects}
+            for k, v in self.__pending.items():
+                if v is not None and k in objects and \
+                        getattr(v, attr, None) == value:
+                    res[k] = v
+            return res
+
+    def lookup_range(self, cls, attr, low=None, high=None, limit=None,
+                     reverse=False):
+        '''Returns the objects of a class with a numeric attribute value
+        between low and high, included, sorted by this value
+
+        See 'FileStorage.lookup_range'; the objects of the class are
+        scanned and sorted.
+        '''
+        classname = cls if isinstance(cls, str) else cls.__name__
+        with self.__rwlock.read():
+            objects = self.__partitions.get(classname, {})
+            index = RangeIndex((k, getattr(v, attr, None))
+                               for k, v in objects.items())
+            return [objects[k] for k in index.range(low, high, limit,
+                                                    reverse)]
+
+    def geo_index(self, objects):
+        '''Returns a spatial index of objects by 'latitude' and
+        'longitude'
+        '''
+        return GeoIndex((k, v.own_attribute('latitude'),
+                         v.own_attribute('longitude'))
+                        for k, v in objects.items())
+
+    def lookup_bbox(self, cls, south, west, north, east):
+        '''Returns the objects of a class in a bounding box, edges included
+
+        See 'FileStorage.lookup_bbox'; the objects of the class are
+        scanned.
+        '''
+        classname = cls if isinstance(cls, str) else cls.__name__
+        with self.__rwlock.read():
+            objects = self.__partitions.get(classname, {})
+            return [objects[k] for k in self.geo_index(objects).bbox(
+                south, west, north, east)]
+
+    def lookup_nearest(self, cls, lat, lon, count=1, max_km=None):
+        '''Returns the objects of a class nearest to a position
+
+        See 'FileStorage.lookup_nearest'; the objects of the class are
+        scanned.
+        '''
+        classname = cls if isinstance(cls, str) else cls.__name__
+        with self.__rwlock.read():
+            objects = self.__partitions.get(classname, {})
+            return [(d, objects[k]) for d, k in self.geo_index(
+                objects).nearest(lat, lon, count, max_km)]
+
+    def query(self, cls, where=(), fields=None, order_by=None, limit=None,
+              offset=0):
+        '''Returns the objects of a class matching predicates
+
+        See 'FileStorage.query'; an equality predicate on a foreign key
+        attribute is looked up with its index.
+        '''
+        classname = cls if isinstance(cls, str) else cls.__name__
+        where = check_predicates(where)
+
+        indexed = index_predicate(where, self.__columns)
+        if indexed is not None:
+            objects = self.lookup(classname, *indexed)
+            return select(objects.values(), where, fields, order_by,
+                          limit, offset)
+
+        with self.__rwlock.read():
+            return select(self.all(classname).values(), where, fields,
+                          order_by, limit, offset)
+
+    def save(self, wait=False):
+        '''Writes the objects changed since the last save to the database
+
+        Args:
+            wait (bool): unused, the changes are always written at once.
+        '''
+        with self.__rwlock.write():
+            pending = self.__pending
+            self.__pending = {}
+            rows = [self.row(k, v) for k, v in pending.items()
+                    if v is not None]
+            deleted = [(k,) for k, v in pending.items() if v is None]
+            if len(rows) == 0 and len(deleted) == 0:
+                return
+            self.__db_lock.acquire()
+
+        written = False
+        try:
+            conn = self.connect()
+            with conn:
+                conn.executemany(
+                    'INSERT OR REPLACE INTO objects VALUES ({})'.format(
+                        ', '.join('?' * (3 + len(self.__columns)))), rows)
+                conn.executemany('DELETE FROM objects WHERE key = ?',
+                                 deleted)
+            written = True
+        finally:
+            self.__db_lock.release()
+            if not written:
+                self.restore_pending(pending)
+
+    def restore_pending(self, pending):
+        '''Marks the changes of a failed write as changed again, so that
+        the next 'save' writes them
+
+        Args:
+            pending (dict): the changes collected for the write; the
+                            objects changed again since are kept as is.
+        '''
+        with self.__rwlock.write():
+            for k, v in pending.items():
+                self.__pending.setdefault(k, v)
+
+    def row(self, k, obj):
+        '''Returns the row of obj
+
+        Args:
+            k (str): the key of obj.
+            obj (BaseModel): the object.
+        '''
+        dictionary = obj.to_dict()
+        columns = tuple(dictionary.get(attr) for attr in self.__columns)
+        return (k, dictionary['__class__'], json.dumps(dictionary)) + columns
+
+    def reload(self):
+        '''Loads all rows of the database to __objects'''
+        loaded = [self.load_object(json.loads(data)) for data, in
+                  self.execute('SELECT data FROM objects')]
+
+        with self.__rwlock.write():
+            for obj in loaded:
+                self.new(obj)
+            self.__pending = {}
+
+    def flush(self):
+        '''Writes the changes now'''
+        self.save()
+
+    def compact(self, wait=False):
+        '''Folds the write-ahead log into the database file
+
+        Args:
+            wait (bool): unused, the log is always folded at once.
+        '''
+        self.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+
+    def close(self):
+        '''Writes the changes and closes the database'''
+        self.save()
+        self.disconnect()
+
+    def connect(self):
+        '''Returns the database connection, opening it if needed
+
+        Note:
+            must be called holding __db_lock.
+        '''
+        if self.__conn is not None:
+            return self.__conn
+
+        conn = sqlite3.connect(self.__file_path, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS objects (key TEXT PRIMARY KEY, '
+            'class TEXT NOT NULL, data TEXT NOT NULL, {})'.format(
+                ', '.join('{} TEXT'.format(c) for c in self.__columns)))
+        for c in self.__columns:
+            conn.execute(
+                'CREATE INDEX IF NOT EXISTS objects_{0} ON objects '
+                '(class, {0})'.format(c))
+        conn.commit()
+
+        self.__conn = conn
+        return conn
+
+    def disconnect(self):
+        '''Closes the database connection, if open'''
+        with self.__db_lock:
+            if self.__conn is not None:
+                self.__conn.close()
+                self.__conn = None
+
+    def execute(self, sql, params=()):
+        '''Executes a SQL statement and returns its rows
+
+        Args:
+            sql (str): the statement.
+            params (tuple): its parameters.
+        '''
+        with self.__db_lock:
+            return self.connect().execute(sql, params).fetchall()
+
+    def update_file_path(self, arg):
+        '''Update the database path, closing the current database'''
+        self.disconnect()
+        self.__file_path = arg
+
+    def update_compact_mode(self, arg):
+        '''Enable or disable the compact objects for the objects read from
+        the database, see 'BaseModel.compact'
+        '''
+        self.__compact = bool(arg)
+
+    def reset(self):
+        '''To reset storage'''
+        with self.__rwlock.write():
+            self.__objects = {}
+            self.__partitions = {}
+            self.__pending = {}
+            with self.__db_lock:
+                conn = self.connect()
+                with conn:
+                    conn.execute('DELETE FROM objects')
+
+    def load_object(self, v):
+        '''Creates an instance from its dictionary representation
+
+        Args:
+            v (dict): the dictionary representation.
+        '''
+        cls = self.__classes[v['__class__']]
+        if self.__compact:
+            cls = cls.compact()
+        return cls.from_dict(v)
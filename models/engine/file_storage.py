@@ -4,8 +4,26 @@ FileStorage:
     is a class that serializes instances to a JSON file and
     deserializes JSON file to instances.
 '''
+import atexit
 import json
-from os.path import isfile
+from itertools import chain
+from queue import Empty, Queue
+from time import sleep
+from os import O_RDONLY, close, cpu_count, fsync, open as os_open, remove, \
+    replace
+from os.path import abspath, dirname, getsize, isfile
+from threading import Condition, Lock, Thread, Timer
+from zlib import crc32
+from models.engine.serializers import JSONSerializer, get_serializer, \
+    open_file
+from models.engine.cow import COWDict, Snapshot
+from models.engine.mmap_file import MappedFile, MappedObjects, write_file
+from models.engine.processes import map_processes
+from models.engine.query import check_predicates, index_predicate, \
+    range_predicate, select
+from models.engine.geo_index import GeoIndex
+from models.engine.range_index import RangeIndex
+from models.engine.rwlock import RWLock
 from models.base_model import BaseModel
 from models.user import User
 from models.state import State
@@ -24,34 +42,1171 @@ class FileStorage():
     Private Attributes:
         __file_path (str):  path to the JSON file.
         __objects (dict): Empty but will store all objects by <class name>.id.
+        __partitions (dict): the objects of __objects by class name.
+        __cow (dict): copies of __partitions as COWDict, by class name,
+                      built by the first 'snapshot'.
         __classes (dict): dictionary contains all classes
+        __journal (bool): if True, 'save' appends the changed objects to
+                          the journal file instead of rewriting the JSON file.
+        __pending (dict): objects changed since the last 'save' by key,
+                          None marks a destroyed object.
+        __records (dict): JSON text of the objects unchanged since they
+                          were last serialized, by key.
+        __indexes (dict): attributes indexed by class name.
+        __index_data (dict): objects by key, by attribute value,
+                             by (class name, attribute).
+        __indexed (dict): indexed (attribute, value) pairs by key.
+        __range_indexes (dict): numeric attributes with a range index,
+                                by class name.
+        __range_data (dict): RangeIndex of the objects by
+                             (class name, attribute).
+        __geo_indexes (dict): (latitude, longitude) attributes with a
+                              spatial index, by class name.
+        __geo_data (dict): GeoIndex of the objects by class name.
+        __compact_min_bytes (int): journal size from which it is compacted.
+        __compact_ratio (float): journal size, relative to the JSON file
+                                 size, from which it is compacted.
+        __compactor (Thread): the running compaction, if any.
+        __generation (int): incremented every time the JSON file is
+                            rewritten from memory.
+        __lock (Lock): guards the journal and JSON files replacement.
+        __lazy (bool): if True, 'reload' only indexes the JSON file and the
+                       objects are created when they are first accessed.
+        __unloaded (dict): (offset, length) of the JSON text of the objects
+                           not created yet, by key, by class name.
+        __lazy_file (file): the JSON file the __unloaded offsets refer to.
+        __lazy_names (list): the field names of __lazy_file.
+        __serializer: the format of the JSON file, see 'serializers'.
+        __durability (str): when the written files are synced to disk:
+            - 'none': never, the OS writes them back.
+            - 'file': before the JSON file is replaced and after each
+                      journal append.
+            - 'full': like 'file', and the directory is synced too after
+                      a file is replaced or created.
+        __group_window (float): in group commit mode, seconds during which
+                                the saves are gathered in one write,
+                                0 to write on every save.
+        __group_max_ops (int): number of saves written at once at most.
+        __requested (int): number of saves requested in group commit mode.
+        __committed (int): number of requested saves written.
+        __commit_cond (Condition): guards the group commit counters.
+        __commit_timer (Timer): the pending group commit, if any.
+        __rwlock (RWLock): guards the objects, held for reading while
+                           they are read and for writing while they are
+                           changed or collected to be written.
+        __commit_lock (Lock): serializes the group commits.
+        __writer (Thread): the background writer, if enabled.
+        __write_queue (Queue): the saves requested to the writer.
+        __write_error (Exception): the error of the last write of the
+                                   writer or group commit, None if it
+                                   succeeded.
+        __shard_count (int): in sharded mode, number of files the objects
+                             are spread over, 0 to use one JSON file.
+        __shard_workers (int): number of processes reading the shards,
+                               None for the number of CPUs.
+        __shards (list): the objects of __objects by shard.
+        __dirty_shards (set): the shards changed since the last 'save'.
+        __broken_shards (set): the shards whose file couldn't be read by
+                               the last 'reload'; their files are kept
+                               as is, and never rewritten.
+        __reload_workers (int): number of processes 'reload' decodes the
+                                JSON file with, 0 to decode it in this
+                                process.
+        __reload_chunk (int): number of objects decoded per task.
+        __compact (bool): if True, the objects read from the files are
+                          instances of the compact variant of their class,
+                          see 'BaseModel.compact'.
+        __mmap (bool): if True, the storage is read-only and 'reload' maps
+                       the file, an indexed file (see 'mmap_file'), in
+                       memory instead of reading it.
+        __mapped (MappedFile): the mapped file, in mmap mode.
     '''
 
-    __file_path = 'file.json'
-    __objects = {}
     __classes = {'BaseModel': BaseModel, 'User': User, 'State': State,
                  'City': City, 'Amenity': Amenity,
                  'Place': Place, 'Review': Review}
+    __durability_levels = ('none', 'file', 'full')
 
-    def all(self):
-        '''Returns the dictionary __objects'''
-        return self.__objects
+    def __init__(self):
+        '''Initialize an empty storage, filled by 'reload' '''
+        self.__file_path = 'file.json'
+        self.__objects = {}
+        self.__partitions = {}
+        self.__cow = None
+        self.__journal = False
+        self.__pending = {}
+        self.__records = {}
+        self.__indexes = {'City': ('state_id',),
+                          'Place': ('city_id', 'user_id'),
+                          'Review': ('place_id', 'user_id')}
+        self.__index_data = {}
+        self.__indexed = {}
+        self.__range_indexes = {'Place': ('price_by_night', 'number_rooms',
+                                          'number_bathrooms', 'max_guest')}
+        self.__range_data = {}
+        self.__geo_indexes = {'Place': ('latitude', 'longitude')}
+        self.__geo_data = {}
+        self.__compact_min_bytes = 1024 * 1024
+        self.__compact_ratio = 1.0
+        self.__compactor = None
+        self.__generation = 0
+        self.__lock = Lock()
+        self.__lazy = False
+        self.__unloaded = {}
+        self.__lazy_file = None
+        self.__lazy_names = []
+        self.__serializer = JSONSerializer()
+        self.__durability = 'file'
+        self.__group_window = 0
+        self.__group_max_ops = 100
+        self.__requested = 0
+        self.__committed = 0
+        self.__commit_cond = Condition()
+        self.__commit_timer = None
+        self.__rwlock = RWLock()
+        self.__commit_lock = Lock()
+        self.__writer = None
+        self.__write_queue = None
+        self.__write_error = None
+        self.__shard_count = 0
+        self.__shard_workers = None
+        self.__shards = []
+        self.__dirty_shards = set()
+        self.__broken_shards = set()
+        self.__reload_workers = 0
+        self.__reload_chunk = 20000
+        self.__compact = False
+        self.__mmap = False
+        self.__mapped = None
+
+    def all(self, cls=None):
+        '''Returns the dictionary __objects
+
+        Args:
+            cls (type or str): if given, only the objects of this class
+                               (or class name) are returned.
+
+        Note:
+            the dictionary is the one the storage changes, it must be
+            iterated within 'read_lock' if other threads change objects,
+            or use 'snapshot' instead.
+            in mmap mode, it's a read-only mapping whose objects are
+            created from the mapped file every time they are read.
+        '''
+        if self.__mapped is not None:
+            return self.mapped_objects(cls)
+
+        if cls is None:
+            self.hydrate()
+            return self.__objects
+
+        classname = cls if isinstance(cls, str) else cls.__name__
+        self.hydrate(classname)
+        return self.__partitions.get(classname, {})
+
+    def count(self, cls=None):
+        '''Returns the number of objects
+
+        Args:
+            cls (type or str): if given, only the objects of this class
+                               (or class name) are counted.
+        '''
+        if self.__mapped is not None:
+            return len(self.mapped_objects(cls))
+
+        with self.__rwlock.read():
+            if cls is None:
+                unloaded = sum(len(v) for v in self.__unloaded.values())
+                return len(self.__objects) + unloaded
+
+            classname = cls if isinstance(cls, str) else cls.__name__
+            return len(self.__partitions.get(classname, {})) + \
+                len(self.__unloaded.get(classname, {}))
+
+    def get(self, cls, id):
+        '''Returns an object by class and id
+
+        Args:
+            cls (type or str): the class or class name.
+            id (str): the object id.
+
+        Returns:
+            BaseModel: the object, None if there is none.
+
+        Note:
+            in lazy mode only this object is created, in mmap mode it's
+            found with the index of the mapped file.
+        '''
+        classname = cls if isinstance(cls, str) else cls.__name__
+        k = '{}.{}'.format(classname, id)
+        if self.__mapped is not None:
+            return self.mapped_objects(classname).get(k)
+
+        self.hydrate_key(k)
+        return self.__objects.get(k)
+
+    def exists(self, cls, id):
+        '''Returns True if there is an object with a class and id
+
+        Args:
+            cls (type or str): the class or class name.
+            id (str): the object id.
+
+        Note:
+            no object is created, in lazy mode nor in mmap mode.
+        '''
+        classname = cls if isinstance(cls, str) else cls.__name__
+        k = '{}.{}'.format(classname, id)
+        if self.__mapped is not None:
+            return self.__mapped.find(k) >= 0
+
+        return k in self.__objects or \
+            k in self.__unloaded.get(classname, {})
+
+    def snapshot(self, cls=None):
+        '''Returns a point-in-time read-only view of the objects
+
+        The view shares its unchanged parts with the storage, so taking
+        it doesn't copy the objects, and it can be iterated while other
+        threads add or delete objects.
+
+        Args:
+            cls (type or str): if given, only the objects of this class
+                               (or class name) are in the view.
+
+        Returns:
+            Snapshot: a read-only mapping of the objects by key.
+
+        Note:
+            the objects themselves are shared, not copied: the attributes
+            changed after the snapshot are seen through it.
+            in mmap mode, the mapped file doesn't change and the view is
+            the one 'all' returns.
+        '''
+        if self.__mapped is not None:
+            return self.mapped_objects(cls)
+
+        classname = None
+        if cls is not None:
+            classname = cls if isinstance(cls, str) else cls.__name__
+        self.hydrate(classname)
+
+        if self.__cow is None:
+            with self.__rwlock.write():
+                if self.__cow is None:
+                    self.__cow = {name: COWDict(part.items())
+                                  for name, part in self.__partitions.items()}
+
+        with self.__rwlock.read():
+            if classname is None:
+                return Snapshot(v.freeze() for v in self.__cow.values())
+            if classname not in self.__cow:
+                return Snapshot(())
+            return Snapshot([self.__cow[classname].freeze()])
+
+    def read_lock(self):
+        '''Returns a context manager holding the storage for reading
+
+        Objects can't be added, changed or deleted by other threads while
+        it is held, but any number of threads can read at the same time.
+        The thread holding it must not change objects, nor call 'all'
+        which creates the objects not loaded yet in lazy mode.
+
+        Example:
+            objects = storage.all()
+            with storage.read_lock():
+                for k, v in objects.items():
+                    ...
+        '''
+        return self.__rwlock.read()
+
+    def mapped_objects(self, cls=None):
+        '''Returns the objects of the mapped file
+
+        Args:
+            cls (type or str): if given, only the objects of this class
+                               (or class name) are returned.
+
+        Returns:
+            MappedObjects: a read-only mapping of the objects by key.
+        '''
+        mapped = self.__mapped
+        if cls is None:
+            lo, hi = 0, mapped.count
+        else:
+            classname = cls if isinstance(cls, str) else cls.__name__
+            lo, hi = mapped.prefix_range(classname + '.')
+        return MappedObjects(mapped, lo, hi, self.load_object)
+
+    def check_writable(self):
+        '''Raises PermissionError in mmap mode'''
+        if self.__mmap:
+            raise PermissionError('The storage is read-only (mmap mode)')
 
     def new(self, obj):
         '''Sets in __objects the obj with key <obj class name>.id'''
+        self.check_writable()
         classname = obj.__class__.__name__
         obj_id = obj.id
         k = '{}.{}'.format(classname, obj_id)
-        self.__objects[k] = obj
+        with self.__rwlock.write():
+            self.__objects[k] = obj
+            self.__partitions.setdefault(classname, {})[k] = obj
+            if self.__cow is not None:
+                self.__cow.setdefault(classname, COWDict())[k] = obj
+            if self.__shard_count > 0:
+                shard = self.shard(k)
+                self.__shards[shard][k] = obj
+                self.__dirty_shards.add(shard)
+            self.__pending[k] = obj
+            self.__records.pop(k, None)
+            self.unindex(k)
+            self.reindex(k, obj)
+            self.reindex_range(k, obj)
+            self.reindex_geo(k, obj)
+
+            unloaded = self.__unloaded.get(classname)
+            if unloaded is not None:
+                unloaded.pop(k, None)
+
+    def mark_dirty(self, obj):
+        '''Marks obj as changed so that the next 'save' serializes it again
+
+        Note:
+            called on every attribute assignment of a model, it must be
+            called explicitly after changing an attribute in place
+            (e.g. appending to 'Place.amenity_ids').
+        '''
+        k = '{}.{}'.format(obj.__class__.__name__, getattr(obj, 'id', None))
+        if self.__objects.get(k) is not obj:
+            return
+
+        with self.__rwlock.write():
+            self.__pending[k] = obj
+            self.__records.pop(k, None)
+            self.reindex(k, obj)
+            self.reindex_range(k, obj)
+            self.reindex_geo(k, obj)
+            if self.__shard_count > 0:
+                self.__dirty_shards.add(self.shard(k))
+
+    def delete(self, obj=None):
+        '''Deletes obj from __objects if it's inside'''
+        if obj is None:
+            return
+
+        self.check_writable()
+        classname = obj.__class__.__name__
+        k = '{}.{}'.format(classname, obj.id)
+        with self.__rwlock.write():
+            self.__objects.pop(k, None)
+            self.__partitions.get(classname, {}).pop(k, None)
+            if self.__cow is not None and classname in self.__cow:
+                self.__cow[classname].pop(k)
+            if self.__shard_count > 0:
+                shard = self.shard(k)
+                self.__shards[shard].pop(k, None)
+                self.__dirty_shards.add(shard)
+            self.__pending[k] = None
+            self.__records.pop(k, None)
+            self.unindex(k)
+            self.unindex_range(k)
+            self.unindex_geo(k)
+
+    def lookup(self, cls, attr, value):
+        '''Returns the objects of a class having an attribute value
+
+        Args:
+            cls (type or str): the class or class name.
+            attr (str): the attribute name.
+            value: the attribute value.
+
+        Returns:
+            dict: the matching objects by key.
+
+        Note:
+            attributes without index are looked up with a full scan.
+        '''
+        classname = cls if isinstance(cls, str) else cls.__name__
+        if self.__mapped is not None:
+            return {k: v for k, v in self.mapped_objects(classname).items()
+                    if getattr(v, attr, None) == value}
+
+        self.hydrate(classname)
+        with self.__rwlock.read():
+            if attr in self.__indexes.get(classname, ()):
+                index = self.__index_data.get((classname, attr), {})
+                return dict(index.get(value, {}))
+
+            res = {}
+            for k, v in self.__partitions.get(classname, {}).items():
+                if getattr(v, attr, None) == value:
+                    res[k] = v
+            return res
+
+    def query(self, cls, where=(), fields=None, order_by=None, limit=None,
+              offset=0):
+        '''Returns the objects of a class matching predicates
+
+        Args:
+            cls (type or str): the class or class name.
+            where (iterable): (attribute, operator, value) predicates,
+                              see 'query.OPERATORS'.
+            fields (list): if given, the attribute names returned.
+            order_by (str): if given, the attribute the objects are sorted
+                            by, prefixed by '-' to sort in descending order.
+            limit (int): if given, the maximum number of objects returned.
+            offset (int): number of matching objects skipped.
+
+        Returns:
+            list: the objects, or the dictionaries of their fields.
 
-    def save(self):
-        '''Serializes __objects to the JSON file (path: __file_path)'''
-        with open(self.__file_path, 'w', encoding='utf-8') as storage:
-            dictionary = {}
-            for k, v in self.__objects.items():
-                dictionary[k] = v.to_dict()
+        Raises:
+            ValueError: if an operator is unknown or the order_by values
+                        can't be compared.
 
-            json.dump(dictionary, storage)
+        Example:
+            storage.query(Place, [('price_by_night', '<', 100),
+                                  ('max_guest', '>=', 4)],
+                          fields=['name'], order_by='-max_guest')
+
+        Note:
+            if an equality predicate is on an indexed attribute, or a
+            comparison with a number is on an attribute with a range
+            index, only the objects the index returns are checked,
+            otherwise the objects of the class are scanned once.
+            Without order_by, the objects are in no particular order.
+        '''
+        classname = cls if isinstance(cls, str) else cls.__name__
+        where = check_predicates(where)
+
+        indexed = index_predicate(where, self.__indexes.get(classname, ()))
+        if indexed is not None and self.__mapped is None:
+            objects = self.lookup(classname, *indexed)
+            return select(objects.values(), where, fields, order_by,
+                          limit, offset)
+
+        ranged = range_predicate(where,
+                                 self.__range_indexes.get(classname, ()))
+        if ranged is not None and self.__mapped is None:
+            objects = self.lookup_range(classname, *ranged)
+            return select(objects, where, fields, order_by, limit, offset)
+
+        objects = self.all(classname)
+        if self.__mapped is not None:
+            return select(objects.values(), where, fields, order_by,
+                          limit, offset)
+
+        with self.__rwlock.read():
+            return select(objects.values(), where, fields, order_by,
+                          limit, offset)
+
+    def add_index(self, cls, attr):
+        '''Indexes an attribute of a class for 'lookup'
+
+        Args:
+            cls (type or str): the class or class name.
+            attr (str): the attribute name.
+        '''
+        classname = cls if isinstance(cls, str) else cls.__name__
+        self.hydrate(classname)
+        with self.__rwlock.write():
+            attrs = self.__indexes.get(classname, ())
+            if attr in attrs:
+                return
+
+            self.__indexes = {**self.__indexes, classname: attrs + (attr,)}
+            for k, v in self.__partitions.get(classname, {}).items():
+                self.reindex(k, v)
+
+    def lookup_range(self, cls, attr, low=None, high=None, limit=None,
+                     reverse=False):
+        '''Returns the objects of a class with a numeric attribute value
+        between low and high, included, sorted by this value
+
+        Args:
+            cls (type or str): the class or class name.
+            attr (str): the attribute name.
+            low (int or float): if given, the lowest value.
+            high (int or float): if given, the highest value.
+            limit (int): if given, the maximum number of objects returned.
+            reverse (bool): if True, the objects are in descending order
+                            of value, e.g. the top-k with limit=k.
+
+        Returns:
+            list: the objects.
+
+        Note:
+            the objects whose value isn't an int or a float are left out.
+            With a range index, it takes O(log n + k), otherwise the
+            objects of the class are scanned and sorted.
+        '''
+        classname = cls if isinstance(cls, str) else cls.__name__
+        if self.__mapped is not None:
+            objects = dict(self.mapped_objects(classname).items())
+            index = RangeIndex((k, getattr(v, attr, None))
+                               for k, v in objects.items())
+            return [objects[k] for k in index.range(low, high, limit,
+                                                    reverse)]
+
+        self.hydrate(classname)
+        with self.__rwlock.read():
+            objects = self.__partitions.get(classname, {})
+            if attr in self.__range_indexes.get(classname, ()):
+                index = self.__range_data.get((classname, attr),
+                                              RangeIndex())
+            else:
+                index = RangeIndex((k, getattr(v, attr, None))
+                                   for k, v in objects.items())
+            return [objects[k] for k in index.range(low, high, limit,
+                                                    reverse)]
+
+    def add_range_index(self, cls, attr):
+        '''Indexes a numeric attribute of a class for 'lookup_range'
+
+        Args:
+            cls (type or str): the class or class name.
+            attr (str): the attribute name.
+        '''
+        classname = cls if isinstance(cls, str) else cls.__name__
+        self.hydrate(classname)
+        with self.__rwlock.write():
+            attrs = self.__range_indexes.get(classname, ())
+            if attr in attrs:
+                return
+
+            self.__range_indexes = {**self.__range_indexes,
+                                    classname: attrs + (attr,)}
+            self.__range_data[(classname, attr)] = RangeIndex(
+                (k, getattr(v, attr, None))
+                for k, v in self.__partitions.get(classname, {}).items())
+
+    def reindex(self, k, obj):
+        '''Updates the indexes with the attribute values of obj
+
+        Args:
+            k (str): the key of obj.
+            obj (BaseModel): the object.
+        '''
+        classname = obj.__class__.__name__
+        attrs = self.__indexes.get(classname)
+        if attrs is None:
+            return
+
+        values = tuple((attr, getattr(obj, attr, None)) for attr in attrs)
+        if self.__indexed.get(k) == values:
+            return
+
+        self.unindex(k)
+        for attr, value in values:
+            index = self.__index_data.setdefault((classname, attr), {})
+            index.setdefault(value, {})[k] = obj
+        self.__indexed[k] = values
+
+    def unindex(self, k):
+        '''Removes the object with key k from the indexes'''
+        values = self.__indexed.pop(k, None)
+        if values is None:
+            return
+
+        classname = k.split('.', 1)[0]
+        for attr, value in values:
+            index = self.__index_data[(classname, attr)]
+            index[value].pop(k, None)
+            if len(index[value]) == 0:
+                del index[value]
+
+    def reindex_range(self, k, obj):
+        '''Updates the range indexes with the attribute values of obj
+
+        Args:
+            k (str): the key of obj.
+            obj (BaseModel): the object.
+        '''
+        classname = obj.__class__.__name__
+        for attr in self.__range_indexes.get(classname, ()):
+            index = self.__range_data.get((classname, attr))
+            if index is None:
+                index = self.__range_data[(classname, attr)] = RangeIndex()
+            index.add(k, getattr(obj, attr, None))
+
+    def unindex_range(self, k):
+        '''Removes the object with key k from the range indexes'''
+        classname = k.split('.', 1)[0]
+        for attr in self.__range_indexes.get(classname, ()):
+            index = self.__range_data.get((classname, attr))
+            if index is not None:
+                index.remove(k)
+
+    def reindex_geo(self, k, obj):
+        '''Updates the spatial index with the position of obj
+
+        Args:
+            k (str): the key of obj.
+            obj (BaseModel): the object.
+        '''
+        classname = obj.__class__.__name__
+        attrs = self.__geo_indexes.get(classname)
+        if attrs is None:
+            return
+
+        index = self.__geo_data.get(classname)
+        if index is None:
+            index = self.__geo_data[classname] = GeoIndex()
+        index.add(k, obj.own_attribute(attrs[0]),
+                  obj.own_attribute(attrs[1]))
+
+    def unindex_geo(self, k):
+        '''Removes the object with key k from the spatial index'''
+        index = self.__geo_data.get(k.split('.', 1)[0])
+        if index is not None:
+            index.remove(k)
+
+    def geo_index(self, classname, objects):
+        '''Returns the spatial index of a class
+
+        Args:
+            classname (str): the class name.
+            objects (Mapping): the objects of the class by key.
+
+        Note:
+            without index, and in mmap mode, a temporary index is built
+            with the objects.
+        '''
+        if self.__mapped is None and classname in self.__geo_indexes:
+            return self.__geo_data.get(classname, GeoIndex())
+
+        attrs = self.__geo_indexes.get(classname, ('latitude', 'longitude'))
+        return GeoIndex((k, v.own_attribute(attrs[0]),
+                         v.own_attribute(attrs[1]))
+                        for k, v in objects.items())
+
+    def lookup_bbox(self, cls, south, west, north, east):
+        '''Returns the objects of a class in a bounding box, edges included
+
+        Args:
+            cls (type or str): the class or class name.
+            south (float): the lowest latitude.
+            west (float): the western longitude.
+            north (float): the highest latitude.
+            east (float): the eastern longitude, lower than west if the
+                          box crosses the antimeridian.
+
+        Returns:
+            list: the objects, in no particular order.
+
+        Note:
+            the position of the objects is their 'latitude' and
+            'longitude', the objects without a valid position (or which
+            never set one, the class defaults are not positions) are
+            left out.
+        '''
+        classname = cls if isinstance(cls, str) else cls.__name__
+        if self.__mapped is not None:
+            objects = self.all(classname)
+            return [objects[k] for k in self.geo_index(
+                classname, objects).bbox(south, west, north, east)]
+
+        self.hydrate(classname)
+        with self.__rwlock.read():
+            objects = self.__partitions.get(classname, {})
+            return [objects[k] for k in self.geo_index(
+                classname, objects).bbox(south, west, north, east)]
+
+    def lookup_nearest(self, cls, lat, lon, count=1, max_km=None):
+        '''Returns the objects of a class nearest to a position
+
+        Args:
+            cls (type or str): the class or class name.
+            lat (float): the latitude.
+            lon (float): the longitude.
+            count (int): the maximum number of objects returned.
+            max_km (float): if given, the maximum distance in km.
+
+        Returns:
+            list: the (distance in km, object) pairs, nearest first.
+
+        Raises:
+            ValueError: if the position is invalid.
+        '''
+        classname = cls if isinstance(cls, str) else cls.__name__
+        if self.__mapped is not None:
+            objects = self.all(classname)
+            return [(d, objects[k]) for d, k in self.geo_index(
+                classname, objects).nearest(lat, lon, count, max_km)]
+
+        self.hydrate(classname)
+        with self.__rwlock.read():
+            objects = self.__partitions.get(classname, {})
+            return [(d, objects[k]) for d, k in self.geo_index(
+                classname, objects).nearest(lat, lon, count, max_km)]
+
+    def save(self, wait=False):
+        '''Serializes __objects to the JSON file (path: __file_path)
+
+        Args:
+            wait (bool): in group commit or background writer mode,
+                         return only once the changes are written.
+
+        Note:
+            in journal mode only the objects changed since the last save
+            are appended to the journal file.
+            in group commit mode, the saves requested during the window
+            (or until the maximum number of saves is reached) are
+            written at once.
+            in background writer mode, the changes are written by the
+            writer thread; the save blocks while the queue is full.
+        '''
+        self.check_writable()
+        if self.__writer is not None:
+            with self.__commit_cond:
+                self.__requested += 1
+                ticket = self.__requested
+            self.__write_queue.put(ticket)
+        elif self.__group_window <= 0:
+            self.persist()
+            return
+        else:
+            with self.__commit_cond:
+                self.__requested += 1
+                ticket = self.__requested
+                now = ticket - self.__committed >= self.__group_max_ops
+                if not now and self.__commit_timer is None:
+                    self.__commit_timer = Timer(self.__group_window,
+                                                self.commit)
+                    self.__commit_timer.start()
+
+            if now:
+                self.commit()
+
+        if wait:
+            self.wait_committed(ticket)
+
+    def wait_committed(self, ticket):
+        '''Waits until the save with number ticket is written
+
+        Raises:
+            Exception: the error of the background writer or of the group
+                       commit, if its last write failed; the changes of a
+                       failed write stay pending and are written by the
+                       next save.
+        '''
+        with self.__commit_cond:
+            self.__commit_cond.wait_for(lambda: self.__committed >= ticket)
+            error = self.__write_error
+        if error is not None:
+            raise error
+
+    def commit(self):
+        '''Writes the saves requested so far in group commit mode'''
+        with self.__commit_lock:
+            with self.__commit_cond:
+                ticket = self.__requested
+                timer = self.__commit_timer
+                self.__commit_timer = None
+                if ticket <= self.__committed:
+                    return
+
+            if timer is not None:
+                timer.cancel()
+
+            error = None
+            try:
+                self.persist()
+            except Exception as e:
+                error = e
+                raise
+            finally:
+                with self.__commit_cond:
+                    self.__write_error = error
+                    self.__committed = ticket
+                    self.__commit_cond.notify_all()
+
+    def flush(self):
+        '''Writes the changes now and returns once they are written'''
+        if self.__writer is not None:
+            self.save(wait=True)
+        elif self.__group_window > 0:
+            self.commit()
+        else:
+            self.persist()
+
+    def close(self):
+        '''Writes the changes and stops the background writer'''
+        writer = self.__writer
+        if writer is None:
+            self.commit()
+            return
+
+        self.flush()
+        self.__writer = None
+        self.__write_queue.put(None)
+        writer.join()
+
+    def run_writer(self, queue):
+        '''Writes the requested saves, run by the background writer
+
+        Args:
+            queue (Queue): the numbers of the requested saves, None
+                           to stop.
+        '''
+        stop = False
+        while not stop:
+            ticket = queue.get()
+            if ticket is None:
+                return
+
+            if self.__group_window > 0:
+                sleep(self.__group_window)
+
+            while True:
+                try:
+                    more = queue.get_nowait()
+                except Empty:
+                    break
+                if more is None:
+                    stop = True
+                    break
+                ticket = more
+
+            error = None
+            try:
+                self.persist()
+            except Exception as e:
+                error = e
+
+            with self.__commit_cond:
+                self.__write_error = error
+                self.__committed = ticket
+                self.__commit_cond.notify_all()
+
+    def persist(self):
+        '''Writes the changes to the shards, the journal or the JSON file'''
+        if self.__shard_count > 0:
+            self.write_shards(self.__dirty_shards)
+        elif self.__journal:
+            self.append_journal()
+        else:
+            self.dump()
+
+    def dump(self):
+        '''Rewrites the JSON file with all objects and drops the journal
+
+        Note:
+            the records of the objects are collected while holding the
+            storage for writing, then written without it, to a temporary
+            file which then replaces the JSON file, so the JSON file is
+            never left partially written.
+            in sharded mode, all the shards are rewritten instead.
+        '''
+        if self.__shard_count > 0:
+            self.write_shards(range(self.__shard_count))
+            return
+
+        self.hydrate()
+        with self.__rwlock.write():
+            items = [(k, self.record(k, v))
+                     for k, v in self.__objects.items()]
+            pending = self.__pending
+            self.__pending = {}
+            self.__lock.acquire()
+
+        written = False
+        try:
+            tmp_path = '{}.dump.tmp'.format(self.__file_path)
+            self.write_file(tmp_path, items)
+            self.replace_file(tmp_path, self.__file_path)
+            written = True
+
+            self.__generation += 1
+            if isfile(self.journal_path()):
+                remove(self.journal_path())
+
+            compacting = self.compacting_path()
+            if self.__compactor is None and isfile(compacting):
+                remove(compacting)
+        finally:
+            self.__lock.release()
+            if not written:
+                self.restore_pending(pending)
+
+    def append_journal(self):
+        '''Appends one record per changed object to the journal file'''
+        with self.__rwlock.write():
+            if len(self.__pending) == 0:
+                return
+
+            pending = self.__pending
+            lines = []
+            for k, v in pending.items():
+                obj = 'null' if v is None else self.journal_record(k, v)
+                lines.append('{{"key": {}, "obj": {}}}\n'.format(
+                    json.dumps(k), obj))
+            self.__pending = {}
+            self.__lock.acquire()
+
+        written = False
+        try:
+            created = not isfile(self.journal_path())
+            with open(self.journal_path(), 'a', encoding='utf-8') as journal:
+                journal.writelines(lines)
+                self.sync_file(journal)
+
+            if created:
+                self.sync_dir(self.journal_path())
+            written = True
+        finally:
+            self.__lock.release()
+            if not written:
+                self.restore_pending(pending)
+
+        if self.needs_compaction():
+            self.compact()
+
+    def restore_pending(self, pending, shards=()):
+        '''Marks the changes of a failed write as changed again, so that
+        the next 'save' writes them
+
+        Args:
+            pending (dict): the changes collected for the write; the
+                            objects changed again since are kept as is.
+            shards (iterable): the shards the write didn't rewrite.
+        '''
+        with self.__rwlock.write():
+            for k, v in pending.items():
+                self.__pending.setdefault(k, v)
+            self.__dirty_shards.update(shards)
+
+    def write_shards(self, shards):
+        '''Rewrites shard files with their objects
+
+        Args:
+            shards (iterable): the numbers of the shards to rewrite.
+
+        Raises:
+            ValueError: if some of the shards couldn't be read by the last
+                        'reload'; the other shards are written, their
+                        changes stay pending.
+        '''
+        self.hydrate()
+        with self.__rwlock.write():
+            shards = set(shards)
+            broken = shards & self.__broken_shards
+            items = {i: [(k, self.record(k, v))
+                         for k, v in self.__shards[i].items()]
+                     for i in sorted(shards - broken)}
+            dirty = self.__dirty_shards | shards
+            pending = self.__pending
+            self.__dirty_shards = set()
+            self.__pending = {}
+            self.__lock.acquire()
+
+        try:
+            for i, shard_items in items.items():
+                path = self.shard_path(i)
+                tmp_path = '{}.tmp'.format(path)
+                self.write_file(tmp_path, shard_items)
+                self.replace_file(tmp_path, path)
+                dirty.discard(i)
+        finally:
+            self.__lock.release()
+            if len(dirty) > 0:
+                self.restore_pending(pending, dirty)
+
+        if len(broken) > 0:
+            raise ValueError('Invalid shard files not rewritten: {}'.format(
+                ', '.join(self.shard_path(i) for i in sorted(broken))))
+
+    def shard(self, k):
+        '''Returns the number of the shard of the object with key k'''
+        return crc32(k.encode('utf-8')) % self.__shard_count
+
+    def shard_path(self, i):
+        '''Returns the path of the shard file number i'''
+        return '{}.shard-{}-of-{}'.format(self.__file_path, i,
+                                         self.__shard_count)
+
+    def write_file(self, path, items):
+        '''Writes the (key, record) items to path and syncs it
+
+        Args:
+            path (str): the file path.
+            items (iterable): (key, record) pairs.
+        '''
+        try:
+            with self.open_file(path, 'w') as f:
+                self.__serializer.dump(f, items)
+                self.sync_file(f)
+        except BaseException:
+            if isfile(path):
+                remove(path)
+            raise
+
+    def replace_file(self, src, dst):
+        '''Atomically replaces the file dst with the file src'''
+        replace(src, dst)
+        self.sync_dir(dst)
+
+    def sync_file(self, file_obj):
+        '''Flushes file_obj to disk, according to the durability'''
+        if self.__durability == 'none':
+            return
+
+        file_obj.flush()
+        fsync(file_obj.fileno())
+
+    def sync_dir(self, path):
+        '''Flushes the directory of path to disk in 'full' durability'''
+        if self.__durability != 'full':
+            return
+
+        fd = os_open(dirname(abspath(path)), O_RDONLY)
+        try:
+            fsync(fd)
+        finally:
+            close(fd)
+
+    def record(self, k, obj):
+        '''Returns the record of obj, serializing it only if it changed
+
+        Args:
+            k (str): the key of obj.
+            obj (BaseModel): the object.
+        '''
+        rec = self.__records.get(k)
+        if rec is None:
+            rec = self.__serializer.encode(obj.to_dict())
+            self.__records[k] = rec
+
+        return rec
+
+    def journal_record(self, k, obj):
+        '''Returns the JSON text of obj for the journal
+
+        Args:
+            k (str): the key of obj.
+            obj (BaseModel): the object.
+        '''
+        if self.__serializer.name == 'json':
+            return self.record(k, obj)
+
+        dictionary = obj.to_dict()
+        self.__records[k] = self.__serializer.encode(dictionary)
+        return json.dumps(dictionary)
+
+    def needs_compaction(self):
+        '''Checks if the journal is big enough to be compacted'''
+        if not isfile(self.journal_path()):
+            return False
+
+        journal_size = getsize(self.journal_path())
+        if journal_size < self.__compact_min_bytes:
+            return False
+
+        snapshot_size = 0
+        if isfile(self.__file_path):
+            snapshot_size = getsize(self.__file_path)
+
+        return journal_size >= snapshot_size * self.__compact_ratio
+
+    def compact(self, wait=False):
+        '''Folds the journal into a fresh JSON file in a background thread
+
+        The journal is moved aside so that new changes keep being appended
+        while the JSON file is rebuilt, then the new JSON file replaces the
+        old one.
+
+        Args:
+            wait (bool): if True, return once the compaction is done.
+        '''
+        with self.__lock:
+            compactor = self.__compactor
+            if compactor is None:
+                compactor = self.rotate_journal()
+
+        if compactor is not None and wait:
+            compactor.join()
+
+    def rotate_journal(self):
+        '''Moves the journal aside and starts the compaction thread
+
+        Returns:
+            Thread: the compaction thread, None if there is no journal.
+        '''
+        journal = self.journal_path()
+        compacting = self.compacting_path()
+
+        if isfile(journal) and isfile(compacting):
+            with open(compacting, 'a', encoding='utf-8') as dst:
+                with open(journal, 'r', encoding='utf-8') as src:
+                    dst.write(src.read())
+            remove(journal)
+        elif isfile(journal):
+            replace(journal, compacting)
+        elif not isfile(compacting):
+            return None
+
+        compactor = Thread(target=self.run_compaction,
+                           args=(self.__generation,))
+        self.__compactor = compactor
+        compactor.start()
+        return compactor
+
+    def run_compaction(self, generation):
+        '''Writes the JSON file folded with the moved journal
+
+        Args:
+            generation (int): the JSON file generation the journal
+                              was moved aside at.
+        '''
+        changes = {}
+        tmp_path = '{}.compact.tmp'.format(self.__file_path)
+        written = False
+
+        try:
+            self.read_journal(changes, self.compacting_path())
+            try:
+                self.write_compacted(tmp_path, changes)
+                written = True
+            except ValueError:
+                # the JSON file is being rewritten by 'dump'
+                pass
+
+            with self.__lock:
+                if generation != self.__generation:
+                    # 'dump' already wrote every change of the moved journal
+                    remove(self.compacting_path())
+                elif written:
+                    self.replace_file(tmp_path, self.__file_path)
+                    remove(self.compacting_path())
+        finally:
+            with self.__lock:
+                self.__compactor = None
+                if isfile(tmp_path):
+                    remove(tmp_path)
+
+    def write_compacted(self, path, changes):
+        '''Writes the JSON file with the journal changes applied to path
+
+        Args:
+            path (str): path of the file to write.
+            changes (dict): records by key, None for destroyed objects.
+        '''
+        serializer = self.__serializer
+        src = None
+        if isfile(self.__file_path):
+            src = self.open_file(self.__file_path, 'r')
+
+        try:
+            items = serializer.load(src) if src is not None else ()
+            kept = ((k, serializer.encode(v)) for k, v in items
+                    if k not in changes)
+            changed = ((k, serializer.encode(v))
+                       for k, v in changes.items() if v is not None)
+            self.write_file(path, chain(kept, changed))
+        finally:
+            if src is not None:
+                src.close()
 
     def reload(self):
         '''Deserializes the JSON file to __objects.
@@ -59,27 +1214,470 @@ class FileStorage():
         Note:
             only if the JSON file(__file_path exists; otherwise, do nothing.
             If the file doesn’t exist, no exception should be raised).
+            The journal file, if any, is replayed on top of the JSON file.
+            The JSON file is read one object at a time, and the objects
+            are added once the whole file is read.
+            In lazy mode, only the position of each object in the JSON file
+            is read, if the file has one object per line.
+            In sharded mode, the shards are read in parallel; if there is
+            no shard yet, the JSON file is read and every shard is written
+            by the next save.
+            With reload workers, the objects are decoded and created by
+            chunks in parallel processes, if the file has one object per
+            line.
+            The processes are forked, see 'map_processes', so the reload
+            done by the import of 'models' uses them too.
+            In mmap mode, the file is mapped in memory and nothing is read
+            until the objects are accessed, see 'reload_mapped'.
         '''
-        if not isfile(self.__file_path):
+        if self.__mmap:
+            self.reload_mapped()
+            return
+
+        if self.__shard_count > 0 and self.reload_shards():
             return
 
-        with open(self.__file_path, 'r', encoding='utf-8') as file_obj:
-            jsn = None
+        changes = {}
+        loaded = []
+
+        self.hydrate()
+        with self.__lock:
+            self.read_journal(changes, self.compacting_path())
+            self.read_journal(changes, self.journal_path())
+
+            lazy = self.index_file(changes) if self.__lazy else None
+            chunks = None
+            if lazy is None and self.__reload_workers > 0:
+                chunks = self.load_chunks(changes)
 
+            if chunks is not None:
+                loaded = chunks
+            elif lazy is None and isfile(self.__file_path):
+                with self.open_file(self.__file_path, 'r') as f:
+                    try:
+                        for k, v in self.__serializer.load(f):
+                            if k not in changes:
+                                loaded.append(self.load_object(v))
+                    except ValueError:
+                        return
+
+        for v in changes.values():
+            if v is not None:
+                loaded.append(self.load_object(v))
+
+        with self.__rwlock.write():
+            if lazy is not None:
+                self.__unloaded, self.__lazy_file, self.__lazy_names = lazy
+            self.add_loaded(loaded)
+            self.__pending = {}
+
+    def reload_mapped(self):
+        '''Maps the indexed file (path: __file_path) in memory, in place
+        of the file mapped before
+
+        Raises:
+            ValueError: if the file is not an indexed file, written by
+                        'write_mapped_file' or 'mmap_file.convert'.
+        '''
+        mapped = None
+        if isfile(self.__file_path):
             try:
-                jsn = json.loads(file_obj.read())
-                self.serialize_loaded_json(jsn)
-            except json.JSONDecodeError:
+                mapped = MappedFile(self.__file_path)
+            except ValueError as e:
+                raise ValueError(
+                    '{} is not an indexed storage file, convert it with '
+                    'models/engine/mmap_file.py'.format(
+                        self.__file_path)) from e
+
+        with self.__rwlock.write():
+            previous = self.__mapped
+            self.__mapped = mapped
+        if previous is not None:
+            previous.close()
+
+    def reload_shards(self):
+        '''Reads the shard files in parallel processes
+
+        Returns:
+            bool: False if there is no shard file.
+
+        Note:
+            the objects of the valid shards are loaded; the invalid shard
+            files are kept as is, see 'write_shards'.
+        '''
+        paths = [self.shard_path(i) for i in range(self.__shard_count)]
+        if not any(isfile(path) for path in paths):
+            return False
+
+        workers = min(self.__shard_workers or cpu_count() or 1, len(paths))
+        args = [(path, self.__serializer.name, self.__compact)
+                for path in paths]
+        shards = map_processes(load_shard, args, workers)
+
+        self.hydrate()
+        with self.__rwlock.write():
+            self.add_loaded(chain.from_iterable(
+                shard for shard in shards if shard is not None))
+            self.__pending = {}
+            self.__dirty_shards = set()
+            self.__broken_shards = {i for i, shard in enumerate(shards)
+                                    if shard is None}
+        return True
+
+    def add_loaded(self, objects):
+        '''Adds the objects read from the files
+
+        Args:
+            objects (iterable): the objects.
+
+        Note:
+            called holding the write lock; the range indexes are built
+            once with all the objects instead of updated per object.
+        '''
+        ranges = self.__range_indexes
+        geos = self.__geo_indexes
+        self.__range_indexes = {}
+        self.__geo_indexes = {}
+        try:
+            for obj in objects:
+                self.new(obj)
+        finally:
+            self.__range_indexes = ranges
+            self.__geo_indexes = geos
+
+        for classname, attrs in ranges.items():
+            partition = self.__partitions.get(classname, {})
+            for attr in attrs:
+                self.__range_data[(classname, attr)] = RangeIndex(
+                    (k, getattr(v, attr, None)) for k, v in partition.items())
+
+        for classname, attrs in geos.items():
+            partition = self.__partitions.get(classname, {})
+            self.__geo_data[classname] = GeoIndex(
+                (k, v.own_attribute(attrs[0]), v.own_attribute(attrs[1]))
+                for k, v in partition.items())
+
+    def load_chunks(self, changes):
+        '''Creates the objects of the JSON file in parallel processes
+
+        Args:
+            changes (dict): records of the journal by key, these objects
+                            are not created.
+
+        Returns:
+            list: the objects, None if the JSON file can't be indexed.
+        '''
+        if not isfile(self.__file_path):
+            return None
+
+        names = []
+        with open(self.__file_path, 'rb') as f:
+            try:
+                spans = [(offset, length) for k, offset, length
+                         in self.__serializer.index(f, names)
+                         if k not in changes]
+            except ValueError:
+                return None
+
+        size = self.__reload_chunk
+        args = [(self.__file_path, self.__serializer.name, names,
+                 spans[i:i + size], self.__compact)
+                for i in range(0, len(spans), size)]
+        if len(args) == 0:
+            return []
+
+        try:
+            return list(chain.from_iterable(map_processes(
+                load_chunk, args, self.__reload_workers)))
+        except ValueError:
+            return None
+
+    def index_file(self, changes):
+        '''Indexes the position of the objects in the JSON file
+
+        Args:
+            changes (dict): records of the journal by key, these objects
+                            are not indexed.
+
+        Returns:
+            tuple: the __unloaded positions, __lazy_file and __lazy_names,
+                   None if the JSON file can't be indexed.
+        '''
+        if not isfile(self.__file_path):
+            return None
+
+        unloaded = {}
+        names = []
+        f = open(self.__file_path, 'rb')
+        try:
+            for k, offset, length in self.__serializer.index(f, names):
+                if k in changes or k in self.__objects:
+                    continue
+                classname = k.split('.', 1)[0]
+                unloaded.setdefault(classname, {})[k] = (offset, length)
+        except ValueError:
+            f.close()
+            return None
+
+        if len(unloaded) == 0:
+            f.close()
+            return {}, None, []
+
+        return unloaded, f, names
+
+    def hydrate(self, classname=None):
+        '''Creates the objects not loaded yet in lazy mode
+
+        Args:
+            classname (str): if given, only the objects of this class
+                             are created.
+        '''
+        if len(self.__unloaded) == 0:
+            return
+
+        with self.__rwlock.write():
+            names = [classname] if classname else list(self.__unloaded)
+            for name in names:
+                for k, span in self.__unloaded.pop(name, {}).items():
+                    self.load_record(k, *span)
+
+            if len(self.__unloaded) == 0:
+                self.close_lazy_file()
+
+    def hydrate_key(self, k):
+        '''Creates the object with key k if it's not loaded yet'''
+        classname = k.split('.', 1)[0]
+        if k not in self.__unloaded.get(classname, {}):
+            return
+
+        with self.__rwlock.write():
+            unloaded = self.__unloaded.get(classname)
+            if unloaded is None or k not in unloaded:
                 return
 
+            self.load_record(k, *unloaded.pop(k))
+            if len(unloaded) == 0:
+                del self.__unloaded[classname]
+            if len(self.__unloaded) == 0:
+                self.close_lazy_file()
+
+    def load_record(self, k, offset, length):
+        '''Creates an object from its position in the JSON file
+
+        Args:
+            k (str): the key of the object.
+            offset (int): the position of its JSON text.
+            length (int): the length of its JSON text.
+        '''
+        self.__lazy_file.seek(offset)
+        data = self.__lazy_file.read(length)
+        dictionary = self.__serializer.decode(data, self.__lazy_names)
+
+        self.new(self.load_object(dictionary))
+        self.__pending.pop(k, None)
+
+    def close_lazy_file(self):
+        '''Closes the JSON file used by the lazy mode'''
+        self.__unloaded = {}
+        if self.__lazy_file is not None:
+            self.__lazy_file.close()
+            self.__lazy_file = None
+
+    def read_journal(self, changes, path):
+        '''Folds the journal records into changes
+
+        Args:
+            changes (dict): records by key, None for destroyed objects.
+            path (str): path of the journal file.
+
+        Note:
+            a torn last record (crash during append) is ignored.
+        '''
+        if not isfile(path):
+            return
+
+        with open(path, 'r', encoding='utf-8') as journal:
+            for line in journal:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    return
+
+                changes[record['key']] = record['obj']
+
     def update_file_path(self, arg):
         '''Update the file path'''
         self.__file_path = arg
 
+    def update_journal_mode(self, arg):
+        '''Enable or disable the append-only journal'''
+        self.__journal = bool(arg)
+
+    def update_compact_mode(self, arg):
+        '''Enable or disable the compact objects for the objects read from
+        the files, see 'BaseModel.compact'
+        '''
+        self.__compact = bool(arg)
+
+    def update_mmap_mode(self, arg):
+        '''Enable or disable the read-only mmap mode, see 'reload'
+
+        Note:
+            the processes mapping the same file share its pages in the
+            page cache instead of each holding a copy of the objects.
+        '''
+        self.__mmap = bool(arg)
+        if not self.__mmap and self.__mapped is not None:
+            self.__mapped.close()
+            self.__mapped = None
+
+    def write_mapped_file(self, path):
+        '''Writes the objects to an indexed file for the mmap mode
+
+        Args:
+            path (str): the file path.
+        '''
+        objects = self.all()
+        with self.__rwlock.read():
+            write_file(path, ((k, v.to_dict()) for k, v in objects.items()))
+
+    def update_lazy_mode(self, arg):
+        '''Enable or disable the lazy reload'''
+        self.__lazy = bool(arg)
+
+    def update_serializer(self, name):
+        '''Update the format of the JSON file
+
+        Args:
+            name (str): 'json' or 'binary'.
+        '''
+        self.__serializer = get_serializer(name)
+        self.__records = {}
+
+    def update_background_writer(self, arg, max_queue=1000):
+        '''Enable or disable the background writer
+
+        Args:
+            arg (bool): True to write the saves in a background thread.
+            max_queue (int): number of pending saves from which 'save'
+                             blocks.
+        '''
+        self.close()
+        if not arg:
+            return
+
+        queue = Queue(max_queue)
+        self.__write_queue = queue
+        self.__writer = Thread(target=self.run_writer, args=(queue,),
+                               daemon=True)
+        self.__writer.start()
+        atexit.register(self.close)
+
+    def update_group_commit(self, window, max_ops=100):
+        '''Update the group commit mode
+
+        Args:
+            window (float): seconds during which the saves are gathered in
+                            one write, 0 to write on every save.
+            max_ops (int): number of saves written at once at most.
+        '''
+        self.commit()
+        self.__group_window = window
+        self.__group_max_ops = max_ops
+
+    def update_durability(self, level):
+        '''Update when the written files are synced to disk
+
+        Args:
+            level (str): 'none', 'file' or 'full'.
+        '''
+        if level not in self.__durability_levels:
+            raise ValueError('Unknown durability: {}'.format(level))
+        self.__durability = level
+
+    def open_file(self, path, mode):
+        '''Opens a file in the mode of the storage format
+
+        Args:
+            path (str): the file path.
+            mode (str): 'r', 'w' or 'a'.
+        '''
+        return open_file(self.__serializer, path, mode)
+
+    def update_shards(self, count, workers=None):
+        '''Update the sharded mode
+
+        Args:
+            count (int): number of files the objects are spread over,
+                         0 to use one JSON file.
+            workers (int): number of processes reading the shards,
+                           None for the number of CPUs.
+
+        Note:
+            every shard is written by the next save, including the
+            shards a 'reload' couldn't read.
+        '''
+        self.hydrate()
+        with self.__rwlock.write():
+            self.__shard_count = count
+            self.__shard_workers = workers
+            self.__shards = [{} for _ in range(count)]
+            if count > 0:
+                for k, v in self.__objects.items():
+                    self.__shards[self.shard(k)][k] = v
+            self.__dirty_shards = set(range(count))
+            self.__broken_shards = set()
+
+    def update_parallel_reload(self, workers, chunk_size=20000):
+        '''Update the number of processes 'reload' uses
+
+        Args:
+            workers (int): number of processes decoding the JSON file,
+                           0 to decode it in this process.
+            chunk_size (int): number of objects decoded per task.
+        '''
+        self.__reload_workers = workers
+        self.__reload_chunk = chunk_size
+
+    def update_compaction(self, min_bytes, ratio):
+        '''Update the journal size thresholds of the automatic compaction
+
+        Args:
+            min_bytes (int): journal size below which it is never compacted.
+            ratio (float): journal size, relative to the JSON file size,
+                           from which it is compacted.
+        '''
+        self.__compact_min_bytes = min_bytes
+        self.__compact_ratio = ratio
+
+    def journal_path(self):
+        '''Returns the path of the journal file'''
+        return '{}.journal'.format(self.__file_path)
+
+    def compacting_path(self):
+        '''Returns the path of the journal being compacted'''
+        return '{}.compacting'.format(self.journal_path())
+
     def reset(self):
         '''To reset storage'''
-        self.__objects = {}
-        self.save()
+        with self.__rwlock.write():
+            self.__objects = {}
+            self.__partitions = {}
+            self.__cow = None
+            self.__records = {}
+            self.__index_data = {}
+            self.__indexed = {}
+            self.__range_data = {}
+            self.__geo_data = {}
+            self.__shards = [{} for _ in range(self.__shard_count)]
+            self.__broken_shards = set()
+            self.close_lazy_file()
+            if self.__mmap:
+                if self.__mapped is not None:
+                    self.__mapped.close()
+                    self.__mapped = None
+                return
+            self.dump()
 
     def serialize_loaded_json(self, jsn):
         '''Serialize json loaded from file
@@ -87,7 +1685,69 @@ class FileStorage():
         Args:
             jsn (str): json data
         '''
-        for v in jsn.values():
-            classname = v['__class__']
-            obj = self.__classes[classname](**v)
-            self.new(obj)
+        with self.__rwlock.write():
+            for v in jsn.values():
+                self.new(self.load_object(v))
+
+    def load_object(self, v):
+        '''Creates an instance from its dictionary representation
+
+        Args:
+            v (dict): the dictionary representation.
+        '''
+        cls = self.__classes[v['__class__']]
+        if self.__compact:
+            cls = cls.compact()
+        return cls.from_dict(v)
+
+
+def load_shard(arg):
+    '''Returns the objects of a shard file, run by the reload processes
+
+    Args:
+        arg (tuple): the shard file path, the storage format name and the
+                     compact mode.
+
+    Returns:
+        list: the objects, None if the file is not valid.
+    '''
+    path, name, compact = arg
+    if not isfile(path):
+        return []
+
+    storage = FileStorage()
+    storage.update_compact_mode(compact)
+    serializer = get_serializer(name)
+    with open_file(serializer, path, 'r') as f:
+        try:
+            return [storage.load_object(v) for _, v in serializer.load(f)]
+        except ValueError:
+            return None
+
+
+def load_chunk(arg):
+    '''Returns the objects of a part of the JSON file, run by the reload
+    processes
+
+    Args:
+        arg (tuple): the JSON file path, the storage format name, the field
+                     names of the file, the (offset, length) positions
+                     of the objects, in file order, and the compact mode.
+
+    Raises:
+        ValueError: if an object is not valid.
+    '''
+    path, name, names, spans, compact = arg
+    start = spans[0][0]
+    end = spans[-1][0] + spans[-1][1]
+
+    storage = FileStorage()
+    storage.update_compact_mode(compact)
+    serializer = get_serializer(name)
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+
+    return [storage.load_object(serializer.decode(
+        data[offset - start:offset - start + length], names))
+        for offset, length in spans]
@@ -0,0 +1,252 @@
+#!/usr/bin/python3
+'''
+geo_index:
+    keys by latitude and longitude in a grid of cells, for bounding box
+    and nearest neighbour lookups.
+'''
+import heapq
+from math import asin, ceil, cos, inf, pi, radians, sin, sqrt
+from models.engine.range_index import is_number
+
+EARTH_RADIUS = 6371.0088
+
+
+def is_position(lat, lon):
+    '''Returns True if lat and lon are numbers in the valid ranges'''
+    return is_number(lat) and is_number(lon) and \
+        -90 <= lat <= 90 and -180 <= lon <= 180
+
+
+def distance(lat1, lon1, lat2, lon2):
+    '''Returns the great-circle distance between two positions in km'''
+    lat1, lon1, lat2, lon2 = map(radians, (lat1, lon1, lat2, lon2))
+    h = sin((lat2 - lat1) / 2) ** 2 + \
+        cos(lat1) * cos(lat2) * sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS * asin(min(1.0, sqrt(h)))
+
+
+class GeoIndex():
+    '''Keys by position, in a grid of cells
+
+    Attributes:
+        rows (int): number of rows of cells, from latitude -90.
+        columns (int): number of columns of cells, from longitude -180.
+        height (float): the height of the rows in degrees.
+        width (float): the width of the columns in degrees.
+        cells (dict): the (latitude, longitude) by key of the non-empty
+                      cells, by (row, column).
+        positions (dict): the (latitude, longitude) of each key.
+    '''
+
+    def __init__(self, items=(), cell=0.25):
+        '''Initialize the index
+
+        Args:
+            items (iterable): (key, latitude, longitude) tuples, the
+                              invalid positions are not indexed.
+            cell (float): the size of the cells in degrees, at most.
+        '''
+        self.rows = ceil(180 / cell)
+        self.columns = ceil(360 / cell)
+        self.height = 180 / self.rows
+        self.width = 360 / self.columns
+        self.cells = {}
+        self.positions = {}
+        for k, lat, lon in items:
+            self.add(k, lat, lon)
+
+    def __len__(self):
+        return len(self.positions)
+
+    def row(self, lat):
+        '''Returns the row of a latitude'''
+        return max(0, min(int((lat + 90) / self.height), self.rows - 1))
+
+    def column(self, lon):
+        '''Returns the column of a longitude'''
+        return max(0, min(int((lon + 180) / self.width), self.columns - 1))
+
+    def add(self, k, lat, lon):
+        '''Sets the position of a key, removes the key if it's invalid'''
+        position = self.positions.get(k)
+        if position is not None and position == (lat, lon):
+            return
+
+        self.remove(k)
+        if not is_position(lat, lon):
+            return
+
+        self.positions[k] = (lat, lon)
+        cell = (self.row(lat), self.column(lon))
+        self.cells.setdefault(cell, {})[k] = (lat, lon)
+
+    def remove(self, k):
+        '''Removes a key, if indexed'''
+        position = self.positions.pop(k, None)
+        if position is None:
+            return
+
+        cell = (self.row(position[0]), self.column(position[1]))
+        keys = self.cells[cell]
+        del keys[k]
+        if len(keys) == 0:
+            del self.cells[cell]
+
+    def bbox(self, south, west, north, east):
+        '''Returns the keys in a bounding box, edges included
+
+        Args:
+            south (float): the lowest latitude.
+            west (float): the western longitude.
+            north (float): the highest latitude.
+            east (float): the eastern longitude, lower than west if the
+                          box crosses the antimeridian.
+
+        Returns:
+            list: the keys, in no particular order.
+        '''
+        if south > north:
+            return []
+
+        if west <= east:
+            spans = [(west, east)]
+        else:
+            spans = [(west, 180), (-180, east)]
+
+        keys = []
+        rows = (self.row(south), self.row(north))
+        for west, east in spans:
+            columns = (self.column(west), self.column(east))
+            count = (rows[1] - rows[0] + 1) * (columns[1] - columns[0] + 1)
+            if count > len(self.cells):
+                cells = [v for (row, column), v in self.cells.items()
+                         if rows[0] <= row <= rows[1] and
+                         columns[0] <= column <= columns[1]]
+            else:
+                cells = [self.cells.get((row, column))
+                         for row in range(rows[0], rows[1] + 1)
+                         for column in range(columns[0], columns[1] + 1)]
+
+            for cell in cells:
+                if cell is None:
+                    continue
+                for k, (lat, lon) in cell.items():
+                    if south <= lat <= north and west <= lon <= east:
+                        keys.append(k)
+        return keys
+
+    def nearest(self, lat, lon, count=1, max_km=None):
+        '''Returns the keys nearest to a position
+
+        The rings of cells around the cell of the position are searched
+        until no cell outside of them can be nearer than the found keys.
+
+        Args:
+            lat (float): the latitude.
+            lon (float): the longitude.
+            count (int): the maximum number of keys returned.
+            max_km (float): if given, the maximum distance in km.
+
+        Returns:
+            list: the (distance in km, key) pairs, nearest first.
+
+        Raises:
+            ValueError: if the position is invalid.
+        '''
+        if not is_position(lat, lon):
+            raise ValueError('Invalid position: {}, {}'.format(lat, lon))
+        if count <= 0 or len(self.positions) == 0:
+            return []
+
+        limit = inf if max_km is None else max_km
+        best = []
+        row, column = self.row(lat), self.column(lon)
+
+        def visit(cell):
+            for k, (other_lat, other_lon) in cell.items():
+                d = distance(lat, lon, other_lat, other_lon)
+                if d > limit:
+                    continue
+                if len(best) < count:
+                    heapq.heappush(best, (-d, k))
+                elif -best[0][0] > d:
+                    heapq.heapreplace(best, (-d, k))
+
+        r = 0
+        while True:
+            for cell in self.ring(row, column, r):
+                cell = self.cells.get(cell)
+                if cell is not None:
+                    visit(cell)
+
+            bound = self.outside_distance(lat, lon, row, column, r)
+            if bound == inf or bound > limit or \
+                    (len(best) == count and -best[0][0] <= bound):
+                break
+
+            r += 1
+            if 8 * r > len(self.cells):
+                for (other_row, other_column), cell in self.cells.items():
+                    if self.ring_number(row, column, other_row,
+                                        other_column) >= r:
+                        visit(cell)
+                break
+
+        return sorted((-d, k) for d, k in best)
+
+    def ring_number(self, row, column, other_row, other_column):
+        '''Returns the number of the ring of cells around (row, column)
+        a cell is in
+        '''
+        columns = abs(other_column - column)
+        return max(abs(other_row - row), min(columns, self.columns - columns))
+
+    def ring(self, row, column, r):
+        '''Yields the cells of the ring number r around (row, column)
+
+        Args:
+            row (int): the row of the center.
+            column (int): the column of the center.
+            r (int): the ring number, 0 being the center cell.
+        '''
+        for dr in range(-r, r + 1):
+            other_row = row + dr
+            if not 0 <= other_row < self.rows:
+                continue
+
+            offsets = range(-r, r + 1) if abs(dr) == r else (-r, r)
+            seen = set()
+            for dc in offsets:
+                other_column = (column + dc) % self.columns
+                if other_column in seen or self.ring_number(
+                        row, column, other_row, other_column) != r:
+                    continue
+                seen.add(other_column)
+                yield other_row, other_column
+
+    def outside_distance(self, lat, lon, row, column, r):
+        '''Returns a lower bound of the distance in km from a position to
+        the cells outside of the rings up to r around its cell
+
+        Returns:
+            float: inf if every cell is in the rings.
+        '''
+        bounds = []
+        if row - r > 0:
+            bounds.append(radians(lat - ((row - r) * self.height - 90)))
+        if row + r + 1 < self.rows:
+            bounds.append(radians((row + r + 1) * self.height - 90 - lat))
+
+        if 2 * r + 1 < self.columns:
+            west = (column - r) * self.width - 180
+            east = (column + r + 1) * self.width - 180
+            for delta in (lon - west, east - lon):
+                if delta >= 90:
+                    bounds.append(pi / 2 - radians(abs(lat)))
+                else:
+                    bounds.append(asin(min(1.0, cos(radians(lat)) *
+                                           sin(radians(delta)))))
+
+        if len(bounds) == 0:
+            return inf
+        return max(0.0, min(bounds)) * EARTH_RADIUS
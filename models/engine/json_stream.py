@@ -0,0 +1,167 @@
+#!/usr/bin/python3
+'''
+json_stream:
+    reads the members of a JSON object from a file one by one, so that
+    the whole file never has to be held in memory.
+'''
+import json
+import re
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+def iter_items(file_obj, chunk_size=64 * 1024):
+    '''Yields the (key, value) members of the JSON object in file_obj
+
+    Args:
+        file_obj (file): a text file containing a JSON object.
+        chunk_size (int): number of characters read at once.
+
+    Raises:
+        json.JSONDecodeError: if the file isn't a valid JSON object.
+    '''
+    reader = _Reader(file_obj, chunk_size)
+
+    reader.expect('{')
+    if reader.peek() == '}':
+        reader.expect('}')
+        return
+
+    while True:
+        key = reader.decode()
+        if not isinstance(key, str):
+            raise json.JSONDecodeError('Expecting property name enclosed '
+                                       'in double quotes', reader.buf,
+                                       reader.pos)
+        reader.expect(':')
+        yield key, reader.decode()
+
+        if reader.peek() == '}':
+            reader.expect('}')
+            return
+        reader.expect(',')
+
+
+class _Reader():
+    '''Buffered reader decoding JSON values from a text file
+
+    Attributes:
+        buf (str): the characters read but not consumed yet.
+        pos (int): the position of the next character in buf.
+    '''
+
+    def __init__(self, file_obj, chunk_size):
+        '''Initialize the reader
+
+        Args:
+            file_obj (file): the text file to read.
+            chunk_size (int): number of characters read at once.
+        '''
+        self.file_obj = file_obj
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        '''Reads the next chunk, returns False at the end of the file'''
+        if self.eof:
+            return False
+
+        chunk = self.file_obj.read(self.chunk_size)
+        if chunk == '':
+            self.eof = True
+            return False
+
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        '''Returns the next non whitespace character, '' at the end'''
+        while True:
+            self.pos = WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                return ''
+
+    def expect(self, char):
+        '''Consumes the next non whitespace character, which must be char'''
+        if self.peek() != char:
+            raise json.JSONDecodeError('Expecting \'{}\''.format(char),
+                                       self.buf, self.pos)
+        self.pos += 1
+
+    def decode(self):
+        '''Decodes the next JSON value'''
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self.fill():
+                    raise
+                continue
+
+            # a number may continue in the next chunk
+            if end == len(self.buf) and self.fill():
+                continue
+
+            self.pos = end
+            return value
+
+
+def write_items(file_obj, items):
+    '''Writes a JSON object with one member per line
+
+    Args:
+        file_obj (file): the text file to write.
+        items (iterable): (key, JSON text of the value) pairs.
+    '''
+    sep = '\n'
+    file_obj.write('{')
+    for k, text in items:
+        file_obj.write('{}{}: {}'.format(sep, json.dumps(k), text))
+        sep = ',\n'
+    file_obj.write('\n}\n')
+
+
+def iter_lines(file_obj):
+    '''Yields the (key, offset, length) of the members of a JSON object
+    written by 'write_items', without decoding the values
+
+    Args:
+        file_obj (file): the binary file to read.
+
+    Raises:
+        ValueError: if the file doesn't have one member per line.
+    '''
+    line = file_obj.readline()
+    if line.strip() != b'{':
+        raise ValueError('Expecting one member per line')
+
+    offset = len(line)
+    for line in file_obj:
+        start = offset
+        offset += len(line)
+
+        line = line.rstrip(b'\r\n')
+        if line.endswith(b','):
+            line = line[:-1]
+        if line == b'':
+            continue
+        if line == b'}':
+            return
+
+        i = line.find(b'": ')
+        if not line.startswith(b'"') or i < 0:
+            raise ValueError('Expecting one member per line')
+
+        key = line[1:i].decode('utf-8')
+        if '\\' in key:
+            key = json.loads(line[:i + 1])
+        yield key, start + i + 3, len(line) - i - 3
+
+    raise ValueError('Expecting \'}\'')
@@ -0,0 +1,224 @@
+#!/usr/bin/python3
+'''
+mmap_file:
+    read-only storage files memory-mapped and decoded on demand.
+
+    The file starts with MAGIC and is followed by:
+        - the records, in the 'binary' format record layout.
+        - the field names: <u16 count> then <u16 length> <name> each.
+        - the index: <u64 offset> <u32 length> of each record, sorted by
+          key, so the objects of a class are contiguous.
+        - the trailer: <u64 names offset> <u64 index offset> <u32 count>
+          MAGIC.
+'''
+import mmap
+import struct
+import sys
+from collections.abc import Mapping
+from models.engine.serializers import U16, BinarySerializer, \
+    decode_record, get_serializer, open_file
+
+MAGIC = b'HBNBMAP\x01'
+ENTRY = struct.Struct('<QI')
+TRAILER = struct.Struct('<QQI8s')
+
+
+def write_file(path, items):
+    '''Writes an indexed file
+
+    Args:
+        path (str): the file path.
+        items (iterable): (key, dictionary representation) pairs.
+    '''
+    serializer = BinarySerializer()
+    entries = []
+    with open(path, 'wb') as f:
+        f.write(MAGIC)
+        offset = len(MAGIC)
+        for k, v in items:
+            key = k.encode('utf-8')
+            rec = U16.pack(len(key)) + key + serializer.encode(v)
+            f.write(rec)
+            entries.append((key, offset, len(rec)))
+            offset += len(rec)
+
+        names_offset = offset
+        f.write(U16.pack(len(serializer.names)))
+        for name in serializer.names:
+            data = name.encode('utf-8')
+            f.write(U16.pack(len(data)) + data)
+
+        index_offset = f.tell()
+        entries.sort()
+        for _, rec_offset, length in entries:
+            f.write(ENTRY.pack(rec_offset, length))
+        f.write(TRAILER.pack(names_offset, index_offset, len(entries),
+                             MAGIC))
+
+
+class MappedFile():
+    '''Indexed file mapped in memory
+
+    Attributes:
+        file (file): the file, opened in binary mode.
+        map (mmap): the read-only mapping of the file.
+        names (list): the field names by id.
+        index_offset (int): the position of the index.
+        count (int): number of records.
+    '''
+
+    def __init__(self, path):
+        '''Maps a file written by 'write_file'
+
+        Raises:
+            ValueError: if the file is not an indexed file.
+        '''
+        self.file = open(path, 'rb')
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0,
+                                 access=mmap.ACCESS_READ)
+        except ValueError:
+            self.file.close()
+            raise
+
+        if len(self.map) < len(MAGIC) + TRAILER.size or \
+                self.map[:len(MAGIC)] != MAGIC or \
+                self.map[-len(MAGIC):] != MAGIC:
+            self.close()
+            raise ValueError('Not an indexed storage file')
+
+        names_offset, self.index_offset, self.count, _ = \
+            TRAILER.unpack_from(self.map, len(self.map) - TRAILER.size)
+
+        self.names = []
+        pos = names_offset + 2
+        for _ in range(U16.unpack_from(self.map, names_offset)[0]):
+            size = U16.unpack_from(self.map, pos)[0]
+            self.names.append(self.map[pos + 2:pos + 2 + size].decode())
+            pos += 2 + size
+
+    def span(self, i):
+        '''Returns the (offset, length) of the record number i'''
+        return ENTRY.unpack_from(self.map, self.index_offset + i * ENTRY.size)
+
+    def key(self, i):
+        '''Returns the key of the record number i, as bytes'''
+        offset = self.span(i)[0]
+        size = U16.unpack_from(self.map, offset)[0]
+        return self.map[offset + 2:offset + 2 + size]
+
+    def record(self, i):
+        '''Returns the (key, dictionary representation) of record i'''
+        offset, length = self.span(i)
+        return decode_record(self.map[offset:offset + length], self.names)
+
+    def bisect(self, key, lo=0, hi=None):
+        '''Returns the number of the first record with a key >= key
+
+        Args:
+            key (bytes): the key.
+            lo (int): the first record searched.
+            hi (int): the record after the last record searched.
+        '''
+        if hi is None:
+            hi = self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.key(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def find(self, k):
+        '''Returns the number of the record with key k, -1 if none'''
+        key = k.encode('utf-8')
+        i = self.bisect(key)
+        if i < self.count and self.key(i) == key:
+            return i
+        return -1
+
+    def prefix_range(self, prefix):
+        '''Returns the (first, last + 1) records with keys starting with
+        prefix
+
+        Args:
+            prefix (str): the key prefix, not empty.
+        '''
+        start = prefix.encode('utf-8')
+        end = start[:-1] + bytes([start[-1] + 1])
+        lo = self.bisect(start)
+        return lo, self.bisect(end, lo)
+
+    def close(self):
+        '''Unmaps and closes the file'''
+        if getattr(self, 'map', None) is not None:
+            self.map.close()
+        self.file.close()
+
+
+class MappedObjects(Mapping):
+    '''Read-only mapping of the objects of a range of records by key
+
+    The objects are created from their record every time they are read.
+
+    Attributes:
+        mapped (MappedFile): the file.
+        lo (int): the first record.
+        hi (int): the record after the last record.
+        load (function): creates an object from its dictionary
+                         representation.
+    '''
+
+    def __init__(self, mapped, lo, hi, load):
+        '''Initialize the mapping'''
+        self.mapped = mapped
+        self.lo = lo
+        self.hi = hi
+        self.load = load
+
+    def __getitem__(self, k):
+        i = self.mapped.find(k)
+        if not self.lo <= i < self.hi:
+            raise KeyError(k)
+        return self.load(self.mapped.record(i)[1])
+
+    def __iter__(self):
+        for i in range(self.lo, self.hi):
+            yield self.mapped.key(i).decode('utf-8')
+
+    def __len__(self):
+        return self.hi - self.lo
+
+    def items(self):
+        '''Yields the (key, object) items in key order'''
+        for i in range(self.lo, self.hi):
+            k, v = self.mapped.record(i)
+            yield k, self.load(v)
+
+    def values(self):
+        '''Yields the objects in key order'''
+        for _, v in self.items():
+            yield v
+
+
+def convert(src_path, src_format, dst_path):
+    '''Converts a storage file to an indexed file
+
+    Args:
+        src_path (str): the file to read.
+        src_format (str): its format name.
+        dst_path (str): the indexed file to write.
+    '''
+    src = get_serializer(src_format)
+    with open_file(src, src_path, 'r') as src_file:
+        write_file(dst_path, src.load(src_file))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 4:
+        print('Usage: {} <src format> <src file> <dst file>'
+              .format(sys.argv[0]))
+        sys.exit(1)
+
+    convert(sys.argv[2], sys.argv[1], sys.argv[3])
@@ -0,0 +1,95 @@
+#!/usr/bin/python3
+'''
+processes:
+    runs a function over a list of arguments in forked processes, for
+    the parallel reload of FileStorage.
+'''
+from multiprocessing import get_all_start_methods, get_context
+
+
+def map_processes(function, args, workers):
+    '''Returns the results of function for each argument, in order
+
+    Args:
+        function (callable): the function.
+        args (list): the arguments, split in contiguous parts, one per
+                     process.
+        workers (int): number of processes.
+
+    Returns:
+        list: the result of each argument.
+
+    Raises:
+        Exception: the first error raised by function, or
+                   ChildProcessError if a process exited without result.
+
+    Note:
+        the processes are forked whatever the default start method is:
+        they start with the memory of this process, so neither function
+        nor its arguments are pickled and nothing is imported again
+        (e.g. 'models', which would reload the storage). Only the results
+        are pickled back, in this thread.
+        Without fork (e.g. on Windows), or with a single worker, the
+        arguments are processed in this process.
+    '''
+    workers = min(workers, len(args))
+    if workers <= 1 or 'fork' not in get_all_start_methods():
+        return [function(arg) for arg in args]
+
+    context = get_context('fork')
+    size = -(-len(args) // workers)
+    processes = []
+    results = []
+    error = None
+    try:
+        for i in range(0, len(args), size):
+            receiver, sender = context.Pipe(duplex=False)
+            process = context.Process(target=run_part, daemon=True,
+                                      args=(sender, function,
+                                            args[i:i + size]))
+            process.start()
+            sender.close()
+            processes.append((process, receiver))
+
+        for process, receiver in processes:
+            try:
+                ok, value = receiver.recv()
+            except EOFError:
+                ok, value = False, ChildProcessError(
+                    'A reload process exited without result')
+            if ok:
+                results.extend(value)
+            elif error is None:
+                error = value
+    finally:
+        for process, receiver in processes:
+            receiver.close()
+            process.join()
+
+    if error is not None:
+        raise error
+    return results
+
+
+def run_part(conn, function, args):
+    '''Sends the results of function for a part of the arguments, run
+    by the forked processes
+
+    Args:
+        conn (Connection): the pipe to the parent process, it receives
+                           (True, results) or (False, error).
+        function (callable): the function.
+        args (list): the arguments.
+    '''
+    try:
+        res = (True, [function(arg) for arg in args])
+    except Exception as e:
+        res = (False, e)
+
+    try:
+        conn.send(res)
+    except Exception as e:
+        conn.send((False, ChildProcessError(
+            'A reload process result could not be sent: {}'.format(e))))
+    finally:
+        conn.close()
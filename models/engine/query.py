@@ -0,0 +1,191 @@
+#!/usr/bin/python3
+'''
+query:
+    filtering, ordering and projection of the objects of a storage,
+    used by the 'query' method of the storages.
+
+    A predicate is an (attribute, operator, value) tuple, the operator
+    being one of OPERATORS; an object matches it if it has the attribute
+    and the comparison is true.
+'''
+import heapq
+import operator
+from models.engine.range_index import is_number
+
+OPERATORS = {'==': operator.eq, '!=': operator.ne,
+             '<': operator.lt, '<=': operator.le,
+             '>': operator.gt, '>=': operator.ge}
+
+
+def check_predicates(where):
+    '''Returns the predicates as a list
+
+    Args:
+        where (iterable): (attribute, operator, value) tuples.
+
+    Raises:
+        ValueError: if an operator is unknown.
+    '''
+    predicates = []
+    for attr, op, value in where:
+        if op not in OPERATORS:
+            raise ValueError('Unknown operator: {}'.format(op))
+        predicates.append((attr, op, value))
+    return predicates
+
+
+def index_predicate(predicates, attrs):
+    '''Returns the (attribute, value) of the first equality predicate on
+    one of attrs, None if there is none
+
+    Args:
+        predicates (list): the predicates.
+        attrs (iterable): the indexed attributes.
+    '''
+    for attr, op, value in predicates:
+        if op == '==' and attr in attrs:
+            return attr, value
+    return None
+
+
+def range_predicate(predicates, attrs):
+    '''Returns the (attribute, low, high) bounds of the comparisons of the
+    first of attrs with a number, None if there is none
+
+    Args:
+        predicates (list): the predicates.
+        attrs (iterable): the attributes with a range index.
+
+    Note:
+        the bounds are inclusive, the predicates must still be checked.
+    '''
+    for name in attrs:
+        low = high = None
+        found = False
+        for attr, op, value in predicates:
+            if attr != name or op == '!=' or not is_number(value):
+                continue
+            found = True
+            if op in ('==', '>', '>=') and (low is None or value > low):
+                low = value
+            if op in ('==', '<', '<=') and (high is None or value < high):
+                high = value
+        if found:
+            return name, low, high
+    return None
+
+
+def matches(obj, predicates):
+    '''Returns True if obj matches every predicate
+
+    Note:
+        a comparison between values of different types (e.g. '<' between
+        an int and a str) doesn't match.
+    '''
+    for attr, op, value in predicates:
+        try:
+            if not OPERATORS[op](getattr(obj, attr), value):
+                return False
+        except (AttributeError, TypeError):
+            return False
+    return True
+
+
+def order(objects, order_by, count=None):
+    '''Returns the objects sorted by an attribute
+
+    Args:
+        objects (list): the objects.
+        order_by (str): the attribute name, prefixed by '-' to sort in
+                        descending order.
+        count (int): if given, only the first count objects are returned,
+                     found without sorting all the objects.
+
+    Raises:
+        ValueError: if the attribute values can't be compared.
+
+    Note:
+        the objects without the attribute are last, the sort is stable.
+    '''
+    reverse = order_by.startswith('-')
+    attr = order_by.lstrip('-')
+    present = [v for v in objects if hasattr(v, attr)]
+    missing = [v for v in objects if not hasattr(v, attr)]
+
+    try:
+        if count is not None and count < len(present):
+            pick = heapq.nlargest if reverse else heapq.nsmallest
+            present = pick(count, present, key=operator.attrgetter(attr))
+        else:
+            present.sort(key=operator.attrgetter(attr), reverse=reverse)
+    except TypeError as e:
+        raise ValueError('Cannot order by {}: {}'.format(attr, e)) from e
+
+    res = present + missing
+    return res if count is None else res[:count]
+
+
+def project(obj, fields):
+    '''Returns a dictionary of the fields of obj, missing ones are left
+    out
+    '''
+    res = {}
+    for name in fields:
+        try:
+            res[name] = getattr(obj, name)
+        except AttributeError:
+            pass
+    return res
+
+
+def select(objects, where=(), fields=None, order_by=None, limit=None,
+           offset=0):
+    '''Returns the objects matching predicates, in a single pass
+
+    Args:
+        objects (iterable): the objects.
+        where (list): the predicates.
+        fields (list): if given, the attribute names returned.
+        order_by (str): if given, the attribute the objects are sorted by,
+                        prefixed by '-' to sort in descending order.
+        limit (int): if given, the maximum number of objects returned.
+        offset (int): number of matching objects skipped.
+
+    Returns:
+        list: the objects, or the dictionaries of their fields.
+    '''
+    res = [v for v in objects if matches(v, where)]
+
+    end = None if limit is None else offset + limit
+    if order_by is not None:
+        res = order(res, order_by, end)
+    res = res[offset:end]
+
+    if fields is not None:
+        res = [project(v, fields) for v in res]
+    return res
+
+
+def coerce_value(cls, attr, value):
+    '''Returns a string value converted to the type of a class attribute
+
+    Args:
+        cls (type): the model class.
+        attr (str): the attribute name.
+        value (str): the value.
+
+    Returns:
+        the value as a number if the attribute is declared as an int or
+        a float on the class (e.g. 'Place.price_by_night') and the
+        conversion succeeds, otherwise the value unchanged.
+    '''
+    default = getattr(cls, attr, None)
+    if type(default) not in (int, float) or not isinstance(value, str):
+        return value
+
+    for convert in (type(default), float):
+        try:
+            return convert(value)
+        except ValueError:
+            pass
+    return value
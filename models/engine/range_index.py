@@ -0,0 +1,147 @@
+#!/usr/bin/python3
+'''
+range_index:
+    keys sorted by a numeric attribute value, for range and top-k
+    lookups in O(log n + k).
+'''
+from bisect import bisect_left, bisect_right, insort
+
+LOAD = 1000
+
+
+class Last():
+    '''Sorts after any key, to bisect past the entries of a value'''
+
+    def __lt__(self, other):
+        return False
+
+    def __gt__(self, other):
+        return True
+
+
+LAST = Last()
+
+
+def is_number(value):
+    '''Returns True if value is an int or a float, not a bool nor NaN'''
+    return type(value) in (int, float) and value == value
+
+
+class RangeIndex():
+    '''Keys sorted by a numeric value
+
+    The (value, key) entries are kept in sorted lists of at most 2 * LOAD
+    entries, so that adding or removing a key moves at most 2 * LOAD
+    entries instead of all of them.
+
+    Attributes:
+        lists (list): the sorted lists of (value, key) entries, each
+                      entry being less than the ones of the next list.
+        maxes (list): the last entry of each list.
+        values (dict): the value of each key in the lists.
+    '''
+
+    def __init__(self, items=()):
+        '''Initialize the index
+
+        Args:
+            items (iterable): (key, value) pairs, the values that aren't
+                              numbers are not indexed.
+        '''
+        self.values = {k: v for k, v in items if is_number(v)}
+        entries = sorted((v, k) for k, v in self.values.items())
+        self.lists = [entries[i:i + LOAD]
+                      for i in range(0, len(entries), LOAD)]
+        self.maxes = [v[-1] for v in self.lists]
+
+    def __len__(self):
+        return len(self.values)
+
+    def add(self, k, value):
+        '''Sets the value of a key, removes the key if it's not a number'''
+        old = self.values.get(k)
+        if old is not None and old == value and type(old) is type(value):
+            return
+
+        self.remove(k)
+        if not is_number(value):
+            return
+
+        self.values[k] = value
+        entry = (value, k)
+        if len(self.lists) == 0:
+            self.lists.append([entry])
+            self.maxes.append(entry)
+            return
+
+        i = min(bisect_left(self.maxes, entry), len(self.lists) - 1)
+        entries = self.lists[i]
+        insort(entries, entry)
+        self.maxes[i] = entries[-1]
+
+        if len(entries) > 2 * LOAD:
+            self.lists.insert(i + 1, entries[LOAD:])
+            del entries[LOAD:]
+            self.maxes.insert(i, entries[-1])
+
+    def remove(self, k):
+        '''Removes a key, if indexed'''
+        value = self.values.pop(k, None)
+        if value is None:
+            return
+
+        entry = (value, k)
+        i = bisect_left(self.maxes, entry)
+        entries = self.lists[i]
+        del entries[bisect_left(entries, entry)]
+        if len(entries) == 0:
+            del self.lists[i]
+            del self.maxes[i]
+        else:
+            self.maxes[i] = entries[-1]
+
+    def position(self, entry, right=False):
+        '''Returns the (list, index) position of entry in the lists
+
+        Args:
+            entry (tuple): the entry, not necessarily in the lists.
+            right (bool): if True, the position is after the entries
+                          equal to entry, before otherwise.
+        '''
+        find = bisect_right if right else bisect_left
+        i = find(self.maxes, entry)
+        if i == len(self.lists):
+            return i, 0
+        return i, find(self.lists[i], entry)
+
+    def range(self, low=None, high=None, limit=None, reverse=False):
+        '''Returns the keys with a value between low and high, included
+
+        Args:
+            low (int or float): if given, the lowest value.
+            high (int or float): if given, the highest value.
+            limit (int): if given, the maximum number of keys returned.
+            reverse (bool): if True, the keys are in descending order of
+                            value, in ascending order otherwise.
+
+        Returns:
+            list: the keys; the keys of a same value are in key order,
+                  reversed if reverse is True.
+        '''
+        start = (0, 0) if low is None else self.position((low,))
+        end = (len(self.lists), 0) if high is None else \
+            self.position((high, LAST), True)
+
+        numbers = range(start[0], min(end[0], len(self.lists) - 1) + 1)
+        keys = []
+        for i in reversed(numbers) if reverse else numbers:
+            if limit is not None and len(keys) >= limit:
+                break
+
+            entries = self.lists[i][start[1] if i == start[0] else 0:
+                                    end[1] if i == end[0] else None]
+            if reverse:
+                entries.reverse()
+            keys.extend(k for _, k in entries)
+
+        return keys if limit is None else keys[:limit]
@@ -0,0 +1,99 @@
+#!/usr/bin/python3
+'''
+RWLock:
+    is a lock shared by any number of readers or held by one writer.
+'''
+from threading import Condition, Lock, get_ident
+
+
+class RWLock():
+    '''Lock shared by any number of readers or held by one writer
+
+    Readers only wait while a writer holds the lock, never for writers
+    waiting for it, so reads are never serialized behind writes.
+    The writer can acquire the lock again, for reading or writing.
+
+    Attributes:
+        readers (int): number of readers holding the lock.
+        writer (int): the thread id of the writer holding the lock.
+        depth (int): number of times the writer acquired the lock.
+    '''
+
+    def __init__(self):
+        '''Initialize the lock'''
+        self.cond = Condition(Lock())
+        self.readers = 0
+        self.writer = None
+        self.depth = 0
+
+    def acquire_read(self):
+        '''Acquires the lock for reading'''
+        me = get_ident()
+        with self.cond:
+            if self.writer == me:
+                self.depth += 1
+                return
+
+            self.cond.wait_for(lambda: self.writer is None)
+            self.readers += 1
+
+    def release_read(self):
+        '''Releases the lock acquired for reading'''
+        with self.cond:
+            if self.writer == get_ident():
+                self.depth -= 1
+                return
+
+            self.readers -= 1
+            if self.readers == 0:
+                self.cond.notify_all()
+
+    def acquire_write(self):
+        '''Acquires the lock for writing'''
+        me = get_ident()
+        with self.cond:
+            if self.writer == me:
+                self.depth += 1
+                return
+
+            self.cond.wait_for(
+                lambda: self.writer is None and self.readers == 0)
+            self.writer = me
+            self.depth = 1
+
+    def release_write(self):
+        '''Releases the lock acquired for writing'''
+        with self.cond:
+            self.depth -= 1
+            if self.depth == 0:
+                self.writer = None
+                self.cond.notify_all()
+
+    def read(self):
+        '''Returns a context manager holding the lock for reading'''
+        return _Holder(self.acquire_read, self.release_read)
+
+    def write(self):
+        '''Returns a context manager holding the lock for writing'''
+        return _Holder(self.acquire_write, self.release_write)
+
+
+class _Holder():
+    '''Context manager acquiring a lock on enter, releasing it on exit'''
+
+    def __init__(self, acquire, release):
+        '''Initialize the context manager
+
+        Args:
+            acquire (function): acquires the lock.
+            release (function): releases the lock.
+        '''
+        self.acquire = acquire
+        self.release = release
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *args):
+        self.release()
@@ -0,0 +1,363 @@
+#!/usr/bin/python3
+'''
+serializers:
+    the file formats FileStorage can write its objects in.
+
+    - json: a JSON object with one member per line.
+    - binary: length-prefixed records, with interned field names and
+      datetimes stored as integer microseconds.
+'''
+import json
+import struct
+import sys
+from datetime import datetime, timedelta
+from threading import Lock
+from models.engine.json_stream import iter_items, iter_lines, write_items
+
+EPOCH = datetime(1970, 1, 1)
+DATE_ATTRS = ('created_at', 'updated_at')
+U16 = struct.Struct('<H')
+U32 = struct.Struct('<I')
+I64 = struct.Struct('<q')
+F64 = struct.Struct('<d')
+FIELD = struct.Struct('<Hc')
+
+
+class JSONSerializer():
+    '''Writes the objects as a JSON object, one member per line
+
+    Attributes:
+        name (str): the format name.
+        text (bool): True if the files are opened in text mode.
+    '''
+
+    name = 'json'
+    text = True
+
+    def encode(self, dictionary):
+        '''Returns the record of a dictionary representation'''
+        return json.dumps(dictionary, default=datetime.isoformat)
+
+    def dump(self, file_obj, items):
+        '''Writes the (key, record) items to file_obj'''
+        write_items(file_obj, items)
+
+    def load(self, file_obj):
+        '''Yields the (key, dictionary representation) items of file_obj
+
+        Raises:
+            ValueError: if the file is not valid.
+        '''
+        return iter_items(file_obj)
+
+    def index(self, file_obj, names):
+        '''Yields the (key, offset, length) of the records of file_obj
+
+        Args:
+            file_obj (file): the file, opened in binary mode.
+            names (list): filled with the field names of the file.
+
+        Raises:
+            ValueError: if the file can't be indexed.
+        '''
+        return iter_lines(file_obj)
+
+    def decode(self, data, names):
+        '''Returns the dictionary representation of a record
+
+        Args:
+            data (bytes): the record read at an indexed position.
+            names (list): the field names filled by 'index'.
+        '''
+        return json.loads(data)
+
+
+class BinarySerializer():
+    '''Writes the objects as length-prefixed binary records
+
+    The file starts with MAGIC and is followed by frames:
+        - b'F' <u16 length> <name>: defines the next field name id.
+        - b'R' <u32 length> <record>: an object.
+
+    A record is <u16 length> <key> <u16 count> followed by count fields
+    <u16 name id> <tag> <value>, see 'encode_value'.
+
+    Attributes:
+        name (str): the format name.
+        text (bool): True if the files are opened in text mode.
+        names (list): the field names by id.
+        ids (dict): the field name ids by name.
+        lock (Lock): guards the new field names, records are encoded by
+                     the threads saving and by the compaction thread.
+    '''
+
+    name = 'binary'
+    text = False
+    MAGIC = b'HBNB\x00\x01'
+
+    def __init__(self):
+        '''Initialize the field names table'''
+        self.names = []
+        self.ids = {}
+        self.lock = Lock()
+
+    def encode(self, dictionary):
+        '''Returns the record of a dictionary representation, without key'''
+        parts = [struct.pack('<H', len(dictionary))]
+        for k, v in dictionary.items():
+            name_id = self.ids.get(k)
+            if name_id is None:
+                name_id = self.add_name(k)
+
+            parts.append(struct.pack('<H', name_id))
+            parts.append(encode_value(k, v))
+
+        return b''.join(parts)
+
+    def add_name(self, name):
+        '''Returns the id of a field name, defining it if it's new'''
+        with self.lock:
+            name_id = self.ids.get(name)
+            if name_id is None:
+                name_id = len(self.names)
+                self.names.append(name)
+                self.ids[name] = name_id
+            return name_id
+
+    def dump(self, file_obj, items):
+        '''Writes the (key, record) items to file_obj'''
+        file_obj.write(self.MAGIC)
+        defined = 0
+        for k, rec in items:
+            while defined < len(self.names):
+                name = self.names[defined].encode('utf-8')
+                file_obj.write(b'F' + struct.pack('<H', len(name)) + name)
+                defined += 1
+
+            key = k.encode('utf-8')
+            file_obj.write(b'R' + struct.pack(
+                '<IH', len(key) + 2 + len(rec), len(key)))
+            file_obj.write(key)
+            file_obj.write(rec)
+
+    def load(self, file_obj):
+        '''Yields the (key, dictionary representation) items of file_obj
+
+        Raises:
+            ValueError: if the file is not valid.
+        '''
+        names = []
+        for frame, data in self.frames(file_obj, names):
+            if frame == b'R':
+                yield decode_record(data, names)
+
+    def index(self, file_obj, names):
+        '''Yields the (key, offset, length) of the records of file_obj
+
+        Args:
+            file_obj (file): the file, opened in binary mode.
+            names (list): filled with the field names of the file.
+
+        Raises:
+            ValueError: if the file can't be indexed.
+        '''
+        offset = len(self.MAGIC)
+        for frame, data in self.frames(file_obj, names):
+            offset += 5 if frame == b'R' else 3
+            if frame == b'R':
+                key_len = struct.unpack_from('<H', data)[0]
+                yield data[2:2 + key_len].decode('utf-8'), offset, len(data)
+            offset += len(data)
+
+    def decode(self, data, names):
+        '''Returns the dictionary representation of a record
+
+        Args:
+            data (bytes): the record read at an indexed position.
+            names (list): the field names filled by 'index'.
+        '''
+        return decode_record(data, names)[1]
+
+    def frames(self, file_obj, names):
+        '''Yields the (frame type, data) frames of file_obj
+
+        Args:
+            file_obj (file): the file, opened in binary mode.
+            names (list): filled with the field names of the file.
+        '''
+        if file_obj.read(len(self.MAGIC)) != self.MAGIC:
+            raise ValueError('Not a binary storage file')
+
+        while True:
+            frame = file_obj.read(1)
+            if frame == b'':
+                return
+
+            if frame == b'F':
+                size = read_exactly(file_obj, 2)
+                name = read_exactly(file_obj, struct.unpack('<H', size)[0])
+                names.append(name.decode('utf-8'))
+                yield frame, name
+            elif frame == b'R':
+                size = read_exactly(file_obj, 4)
+                yield frame, read_exactly(
+                    file_obj, struct.unpack('<I', size)[0])
+            else:
+                raise ValueError('Unknown frame {}'.format(frame))
+
+
+def read_exactly(file_obj, size):
+    '''Reads size bytes from file_obj
+
+    Raises:
+        ValueError: if the file ends before.
+    '''
+    data = file_obj.read(size)
+    if len(data) != size:
+        raise ValueError('Truncated binary storage file')
+    return data
+
+
+def encode_value(k, v):
+    '''Returns the tag and value bytes of a field
+
+    Args:
+        k (str): the field name.
+        v: the field value.
+    '''
+    if v is None:
+        return b'N'
+    if v is True:
+        return b'T'
+    if v is False:
+        return b'F'
+    if isinstance(v, int) and -2 ** 63 <= v < 2 ** 63:
+        return b'i' + I64.pack(v)
+    if isinstance(v, float):
+        return b'f' + F64.pack(v)
+
+    date = v if isinstance(v, datetime) else None
+    if isinstance(v, str) and k in DATE_ATTRS:
+        try:
+            date = datetime.fromisoformat(v)
+        except ValueError:
+            pass
+    if date is not None and date.tzinfo is None:
+        micros = (date - EPOCH) // timedelta(microseconds=1)
+        return b't' + I64.pack(micros)
+
+    if isinstance(v, str):
+        data = v.encode('utf-8')
+        return b's' + U32.pack(len(data)) + data
+
+    data = json.dumps(v, default=datetime.isoformat).encode('utf-8')
+    return b'j' + U32.pack(len(data)) + data
+
+
+def decode_record(data, names):
+    '''Returns the (key, dictionary representation) of a record
+
+    Args:
+        data (bytes): the record.
+        names (list): the field names by id.
+
+    Note:
+        datetimes are decoded to datetime instances.
+    '''
+    try:
+        key_len = U16.unpack_from(data)[0]
+        key = data[2:2 + key_len].decode('utf-8')
+        pos = 2 + key_len
+
+        count = U16.unpack_from(data, pos)[0]
+        pos += 2
+
+        dictionary = {}
+        for _ in range(count):
+            name_id, tag = FIELD.unpack_from(data, pos)
+            pos += 3
+
+            if tag == b's' or tag == b'j':
+                size = U32.unpack_from(data, pos)[0]
+                v = data[pos + 4:pos + 4 + size].decode('utf-8')
+                if tag == b'j':
+                    v = json.loads(v)
+                pos += 4 + size
+            elif tag == b't':
+                v = EPOCH + timedelta(microseconds=I64.unpack_from(
+                    data, pos)[0])
+                pos += 8
+            elif tag == b'i':
+                v = I64.unpack_from(data, pos)[0]
+                pos += 8
+            elif tag == b'f':
+                v = F64.unpack_from(data, pos)[0]
+                pos += 8
+            elif tag == b'N':
+                v = None
+            elif tag == b'T':
+                v = True
+            elif tag == b'F':
+                v = False
+            else:
+                raise ValueError('Unknown tag {}'.format(tag))
+
+            dictionary[names[name_id]] = v
+    except (struct.error, IndexError) as e:
+        raise ValueError('Invalid binary record') from e
+
+    return key, dictionary
+
+
+SERIALIZERS = {'json': JSONSerializer, 'binary': BinarySerializer}
+
+
+def get_serializer(name):
+    '''Returns a serializer by format name
+
+    Raises:
+        ValueError: if the format doesn't exist.
+    '''
+    if name not in SERIALIZERS:
+        raise ValueError('Unknown storage format: {}'.format(name))
+    return SERIALIZERS[name]()
+
+
+def convert(src_path, src_format, dst_path, dst_format):
+    '''Converts a storage file from a format to another
+
+    Args:
+        src_path (str): the file to read.
+        src_format (str): its format name.
+        dst_path (str): the file to write.
+        dst_format (str): its format name.
+    '''
+    src = get_serializer(src_format)
+    dst = get_serializer(dst_format)
+
+    with open_file(src, src_path, 'r') as src_file:
+        with open_file(dst, dst_path, 'w') as dst_file:
+            items = ((k, dst.encode(v)) for k, v in src.load(src_file))
+            dst.dump(dst_file, items)
+
+
+def open_file(serializer, path, mode):
+    '''Opens a file in the mode of a serializer
+
+    Args:
+        serializer: the serializer of the file.
+        path (str): the file path.
+        mode (str): 'r', 'w' or 'a'.
+    '''
+    if serializer.text:
+        return open(path, mode, encoding='utf-8')
+    return open(path, mode + 'b')
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 5:
+        print('Usage: {} <src format> <src file> <dst format> <dst file>'
+              .format(sys.argv[0]))
+        sys.exit(1)
+
+    convert(sys.argv[2], sys.argv[1], sys.argv[4], sys.argv[3])
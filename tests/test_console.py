@@ -1,11 +1,13 @@
 #!/usr/bin/python3
 '''Unit tests for base model module'''
 import unittest
+import os
 import uuid
 from unittest.mock import patch
 from io import StringIO
 from console import HBNBCommand
 import models
+from models.place import Place
 
 
 class TestHBNBCommand(unittest.TestCase):
@@ -48,6 +50,17 @@ class TestHBNBCommand(unittest.TestCase):
             HBNBCommand().onecmd('')
             self.assertEqual('', f.getvalue().strip())
 
+    def test_compact(self):
+        '''Tests for 'compact' method'''
+        models.storage.update_journal_mode(True)
+        with patch('sys.stdout', new=StringIO()) as f:
+            HBNBCommand().onecmd('create User')
+            HBNBCommand().onecmd('compact')
+            self.assertTrue(uuid.UUID(f.getvalue().strip()))
+        models.storage.update_journal_mode(False)
+
+        self.assertFalse(os.path.isfile(models.storage.journal_path()))
+
 
 class TestHBNBCommandBaseModel(unittest.TestCase):
     '''Unit tests for hbnb command - BaseModel'''
@@ -368,6 +381,21 @@ class TestHBNBCommandUser(unittest.TestCase):
             output = f.getvalue().split('\n')[2].strip()
             self.assertTrue('["[User] ({})'.format(obj_id) in output)
 
+    def test_all_order(self):
+        '''Test 'do_all' prints the instances in creation order'''
+        with patch('sys.stdout', new=StringIO()) as f:
+            for _ in range(20):
+                HBNBCommand().onecmd('create User')
+            ids = f.getvalue().split()
+
+        for command in ('all', 'all User'):
+            with patch('sys.stdout', new=StringIO()) as f:
+                HBNBCommand().onecmd(command)
+                output = f.getvalue()
+
+            positions = [output.index('({})'.format(v)) for v in ids]
+            self.assertEqual(positions, sorted(positions))
+
     def test_create_object(self):
         '''Test 'do_create' method'''
         with patch('sys.stdout', new=StringIO()) as f:
@@ -1333,6 +1361,134 @@ class TestHBNBCommandPlace(unittest.TestCase):
             msg = '** no instance found **'
             self.assertEqual(msg, f.getvalue().strip())
 
+    def create_places(self):
+        '''Creates places with a price and a number of guests'''
+        ids = []
+        for price, guests in ((80, 4), (120, 6), (60, 2), (95, 5)):
+            with patch('sys.stdout', new=StringIO()) as f:
+                HBNBCommand().onecmd('create Place')
+            ids.append(f.getvalue().strip())
+            HBNBCommand().onecmd('update Place {} price_by_night {}'.format(
+                ids[-1], price))
+            HBNBCommand().onecmd('update Place {} max_guest {}'.format(
+                ids[-1], guests))
+        return ids
+
+    def test_query(self):
+        '''Test 'query' method with conditions'''
+        ids = self.create_places()
+        with patch('sys.stdout', new=StringIO()) as f:
+            HBNBCommand().onecmd('query Place price_by_night<100 '
+                                 'max_guest>=4 --fields=id --order=-id')
+
+            expected = sorted([ids[0], ids[3]], reverse=True)
+            self.assertEqual(f.getvalue().strip(),
+                             str([{'id': v} for v in expected]))
+
+    def test_query_order_limit(self):
+        '''Test 'query' method with order, limit and offset'''
+        ids = self.create_places()
+        with patch('sys.stdout', new=StringIO()) as f:
+            HBNBCommand().onecmd('query Place --order=-max_guest --limit=2 '
+                                 '--offset=1')
+
+            output = f.getvalue().strip()
+            self.assertIn('[Place] ({})'.format(ids[3]), output)
+            self.assertIn('[Place] ({})'.format(ids[0]), output)
+            self.assertNotIn(ids[1], output)
+
+    def test_range(self):
+        '''Test 'range' method'''
+        ids = self.create_places()
+        with patch('sys.stdout', new=StringIO()) as f:
+            HBNBCommand().onecmd('range Place price_by_night 70 100')
+
+            output = f.getvalue().strip()
+            self.assertLess(output.index(ids[0]), output.index(ids[3]))
+            self.assertNotIn(ids[1], output)
+            self.assertNotIn(ids[2], output)
+
+    def test_range_top(self):
+        '''Test 'range' method with a limit in descending order'''
+        ids = self.create_places()
+        with patch('sys.stdout', new=StringIO()) as f:
+            HBNBCommand().onecmd('range Place max_guest * 5 --desc --limit=2')
+
+            output = f.getvalue().strip()
+            self.assertLess(output.index(ids[3]), output.index(ids[0]))
+            self.assertNotIn(ids[1], output)
+            self.assertNotIn(ids[2], output)
+
+    def test_range_invalid(self):
+        '''Test 'range' method with invalid input'''
+        msgs = {'range Place': '** attribute name missing **',
+                'range Place max_guest x': '** invalid value: x **',
+                'range Place max_guest 1 2 3': '** invalid option: 3 **',
+                'range Place max_guest --top': '** invalid option: --top **'}
+        for line, msg in msgs.items():
+            with patch('sys.stdout', new=StringIO()) as f:
+                HBNBCommand().onecmd(line)
+                self.assertEqual(msg, f.getvalue().strip())
+
+    def create_located_places(self):
+        '''Creates places in San Francisco, Oakland and New York'''
+        ids = []
+        for lat, lon in ((37.77, -122.41), (37.80, -122.27), (40.71, -74.0)):
+            with patch('sys.stdout', new=StringIO()) as f:
+                HBNBCommand().onecmd('create Place')
+            ids.append(f.getvalue().strip())
+            HBNBCommand().onecmd('update Place {} latitude {}'.format(
+                ids[-1], lat))
+            HBNBCommand().onecmd('update Place {} longitude {}'.format(
+                ids[-1], lon))
+        return ids
+
+    def test_bbox(self):
+        '''Test 'bbox' method'''
+        ids = self.create_located_places()
+        with patch('sys.stdout', new=StringIO()) as f:
+            HBNBCommand().onecmd('bbox Place 37 -123 38 -122')
+
+            output = f.getvalue().strip()
+            self.assertIn(ids[0], output)
+            self.assertIn(ids[1], output)
+            self.assertNotIn(ids[2], output)
+
+    def test_nearest(self):
+        '''Test 'nearest' method'''
+        ids = self.create_located_places()
+        with patch('sys.stdout', new=StringIO()) as f:
+            HBNBCommand().onecmd('nearest Place 37.78 -122.40 2 --km=50')
+
+            output = f.getvalue().strip()
+            self.assertIn('1.417 km [Place] ({})'.format(ids[0]), output)
+            self.assertLess(output.index(ids[0]), output.index(ids[1]))
+            self.assertNotIn(ids[2], output)
+
+    def test_geo_invalid(self):
+        '''Test 'bbox' and 'nearest' methods with invalid input'''
+        msgs = {'bbox Place 1 2 3':
+                '** usage: bbox <class name> <south> <west> <north> '
+                '<east> **',
+                'bbox Place 1 2 x 4': '** invalid number in: 1 2 x 4 **',
+                'nearest Place 1 2 x': '** invalid count: x **',
+                'nearest Place 91 0': '** Invalid position: 91.0, 0.0 **'}
+        for line, msg in msgs.items():
+            with patch('sys.stdout', new=StringIO()) as f:
+                HBNBCommand().onecmd(line)
+                self.assertEqual(msg, f.getvalue().strip())
+
+    def test_query_invalid(self):
+        '''Test 'query' method with invalid input'''
+        msgs = {'query': '** class name missing **',
+                'query Nope': '** class doesn\'t exist **',
+                'query Place name': '** invalid condition: name **',
+                'query Place --limit=x': '** invalid option: --limit=x **'}
+        for line, msg in msgs.items():
+            with patch('sys.stdout', new=StringIO()) as f:
+                HBNBCommand().onecmd(line)
+                self.assertEqual(msg, f.getvalue().strip())
+
 
 class TestHBNBCommandState(unittest.TestCase):
     '''Unit tests for hbnb command - State'''
@@ -1848,5 +2004,43 @@ class TestHBNBCommandReview(unittest.TestCase):
             self.assertEqual(msg, f.getvalue().strip())
 
 
+class TestHBNBCommandMmap(unittest.TestCase):
+    '''Unit tests for hbnb command - read-only mmap mode'''
+
+    def setUp(self):
+        '''Map the indexed file of a saved storage'''
+        models.storage.update_file_path('test_file.json')
+        self.place = Place()
+        models.storage.save()
+        models.storage.write_mapped_file('test_file.map')
+
+        models.storage.update_file_path('test_file.map')
+        models.storage.update_mmap_mode(True)
+        models.storage.reload()
+
+    def tearDown(self):
+        '''Reset storage'''
+        models.storage.update_mmap_mode(False)
+        models.storage.update_file_path('test_file.json')
+        os.remove('test_file.map')
+        models.storage.reset()
+        models.storage.update_file_path('file.json')
+
+    def test_read_only(self):
+        '''Test the commands changing instances in mmap mode'''
+        commands = ['create User',
+                    'update Place {} name Loft'.format(self.place.id),
+                    'destroy Place {}'.format(self.place.id),
+                    'Place.destroy({})'.format(self.place.id)]
+        for command in commands:
+            with patch('sys.stdout', new=StringIO()) as f:
+                HBNBCommand().onecmd(command)
+                self.assertEqual(f.getvalue().strip(),
+                                 '** storage is read-only **', command)
+
+        self.assertTrue(models.storage.exists(Place, self.place.id))
+        self.assertEqual(models.storage.count(), 1)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -2,9 +2,13 @@
 '''Unit tests for base model module'''
 import unittest
 import datetime
+import pickle
 from time import sleep
+from unittest.mock import patch
 import models
 from models.base_model import BaseModel
+from models.engine.file_storage import FileStorage
+from models.place import Place
 
 
 class TestBaseModel(unittest.TestCase):
@@ -61,6 +65,16 @@ class TestBaseModel(unittest.TestCase):
         bm.save()
         self.assertTrue(old_updated_at < bm.updated_at)
 
+    def test_save_deleted(self):
+        '''Tests 'save' doesn't add back a deleted instance'''
+        bm = BaseModel()
+        bm.save()
+        models.storage.delete(bm)
+        models.storage.save()
+
+        bm.save()
+        self.assertFalse(models.storage.exists(BaseModel, bm.id))
+
     def test_save_no_args(self):
         '''Tests for public 'save' method with no args'''
 
@@ -106,6 +120,76 @@ class TestBaseModel(unittest.TestCase):
 
         self.assertFalse(new_bm is bm)
 
+    def test_re_create_no_microseconds(self):
+        '''Tests re-creating an instance with whole-second dates'''
+        bm = BaseModel()
+        bm.created_at = bm.created_at.replace(microsecond=0)
+        new_bm = BaseModel(**bm.to_dict())
+
+        self.assertEqual(new_bm.created_at, bm.created_at)
+        self.assertEqual(new_bm.updated_at, bm.updated_at)
+
+    def test_from_dict(self):
+        '''Tests creating an instance with 'from_dict' '''
+        bm = BaseModel()
+        bm.number = 98
+        bm_json = bm.to_dict()
+
+        with patch('models.base_model.uuid4') as uuid4, \
+                patch.object(models.storage, 'mark_dirty') as mark_dirty:
+            new_bm = BaseModel.from_dict(bm_json)
+        uuid4.assert_not_called()
+        mark_dirty.assert_not_called()
+
+        self.assertIs(type(new_bm), BaseModel)
+        self.assertEqual(new_bm.to_dict(), bm_json)
+        self.assertEqual(new_bm.created_at, bm.created_at)
+        self.assertNotIn('__class__', new_bm.__dict__)
+        self.assertIs(models.storage.all()['BaseModel.{}'.format(bm.id)], bm)
+
+    def test_from_dict_defaults(self):
+        '''Tests 'from_dict' generates the missing id and dates'''
+        bm = BaseModel.from_dict({'name': 'Betty'})
+
+        self.assertIsInstance(bm.id, str)
+        self.assertIsInstance(bm.created_at, datetime.datetime)
+        self.assertIsInstance(bm.updated_at, datetime.datetime)
+        self.assertEqual(bm.name, 'Betty')
+
+    def test_from_dict_interned(self):
+        '''Tests 'from_dict' interns the foreign key values'''
+        first = Place.from_dict({'city_id': ''.join(['c', '1']),
+                                 'name': ''.join(['n', '1'])})
+        second = Place.from_dict({'city_id': ''.join(['c', '1']),
+                                  'name': ''.join(['n', '1'])})
+
+        self.assertIs(first.city_id, second.city_id)
+        self.assertIsNot(first.name, second.name)
+
+    def test_setattr_interned(self):
+        '''Tests setting a foreign key interns its value'''
+        first = Place()
+        second = Place()
+        first.user_id = ''.join(['u', '1'])
+        second.user_id = ''.join(['u', '1'])
+
+        self.assertIs(first.user_id, second.user_id)
+
+    def test_update_interned(self):
+        '''Tests configuring the interned attributes of a class'''
+        Place.update_interned(['name'])
+        try:
+            first = Place.from_dict({'name': ''.join(['n', '1']),
+                                     'city_id': ''.join(['c', '1'])})
+            second = Place.from_dict({'name': ''.join(['n', '1']),
+                                      'city_id': ''.join(['c', '1'])})
+        finally:
+            del Place._interned
+
+        self.assertIs(first.name, second.name)
+        self.assertIsNot(first.city_id, second.city_id)
+        self.assertIn('city_id', Place._interned)
+
     def test___str__(self):
         '''Test string representation for BaseModel'''
         bm = BaseModel()
@@ -123,5 +207,103 @@ class TestBaseModel(unittest.TestCase):
         self.assertIn('updated_at', string)
 
 
+class TestBaseModelCompact(unittest.TestCase):
+    '''Unit tests for the compact variant of the models'''
+
+    @classmethod
+    def setUpClass(cls):
+        '''Update file path for test'''
+        models.storage.update_file_path('test_file.json')
+
+    @classmethod
+    def tearDownClass(cls):
+        '''Update file path for app'''
+        models.storage.update_file_path('file.json')
+
+    def tearDown(self):
+        models.storage.reset()
+
+    def test_compact_class(self):
+        '''Tests the compact class is a cached subclass'''
+        compact = Place.compact()
+
+        self.assertTrue(issubclass(compact, Place))
+        self.assertEqual(compact.__name__, 'Place')
+        self.assertIs(Place.compact(), compact)
+        self.assertIs(compact.compact(), compact)
+        self.assertIsNot(BaseModel.compact(), compact)
+
+    def test_slots(self):
+        '''Tests the declared attributes are kept in slots'''
+        place = Place.compact()()
+        place.number_rooms = 3
+
+        self.assertEqual(place.number_rooms, 3)
+        self.assertEqual(place.max_guest, 0)
+        self.assertEqual(place.amenity_ids, [])
+        self.assertFalse(hasattr(place, 'color'))
+        self.assertIsNone(getattr(place, '_extra', None))
+
+    def test_extra_attributes(self):
+        '''Tests the attributes which are not declared'''
+        place = Place.compact()()
+        place.color = 'blue'
+
+        self.assertEqual(place.color, 'blue')
+        self.assertEqual(place.__dict__['color'], 'blue')
+
+    def test_own_attribute(self):
+        '''Tests 'own_attribute' ignores the class defaults'''
+        for cls in (Place, Place.compact()):
+            place = cls()
+            self.assertIsNone(place.own_attribute('latitude'))
+            self.assertIsNone(place.own_attribute('color'))
+            place.latitude = 1.5
+            place.color = 'blue'
+            self.assertEqual(place.own_attribute('latitude'), 1.5)
+            self.assertEqual(place.own_attribute('color'), 'blue')
+
+    def test_to_dict_str(self):
+        '''Tests 'to_dict' and '__str__' of a compact instance'''
+        place = Place()
+        place.name = 'Loft'
+        place.color = 'blue'
+        compact = Place.compact().from_dict(place.to_dict())
+
+        self.assertEqual(compact.to_dict(), place.to_dict())
+        self.assertEqual(str(compact), str(place))
+
+    def test_setattr_marks_dirty(self):
+        '''Tests setting an attribute marks the instance as changed'''
+        place = Place.compact()()
+        with patch.object(models.storage, 'mark_dirty') as mark_dirty:
+            place.name = 'Loft'
+        mark_dirty.assert_called_once_with(place)
+
+    def test_pickle(self):
+        '''Tests a compact instance can be pickled'''
+        place = Place.compact()()
+        place.name = 'Loft'
+        loaded = pickle.loads(pickle.dumps(place))
+
+        self.assertIs(type(loaded), Place.compact())
+        self.assertEqual(loaded.to_dict(), place.to_dict())
+
+    def test_storage_compact_mode(self):
+        '''Tests the storage reads compact instances'''
+        place = Place()
+        place.name = 'Loft'
+        place.save()
+
+        storage = FileStorage()
+        storage.update_file_path('test_file.json')
+        storage.update_compact_mode(True)
+        storage.reload()
+
+        loaded = storage.all()['Place.{}'.format(place.id)]
+        self.assertIs(type(loaded), Place.compact())
+        self.assertEqual(loaded.to_dict(), place.to_dict())
+
+
 if __name__ == '__main__':
     unittest.main()
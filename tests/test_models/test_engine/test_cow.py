@@ -0,0 +1,84 @@
+#!/usr/bin/python3
+'''Unit tests for cow module'''
+import unittest
+from models.engine.cow import COWDict, Snapshot
+
+
+class TestCOWDict(unittest.TestCase):
+    '''Unit tests for 'COWDict' class'''
+
+    def test_items(self):
+        '''Test setting, getting and popping items'''
+        d = COWDict([('a', 1), ('b', 2)])
+        d['a'] = 3
+        self.assertEqual(d['a'], 3)
+        self.assertEqual(len(d), 2)
+
+        self.assertEqual(d.pop('b'), 2)
+        self.assertIsNone(d.pop('b'))
+        self.assertEqual(len(d), 1)
+        with self.assertRaises(KeyError):
+            d['b']
+
+    def test_snapshot_unchanged(self):
+        '''Test a snapshot doesn't see the later changes'''
+        d = COWDict(('k{}'.format(i), i) for i in range(1000))
+        snap = d.snapshot()
+
+        d['k1'] = 'changed'
+        d.pop('k2')
+        d['new'] = 'new'
+
+        self.assertEqual(len(snap), 1000)
+        self.assertEqual(snap['k1'], 1)
+        self.assertEqual(snap['k2'], 2)
+        self.assertNotIn('new', snap)
+        self.assertEqual(dict(snap), {'k{}'.format(i): i
+                                      for i in range(1000)})
+
+    def test_snapshot_shares_buckets(self):
+        '''Test only the changed buckets are copied'''
+        d = COWDict(('k{}'.format(i), i) for i in range(1000))
+        snap = d.snapshot()
+        d['k1'] = 'changed'
+
+        buckets = snap.parts[0][0]
+        shared = sum(a is b for a, b in zip(buckets, d.buckets))
+        self.assertEqual(shared, COWDict.size - 1)
+
+    def test_successive_snapshots(self):
+        '''Test each snapshot sees the changes made before it'''
+        d = COWDict()
+        d['a'] = 1
+        first = d.snapshot()
+        d['a'] = 2
+        second = d.snapshot()
+        d['a'] = 3
+
+        self.assertEqual((first['a'], second['a'], d['a']), (1, 2, 3))
+
+
+class TestSnapshot(unittest.TestCase):
+    '''Unit tests for 'Snapshot' class'''
+
+    def test_parts(self):
+        '''Test a snapshot of several dictionaries'''
+        a = COWDict([('a.1', 1)])
+        b = COWDict([('b.1', 2), ('b.2', 3)])
+        snap = Snapshot([a.freeze(), b.freeze()])
+
+        self.assertEqual(len(snap), 3)
+        self.assertEqual(snap['b.2'], 3)
+        self.assertEqual(snap, {'a.1': 1, 'b.1': 2, 'b.2': 3})
+        with self.assertRaises(KeyError):
+            snap['c.1']
+
+    def test_read_only(self):
+        '''Test a snapshot can't be changed'''
+        snap = COWDict([('a', 1)]).snapshot()
+        with self.assertRaises(TypeError):
+            snap['a'] = 2
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,216 @@
+#!/usr/bin/python3
+'''Unit tests for db storage module'''
+import unittest
+import os
+import sqlite3
+from unittest.mock import patch
+from models.engine.db_storage import DBStorage
+from models.base_model import BaseModel
+from models.user import User
+from models.state import State
+from models.city import City
+from models.place import Place
+
+
+class TestDBStorage(unittest.TestCase):
+    '''Unit tests for 'DBStorage' class'''
+
+    def setUp(self):
+        '''Create storage'''
+        self.storage = self.open_storage()
+        self.storage.reset()
+
+    def tearDown(self):
+        '''Remove the database'''
+        self.storage.close()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.isfile('test_file.db' + suffix):
+                os.remove('test_file.db' + suffix)
+
+    def open_storage(self):
+        '''Returns a storage using the test database'''
+        storage = DBStorage()
+        storage.update_file_path('test_file.db')
+        return storage
+
+    def rows(self):
+        '''Returns the (key, class) rows of the database'''
+        conn = sqlite3.connect('test_file.db')
+        try:
+            return conn.execute('SELECT key, class FROM objects').fetchall()
+        finally:
+            conn.close()
+
+    def test_new_all(self):
+        '''Test 'new', 'all' and 'count' '''
+        user = User()
+        state = State()
+        self.storage.new(user)
+        self.storage.new(state)
+
+        key = 'User.{}'.format(user.id)
+        self.assertEqual(self.storage.all()[key], user)
+        self.assertEqual(self.storage.all(User), {key: user})
+        self.assertEqual(self.storage.all('Place'), {})
+        self.assertEqual(self.storage.count(), 2)
+        self.assertEqual(self.storage.count(State), 1)
+
+    def test_get_exists(self):
+        '''Test 'get' and 'exists' '''
+        user = User()
+        self.storage.new(user)
+
+        self.assertIs(self.storage.get(User, user.id), user)
+        self.assertIs(self.storage.get('User', user.id), user)
+        self.assertIsNone(self.storage.get(State, user.id))
+        self.assertTrue(self.storage.exists(User, user.id))
+        self.storage.delete(user)
+        self.assertFalse(self.storage.exists(User, user.id))
+
+    def test_query(self):
+        '''Test 'query' with an indexed and a range predicate'''
+        places = []
+        for city_id, price in (('c1', 80), ('c1', 120), ('c2', 60)):
+            place = Place()
+            place.city_id = city_id
+            place.price_by_night = price
+            self.storage.new(place)
+            places.append(place)
+        self.storage.save()
+
+        res = self.storage.query(Place, [('city_id', '==', 'c1'),
+                                         ('price_by_night', '<', 100)])
+        self.assertEqual(res, [places[0]])
+        res = self.storage.query(Place, order_by='-price_by_night',
+                                 fields=['price_by_night'], limit=2)
+        self.assertEqual(res, [{'price_by_night': 120},
+                               {'price_by_night': 80}])
+
+    def test_lookup_range(self):
+        '''Test 'lookup_range' '''
+        places = []
+        for price in (80, 120, 60):
+            place = Place()
+            place.price_by_night = price
+            self.storage.new(place)
+            places.append(place)
+
+        self.assertEqual(
+            self.storage.lookup_range(Place, 'price_by_night', 70),
+            [places[0], places[1]])
+        self.assertEqual(self.storage.lookup_range(
+            Place, 'price_by_night', limit=1, reverse=True), [places[1]])
+
+    def test_lookup_bbox_nearest(self):
+        '''Test 'lookup_bbox' and 'lookup_nearest' '''
+        places = []
+        for lat, lon in ((37.77, -122.41), (40.71, -74.0)):
+            place = Place()
+            place.latitude = lat
+            place.longitude = lon
+            self.storage.new(place)
+            places.append(place)
+
+        self.assertEqual(self.storage.lookup_bbox(Place, 37, -123, 38, -122),
+                         [places[0]])
+        res = self.storage.lookup_nearest(Place, 40, -74, 2)
+        self.assertEqual([v for _, v in res], places[::-1])
+
+        self.storage.new(Place())
+        self.assertEqual(self.storage.lookup_bbox(Place, -1, -1, 1, 1), [])
+
+    def test_save_reload(self):
+        '''Test the saved objects are reloaded'''
+        place = Place()
+        place.name = 'Loft'
+        place.number_rooms = 3
+        self.storage.new(place)
+        self.storage.save()
+
+        self.assertEqual(self.rows(),
+                         [('Place.{}'.format(place.id), 'Place')])
+
+        storage = self.open_storage()
+        storage.reload()
+        loaded = storage.all()['Place.{}'.format(place.id)]
+        self.assertIsNot(loaded, place)
+        self.assertEqual(loaded.to_dict(), place.to_dict())
+        storage.close()
+
+    def test_save_changes_only(self):
+        '''Test 'save' writes the changed and deleted objects'''
+        bm = BaseModel()
+        city = City()
+        self.storage.new(bm)
+        self.storage.new(city)
+        self.storage.save()
+
+        city.name = 'Austin'
+        self.storage.mark_dirty(city)
+        self.storage.delete(bm)
+        self.storage.save()
+
+        self.assertEqual(self.rows(), [('City.{}'.format(city.id), 'City')])
+        storage = self.open_storage()
+        storage.reload()
+        self.assertEqual(storage.all(City)['City.{}'.format(city.id)].name,
+                         'Austin')
+        storage.close()
+
+    def test_save_failure(self):
+        '''Test the changes of a failed 'save' are written by the next
+        one
+        '''
+        self.storage.disconnect()
+        user = User()
+        self.storage.new(user)
+        with patch.object(DBStorage, 'connect',
+                          side_effect=sqlite3.OperationalError('locked')):
+            with self.assertRaises(sqlite3.OperationalError):
+                self.storage.save()
+
+        self.storage.save()
+        self.assertEqual(self.rows(), [('User.{}'.format(user.id), 'User')])
+
+    def test_lookup(self):
+        '''Test 'lookup' with the index and with unsaved changes'''
+        first = City()
+        first.state_id = 's1'
+        second = City()
+        second.state_id = 's1'
+        for city in (first, second):
+            self.storage.new(city)
+        self.storage.save()
+
+        second.state_id = 's2'
+        self.storage.mark_dirty(second)
+        third = City()
+        third.state_id = 's1'
+        self.storage.new(third)
+
+        self.assertEqual(set(self.storage.lookup(City, 'state_id', 's1')),
+                         {'City.{}'.format(first.id),
+                          'City.{}'.format(third.id)})
+        self.assertEqual(list(self.storage.lookup('City', 'state_id', 's2')),
+                         ['City.{}'.format(second.id)])
+        self.assertEqual(self.storage.lookup(City, 'name', ''),
+                         {'City.{}'.format(c.id): c
+                          for c in (first, second, third)})
+
+    def test_snapshot(self):
+        '''Test 'snapshot' doesn't see the later changes'''
+        user = User()
+        self.storage.new(user)
+        snap = self.storage.snapshot()
+        self.storage.delete(user)
+
+        self.assertEqual(dict(snap), {'User.{}'.format(user.id): user})
+
+    def test_wal(self):
+        '''Test the database uses a write-ahead log'''
+        self.assertEqual(self.storage.execute('PRAGMA journal_mode'),
+                         [('wal',)])
+
+
+if __name__ == '__main__':
+    unittest.main()
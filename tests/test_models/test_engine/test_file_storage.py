@@ -2,6 +2,13 @@
 '''Unit tests for file storage module'''
 import unittest
 import json
+import os
+import subprocess
+import sys
+from tempfile import TemporaryDirectory
+from threading import Event, Thread
+from time import sleep
+from unittest.mock import patch
 import models
 from models.engine.file_storage import FileStorage
 from models.base_model import BaseModel
@@ -53,6 +60,15 @@ class TestFileStorage(unittest.TestCase):
         self.assertIn(classes_attr, dir(storage))
         self.assertIsInstance(getattr(storage, classes_attr), dict)
 
+    def test_file_storage_instances(self):
+        '''Check file storages don't share their objects'''
+        storage = FileStorage()
+        storage.new(BaseModel.from_dict({'id': '1'}))
+
+        self.assertEqual(len(storage.all()), 1)
+        self.assertEqual(FileStorage().all(), {})
+        self.assertNotIn('BaseModel.1', models.storage.all())
+
     def test_init_no_args(self):
         '''Create file storage with no arguments'''
         with self.assertRaises(TypeError):
@@ -92,6 +108,22 @@ class TestFileStorageAll(unittest.TestCase):
         key = 'BaseModel.{}'.format(bm.id)
         self.assertEqual(storage.all(), {key: bm})
 
+    def test_get_exists(self):
+        '''Test 'get' and 'exists' methods'''
+        storage = self.storage
+
+        user = User()
+        self.assertIs(storage.get(User, user.id), user)
+        self.assertIs(storage.get('User', user.id), user)
+        self.assertIsNone(storage.get(Place, user.id))
+        self.assertIsNone(storage.get(User, 'nope'))
+        self.assertTrue(storage.exists('User', user.id))
+        self.assertFalse(storage.exists(State, user.id))
+
+        storage.delete(user)
+        self.assertIsNone(storage.get(User, user.id))
+        self.assertFalse(storage.exists(User, user.id))
+
     def test_all_base_model(self):
         '''Tests 'all' method for BaseModel'''
         storage = self.storage
@@ -177,7 +209,41 @@ class TestFileStorageAll(unittest.TestCase):
     def test_all_excess_args(self):
         '''Tests 'all' with extra argument'''
         with self.assertRaises(TypeError):
-            FileStorage.all(self, 'arg')
+            FileStorage.all(self, 'arg', 'arg')
+
+    def test_all_class(self):
+        '''Tests 'all' with a class'''
+        storage = self.storage
+
+        user = User()
+        State()
+        key = 'User.{}'.format(user.id)
+
+        self.assertEqual(storage.all(User), {key: user})
+        self.assertEqual(storage.all('User'), {key: user})
+        self.assertEqual(storage.all(Review), {})
+
+    def test_all_class_delete(self):
+        '''Tests 'all' with a class after 'delete' '''
+        storage = self.storage
+
+        city = City()
+        storage.delete(city)
+
+        self.assertEqual(storage.all(City), {})
+
+    def test_count(self):
+        '''Tests 'count' method'''
+        storage = self.storage
+
+        Place()
+        Place()
+        Amenity()
+
+        self.assertEqual(storage.count(), 3)
+        self.assertEqual(storage.count(Place), 2)
+        self.assertEqual(storage.count('Amenity'), 1)
+        self.assertEqual(storage.count('Review'), 0)
 
 
 class TestFileStorageNew(unittest.TestCase):
@@ -318,5 +384,1437 @@ class TestFileStorageApp(unittest.TestCase):
             self.assertEqual(str(data[key]), str(bm.to_dict()))
 
 
+class TestFileStorageDirty(unittest.TestCase):
+    '''Unit tests for the changed objects tracking'''
+
+    def setUp(self):
+        '''Create storage'''
+        self.storage = models.storage
+        self.storage.update_file_path('test_file.json')
+
+    def tearDown(self):
+        '''Reset storage'''
+        self.storage.reset()
+
+    def read_file(self):
+        '''Returns the content of the JSON file'''
+        with open('test_file.json', 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def test_save_unchanged(self):
+        '''Test 'save' doesn't serialize unchanged objects again'''
+        user_1 = User()
+        user_2 = User()
+        self.storage.save()
+
+        with patch.object(User, 'to_dict', autospec=True,
+                          side_effect=BaseModel.to_dict) as to_dict:
+            user_1.first_name = 'Betty'
+            self.storage.save()
+
+        to_dict.assert_called_once_with(user_1)
+        data = self.read_file()
+        self.assertEqual(data['User.{}'.format(user_1.id)]['first_name'],
+                         'Betty')
+        self.assertEqual(data['User.{}'.format(user_2.id)],
+                         user_2.to_dict())
+
+    def test_mark_dirty(self):
+        '''Test 'mark_dirty' after an in place change'''
+        place = Place()
+        place.amenity_ids = []
+        self.storage.save()
+
+        place.amenity_ids.append('1234')
+        self.storage.mark_dirty(place)
+        self.storage.save()
+
+        data = self.read_file()
+        self.assertEqual(data['Place.{}'.format(place.id)]['amenity_ids'],
+                         ['1234'])
+
+    def test_mark_dirty_unknown(self):
+        '''Test 'mark_dirty' ignores objects not in storage'''
+        bm = BaseModel(id='1234')
+        bm.name = 'Betty'
+        self.assertNotIn('BaseModel.1234', self.storage.all())
+
+
+class TestFileStorageLookup(unittest.TestCase):
+    '''Unit tests for the 'lookup' method'''
+
+    def setUp(self):
+        '''Create storage'''
+        self.storage = models.storage
+        self.storage.update_file_path('test_file.json')
+
+    def tearDown(self):
+        '''Reset storage'''
+        self.storage.reset()
+
+    def test_lookup(self):
+        '''Test 'lookup' on an indexed attribute'''
+        state = State()
+        city_1 = City()
+        city_1.state_id = state.id
+        city_2 = City()
+        city_2.state_id = state.id
+        City().state_id = 'other'
+
+        cities = self.storage.lookup(City, 'state_id', state.id)
+        self.assertEqual(cities, {'City.{}'.format(city_1.id): city_1,
+                                  'City.{}'.format(city_2.id): city_2})
+        self.assertEqual(self.storage.lookup('City', 'state_id', '1'), {})
+
+    def test_lookup_update(self):
+        '''Test 'lookup' after the attribute is updated'''
+        review = Review()
+        review.place_id = '1'
+        review.place_id = '2'
+
+        self.assertEqual(self.storage.lookup(Review, 'place_id', '1'), {})
+        self.assertIn('Review.{}'.format(review.id),
+                      self.storage.lookup(Review, 'place_id', '2'))
+
+    def test_lookup_delete(self):
+        '''Test 'lookup' after the object is deleted'''
+        place = Place()
+        place.user_id = '1'
+        self.storage.delete(place)
+
+        self.assertEqual(self.storage.lookup(Place, 'user_id', '1'), {})
+
+    def test_lookup_reload(self):
+        '''Test 'lookup' after 'reload' '''
+        review = Review()
+        review.user_id = '1'
+        review.save()
+        self.storage.reload()
+
+        res = self.storage.lookup(Review, 'user_id', '1')
+        self.assertIsNot(res['Review.{}'.format(review.id)], review)
+
+    def test_lookup_not_indexed(self):
+        '''Test 'lookup' on an attribute without index'''
+        user = User()
+        user.email = 'betty@holberton.io'
+        User().email = 'bob@holberton.io'
+
+        res = self.storage.lookup(User, 'email', 'betty@holberton.io')
+        self.assertEqual(res, {'User.{}'.format(user.id): user})
+
+    def test_add_index(self):
+        '''Test 'add_index' indexes the existing objects'''
+        amenity = Amenity()
+        amenity.name = 'Wifi'
+        self.storage.add_index(Amenity, 'name')
+
+        amenity.name = 'TV'
+        self.assertEqual(self.storage.lookup(Amenity, 'name', 'Wifi'), {})
+        self.assertIn('Amenity.{}'.format(amenity.id),
+                      self.storage.lookup(Amenity, 'name', 'TV'))
+
+    def create_places(self):
+        '''Returns places with a price and a number of guests'''
+        places = []
+        for price, guests in ((80, 4), (120, 6), (60, 2), (95, 5)):
+            place = Place()
+            place.city_id = 'c1' if price < 100 else 'c2'
+            place.price_by_night = price
+            place.max_guest = guests
+            places.append(place)
+        return places
+
+    def test_query(self):
+        '''Test 'query' with range predicates, order and projection'''
+        places = self.create_places()
+        res = self.storage.query(Place, [('price_by_night', '<', 100),
+                                         ('max_guest', '>=', 4)],
+                                 fields=['id', 'max_guest'],
+                                 order_by='-max_guest')
+        self.assertEqual(res, [{'id': places[3].id, 'max_guest': 5},
+                               {'id': places[0].id, 'max_guest': 4}])
+
+        res = self.storage.query('Place', order_by='price_by_night',
+                                 limit=2, offset=1)
+        self.assertEqual(res, [places[0], places[3]])
+        self.assertEqual(self.storage.query(State), [])
+
+    def test_query_index(self):
+        '''Test 'query' only checks the objects the index returns'''
+        places = self.create_places()
+        with patch.object(FileStorage, 'all', autospec=True) as all_:
+            res = self.storage.query(Place, [('city_id', '==', 'c1'),
+                                             ('max_guest', '>', 2)])
+        all_.assert_not_called()
+        self.assertEqual(sorted(v.id for v in res),
+                         sorted([places[0].id, places[3].id]))
+
+    def test_query_range_index(self):
+        '''Test 'query' only checks the objects the range index returns'''
+        places = self.create_places()
+        with patch.object(FileStorage, 'all', autospec=True) as all_:
+            res = self.storage.query(Place, [('price_by_night', '>', 60),
+                                             ('price_by_night', '<=', 95),
+                                             ('max_guest', '!=', 5)])
+        all_.assert_not_called()
+        self.assertEqual(res, [places[0]])
+
+    def test_lookup_range(self):
+        '''Test 'lookup_range' follows creations, updates and deletions'''
+        places = self.create_places()
+        self.assertEqual(
+            self.storage.lookup_range(Place, 'price_by_night', 60, 95),
+            [places[2], places[0], places[3]])
+
+        places[0].price_by_night = 100
+        self.storage.delete(places[3])
+        place = Place()
+        place.price_by_night = 70.5
+        places[2].price_by_night = 'free'
+        self.assertEqual(
+            self.storage.lookup_range(Place, 'price_by_night', 60, 100),
+            [place, places[0]])
+
+    def test_lookup_range_top(self):
+        '''Test 'lookup_range' returns the top-k'''
+        places = self.create_places()
+        self.assertEqual(self.storage.lookup_range(
+            Place, 'max_guest', limit=2, reverse=True), places[1:4:2])
+        self.assertEqual(self.storage.lookup_range(
+            'Place', 'price_by_night', low=70, limit=1), [places[0]])
+
+    def test_lookup_range_not_indexed(self):
+        '''Test 'lookup_range' on an attribute without range index'''
+        places = self.create_places()
+        res = self.storage.lookup_range(Place, 'latitude')
+        self.assertEqual(sorted(v.id for v in res),
+                         sorted(v.id for v in places))
+        self.storage.add_range_index(Place, 'latitude')
+        places[1].latitude = -1.5
+        self.assertEqual(self.storage.lookup_range(Place, 'latitude',
+                                                   high=-1), [places[1]])
+
+    def test_lookup_range_reload(self):
+        '''Test the range indexes of the reloaded objects'''
+        places = self.create_places()
+        self.storage.save()
+        self.storage.reload()
+        res = self.storage.lookup_range(Place, 'price_by_night', 80, 100)
+        self.assertEqual([v.id for v in res], [places[0].id, places[3].id])
+
+    def create_located_places(self):
+        '''Returns places in San Francisco, Oakland and New York'''
+        places = []
+        for lat, lon in ((37.77, -122.41), (37.80, -122.27), (40.71, -74.0)):
+            place = Place()
+            place.latitude = lat
+            place.longitude = lon
+            places.append(place)
+        return places
+
+    def test_lookup_bbox(self):
+        '''Test 'lookup_bbox' follows creations, moves and deletions'''
+        places = self.create_located_places()
+        res = self.storage.lookup_bbox(Place, 37, -123, 38, -122)
+        self.assertEqual(sorted(v.id for v in res),
+                         sorted([places[0].id, places[1].id]))
+
+        places[0].latitude = 40.7
+        places[0].longitude = -74.1
+        self.storage.delete(places[2])
+        self.assertEqual(self.storage.lookup_bbox('Place', 40, -75, 41, -73),
+                         [places[0]])
+        self.assertEqual(self.storage.lookup_bbox(User, -90, -180, 90, 180),
+                         [])
+
+    def test_lookup_nearest(self):
+        '''Test 'lookup_nearest' returns the nearest objects'''
+        places = self.create_located_places()
+        res = self.storage.lookup_nearest(Place, 37.78, -122.40, 2)
+        self.assertEqual([v for _, v in res], places[:2])
+        self.assertLess(res[0][0], res[1][0])
+        res = self.storage.lookup_nearest(Place, 40, -74, 3, max_km=100)
+        self.assertEqual([v for _, v in res], [places[2]])
+        with self.assertRaises(ValueError):
+            self.storage.lookup_nearest(Place, -91, 0)
+
+    def test_lookup_nearest_reload(self):
+        '''Test the spatial index of the reloaded objects'''
+        places = self.create_located_places()
+        self.storage.save()
+        self.storage.reload()
+        res = self.storage.lookup_nearest(Place, 40, -74)
+        self.assertEqual(res[0][1].id, places[2].id)
+
+    def test_lookup_unpositioned(self):
+        '''Test the places without position are not at (0, 0)'''
+        place = Place()
+        self.assertEqual(self.storage.lookup_bbox(Place, -1, -1, 1, 1), [])
+        self.storage.save()
+        self.storage.reload()
+        self.assertEqual(self.storage.lookup_nearest(Place, 0, 0), [])
+
+        self.storage.update_compact_mode(True)
+        try:
+            self.storage.reload()
+            self.assertEqual(self.storage.lookup_nearest(Place, 0, 0), [])
+        finally:
+            self.storage.update_compact_mode(False)
+
+        place = self.storage.get(Place, place.id)
+        place.latitude = 0.0
+        place.longitude = 0.0
+        self.assertEqual(self.storage.lookup_bbox(Place, -1, -1, 1, 1),
+                         [place])
+
+    def test_query_invalid(self):
+        '''Test 'query' raises ValueError with an unknown operator'''
+        with self.assertRaises(ValueError):
+            self.storage.query(Place, [('max_guest', '~', 2)])
+
+
+class TestFileStorageThreads(unittest.TestCase):
+    '''Unit tests for the concurrent use of the storage'''
+
+    def setUp(self):
+        '''Create storage'''
+        self.storage = models.storage
+        self.storage.update_file_path('test_file.json')
+        self.storage.reset()
+
+    def tearDown(self):
+        '''Reset storage'''
+        self.storage.reset()
+
+    def test_read_lock_blocks_writers(self):
+        '''Test objects can't be added while the storage is read'''
+        added = Event()
+        thread = Thread(target=lambda: (User(), added.set()))
+
+        with self.storage.read_lock():
+            thread.start()
+            self.assertFalse(added.wait(0.1))
+            self.assertEqual(self.storage.count(User), 0)
+        thread.join()
+        self.assertEqual(self.storage.count(User), 1)
+
+    def test_concurrent_readers_writers(self):
+        '''Test threads adding, deleting and reading objects'''
+        errors = []
+
+        def write():
+            try:
+                for _ in range(200):
+                    place = Place()
+                    place.city_id = 'c'
+                    place.save()
+                    self.storage.delete(place)
+            except Exception as e:
+                errors.append(e)
+
+        def read():
+            try:
+                for _ in range(200):
+                    objects = self.storage.all()
+                    with self.storage.read_lock():
+                        for v in objects.values():
+                            str(v)
+                    self.storage.lookup(Place, 'city_id', 'c')
+                    self.storage.lookup(Place, 'name', '')
+                    self.storage.count(Place)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [Thread(target=write) for _ in range(3)] + \
+            [Thread(target=read) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(self.storage.count(Place), 0)
+        self.assertEqual(self.storage.lookup(Place, 'city_id', 'c'), {})
+
+    def test_snapshot(self):
+        '''Test a snapshot doesn't see the later changes'''
+        user = User()
+        state = State()
+        snap = self.storage.snapshot()
+        users = self.storage.snapshot(User)
+
+        city = City()
+        self.storage.delete(user)
+
+        self.assertEqual(snap, {'User.{}'.format(user.id): user,
+                                'State.{}'.format(state.id): state})
+        self.assertEqual(users, {'User.{}'.format(user.id): user})
+        self.assertEqual(self.storage.snapshot('City'),
+                         {'City.{}'.format(city.id): city})
+        self.assertEqual(self.storage.snapshot(Review), {})
+
+    def test_snapshot_concurrent_writers(self):
+        '''Test iterating a snapshot while objects are added'''
+        for _ in range(100):
+            Amenity()
+        snap = self.storage.snapshot(Amenity)
+
+        stop = Event()
+
+        def write():
+            while not stop.is_set():
+                self.storage.delete(Amenity())
+
+        thread = Thread(target=write)
+        thread.start()
+        try:
+            for _ in range(20):
+                self.assertEqual(len(list(snap.items())), 100)
+        finally:
+            stop.set()
+            thread.join()
+
+
+class TestFileStorageDurability(unittest.TestCase):
+    '''Unit tests for the atomic save'''
+
+    def setUp(self):
+        '''Create storage'''
+        self.storage = models.storage
+        self.storage.update_file_path('test_file.json')
+        self.storage.reset()
+
+    def tearDown(self):
+        '''Reset storage'''
+        self.storage.update_journal_mode(False)
+        self.storage.update_durability('file')
+        self.storage.reset()
+
+    def test_save_failure(self):
+        '''Test a failing 'save' keeps the previous JSON file'''
+        user = User()
+        user.save()
+        with open('test_file.json', 'r', encoding='utf-8') as f:
+            before = f.read()
+
+        User()
+        with patch.object(User, 'to_dict', side_effect=OSError):
+            with self.assertRaises(OSError):
+                self.storage.save()
+
+        with open('test_file.json', 'r', encoding='utf-8') as f:
+            self.assertEqual(f.read(), before)
+        self.assertFalse(os.path.isfile('test_file.json.dump.tmp'))
+
+    def test_durability_levels(self):
+        '''Test the files are synced according to the durability'''
+        expected = {'none': 0, 'file': 2, 'full': 4}
+        for level, count in expected.items():
+            self.storage.update_durability(level)
+            self.storage.update_journal_mode(False)
+            with patch('models.engine.file_storage.fsync') as fsync:
+                BaseModel().save()
+                self.storage.update_journal_mode(True)
+                BaseModel().save()
+            self.assertEqual(fsync.call_count, count, level)
+            self.storage.reset()
+
+    def test_durability_invalid(self):
+        '''Test an unknown durability'''
+        with self.assertRaises(ValueError):
+            self.storage.update_durability('always')
+
+
+class TestFileStorageGroupCommit(unittest.TestCase):
+    '''Unit tests for the group commit mode'''
+
+    def setUp(self):
+        '''Create storage'''
+        self.storage = models.storage
+        self.storage.update_file_path('test_file.json')
+        self.storage.reset()
+
+    def tearDown(self):
+        '''Reset storage'''
+        self.storage.update_group_commit(0)
+        self.storage.reset()
+
+    def read_file(self):
+        '''Returns the content of the JSON file'''
+        with open('test_file.json', 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def test_max_ops(self):
+        '''Test the saves are written once the maximum is reached'''
+        self.storage.update_group_commit(60, 3)
+        with patch.object(FileStorage, 'persist', autospec=True,
+                          side_effect=FileStorage.persist) as persist:
+            BaseModel().save()
+            BaseModel().save()
+            self.assertEqual(persist.call_count, 0)
+            self.assertEqual(self.read_file(), {})
+
+            BaseModel().save()
+            self.assertEqual(persist.call_count, 1)
+            self.assertEqual(len(self.read_file()), 3)
+
+    def test_window(self):
+        '''Test the saves are written at the end of the window'''
+        self.storage.update_group_commit(0.01)
+        user = User()
+        user.save()
+        user.first_name = 'Betty'
+        user.save()
+        self.storage.save(wait=True)
+
+        data = self.read_file()
+        self.assertEqual(data['User.{}'.format(user.id)]['first_name'],
+                         'Betty')
+
+    def test_window_error(self):
+        '''Test the errors of the commits at the end of the window are
+        raised by the waiting 'save'
+        '''
+        self.storage.update_group_commit(0.01)
+        with patch.object(FileStorage, 'persist', side_effect=OSError), \
+                patch('threading.excepthook'):
+            BaseModel().save()
+            with self.assertRaises(OSError):
+                self.storage.save(wait=True)
+
+        self.storage.save(wait=True)
+        self.assertEqual(len(self.read_file()), 1)
+
+    def test_commit(self):
+        '''Test 'commit' writes the requested saves'''
+        self.storage.update_group_commit(60)
+        state = State()
+        state.save()
+        self.storage.commit()
+
+        self.assertIn('State.{}'.format(state.id), self.read_file())
+
+    def test_disable(self):
+        '''Test disabling the mode writes the requested saves'''
+        self.storage.update_group_commit(60)
+        city = City()
+        city.save()
+        self.storage.update_group_commit(0)
+
+        self.assertIn('City.{}'.format(city.id), self.read_file())
+
+
+class TestFileStorageWriter(unittest.TestCase):
+    '''Unit tests for the background writer'''
+
+    def setUp(self):
+        '''Create storage'''
+        self.storage = models.storage
+        self.storage.update_file_path('test_file.json')
+        self.storage.reset()
+
+    def tearDown(self):
+        '''Reset storage'''
+        self.storage.update_background_writer(False)
+        self.storage.reset()
+
+    def read_file(self):
+        '''Returns the content of the JSON file'''
+        with open('test_file.json', 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def writer(self):
+        '''Returns the background writer thread'''
+        return getattr(self.storage, '_FileStorage__writer')
+
+    def test_flush(self):
+        '''Test 'flush' waits for the writer'''
+        self.storage.update_background_writer(True)
+        user = User()
+        user.save()
+        self.storage.flush()
+
+        self.assertIn('User.{}'.format(user.id), self.read_file())
+
+    def test_save_wait(self):
+        '''Test 'save' waiting for the writer'''
+        self.storage.update_background_writer(True)
+        self.storage.update_journal_mode(True)
+        place = Place()
+        self.storage.save(wait=True)
+        self.storage.update_journal_mode(False)
+
+        with open(self.storage.journal_path(), 'r', encoding='utf-8') as f:
+            self.assertIn(place.id, f.read())
+
+    def test_close(self):
+        '''Test 'close' writes the changes and stops the writer'''
+        self.storage.update_background_writer(True)
+        writer = self.writer()
+        state = State()
+        state.save()
+        self.storage.close()
+
+        self.assertIsNone(self.writer())
+        self.assertFalse(writer.is_alive())
+        self.assertIn('State.{}'.format(state.id), self.read_file())
+
+    def test_backpressure(self):
+        '''Test 'save' blocks while the queue is full'''
+        self.storage.update_background_writer(True, 1)
+        release = Event()
+        with patch.object(FileStorage, 'persist',
+                          side_effect=lambda: release.wait()):
+            self.storage.save()
+            queue = getattr(self.storage, '_FileStorage__write_queue')
+            while not queue.empty():
+                sleep(0.001)
+            self.storage.save()
+
+            blocked = Thread(target=self.storage.save)
+            blocked.start()
+            blocked.join(0.05)
+            self.assertTrue(blocked.is_alive())
+
+            release.set()
+            blocked.join()
+            self.storage.flush()
+
+    def test_error(self):
+        '''Test the writer errors are raised by 'flush' '''
+        self.storage.update_background_writer(True)
+        with patch.object(FileStorage, 'persist', side_effect=OSError):
+            self.storage.save()
+            with self.assertRaises(OSError):
+                self.storage.flush()
+
+    def test_error_waiters(self):
+        '''Test the writer errors are raised to every waiting 'save' '''
+        self.storage.update_background_writer(True)
+        requested = getattr(self.storage, '_FileStorage__requested')
+        release = Event()
+        errors = []
+
+        def fail():
+            release.wait()
+            raise OSError
+
+        def save():
+            try:
+                self.storage.save(wait=True)
+            except OSError as e:
+                errors.append(e)
+
+        with patch.object(FileStorage, 'persist', side_effect=fail):
+            threads = [Thread(target=save) for _ in range(3)]
+            for thread in threads:
+                thread.start()
+            while getattr(self.storage,
+                          '_FileStorage__requested') < requested + 3:
+                sleep(0.001)
+            release.set()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(len(errors), 3)
+
+    def test_error_kept_pending(self):
+        '''Test the changes of a failed write are written by the next
+        'save'
+        '''
+        self.storage.update_background_writer(True)
+        user = User()
+        with patch('models.engine.file_storage.replace',
+                   side_effect=OSError):
+            with self.assertRaises(OSError):
+                self.storage.save(wait=True)
+
+        self.storage.flush()
+        self.assertIn('User.{}'.format(user.id), self.read_file())
+
+    def test_error_journal_kept_pending(self):
+        '''Test the changes of a failed journal append are written by the
+        next 'save'
+        '''
+        self.storage.update_background_writer(True)
+        self.storage.update_journal_mode(True)
+        user = User()
+        try:
+            with patch('models.engine.file_storage.open', create=True,
+                       side_effect=OSError):
+                with self.assertRaises(OSError):
+                    self.storage.save(wait=True)
+
+            self.storage.flush()
+        finally:
+            self.storage.update_journal_mode(False)
+
+        with open(self.storage.journal_path(), 'r', encoding='utf-8') as f:
+            self.assertIn(user.id, f.read())
+
+
+class TestFileStorageJournal(unittest.TestCase):
+    '''Unit tests for the journal mode'''
+
+    def setUp(self):
+        '''Create storage'''
+        self.storage = models.storage
+        self.storage.update_file_path('test_file.json')
+        self.storage.reset()
+        self.storage.update_journal_mode(True)
+
+    def tearDown(self):
+        '''Reset storage'''
+        self.storage.update_journal_mode(False)
+        self.storage.reset()
+
+    def read_journal(self):
+        '''Returns the journal records'''
+        with open(self.storage.journal_path(), 'r', encoding='utf-8') as f:
+            return [json.loads(line) for line in f]
+
+    def test_save_appends(self):
+        '''Test 'save' appends only the changed objects'''
+        bm_1 = BaseModel()
+        bm_1.save()
+        bm_2 = BaseModel()
+        bm_2.save()
+
+        records = self.read_journal()
+        self.assertEqual(len(records), 2)
+        self.assertEqual(records[1]['key'], 'BaseModel.{}'.format(bm_2.id))
+        self.assertEqual(records[1]['obj'], bm_2.to_dict())
+
+    def test_save_without_changes(self):
+        '''Test 'save' doesn't write anything without changes'''
+        self.storage.save()
+        self.assertFalse(os.path.isfile(self.storage.journal_path()))
+
+    def test_save_failure(self):
+        '''Test the changes of a failing append are written by the next
+        'save'
+        '''
+        user = User()
+        with patch('models.engine.file_storage.open', create=True,
+                   side_effect=OSError):
+            with self.assertRaises(OSError):
+                self.storage.save()
+
+        state = State()
+        self.storage.save()
+
+        keys = [v['key'] for v in self.read_journal()]
+        self.assertIn('User.{}'.format(user.id), keys)
+        self.assertIn('State.{}'.format(state.id), keys)
+
+    def test_delete(self):
+        '''Test 'delete' is journaled'''
+        user = User()
+        user.save()
+        self.storage.delete(user)
+        self.storage.save()
+
+        key = 'User.{}'.format(user.id)
+        self.assertNotIn(key, self.storage.all())
+        self.assertEqual(self.read_journal()[-1], {'key': key, 'obj': None})
+
+    def test_reload(self):
+        '''Test 'reload' replays the journal on top of the JSON file'''
+        kept = State()
+        kept.save()
+        deleted = State()
+        deleted.save()
+        kept.name = 'Texas'
+        kept.save()
+        self.storage.delete(deleted)
+        self.storage.save()
+
+        storage = FileStorage()
+        storage.update_file_path('test_file.json')
+        storage.reload()
+
+        objects = storage.all()
+        self.assertNotIn('State.{}'.format(deleted.id), objects)
+        self.assertEqual(objects['State.{}'.format(kept.id)].name, 'Texas')
+
+    def test_reload_torn_record(self):
+        '''Test 'reload' ignores a partially written record'''
+        city = City()
+        city.save()
+        with open(self.storage.journal_path(), 'a', encoding='utf-8') as f:
+            f.write('{"key": "City.1", "obj"')
+
+        self.storage.reload()
+        self.assertIn('City.{}'.format(city.id), self.storage.all())
+        self.assertNotIn('City.1', self.storage.all())
+
+    def test_dump_drops_journal(self):
+        '''Test 'dump' folds the journal into the JSON file'''
+        place = Place()
+        place.save()
+        self.storage.dump()
+
+        self.assertFalse(os.path.isfile(self.storage.journal_path()))
+        with open('test_file.json', 'r', encoding='utf-8') as f:
+            self.assertIn('Place.{}'.format(place.id), json.load(f))
+
+
+class TestFileStorageCompaction(unittest.TestCase):
+    '''Unit tests for the journal compaction'''
+
+    def setUp(self):
+        '''Create storage'''
+        self.storage = models.storage
+        self.storage.update_file_path('test_file.json')
+        self.storage.reset()
+        self.storage.update_journal_mode(True)
+
+    def tearDown(self):
+        '''Reset storage'''
+        self.storage.update_journal_mode(False)
+        self.storage.update_compaction(1024 * 1024, 1.0)
+        self.storage.reset()
+
+    def read_file(self):
+        '''Returns the content of the JSON file'''
+        with open('test_file.json', 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def test_compact(self):
+        '''Test 'compact' folds the journal into the JSON file'''
+        user = User()
+        user.save()
+        review = Review()
+        review.save()
+        self.storage.delete(review)
+        self.storage.save()
+
+        self.storage.compact(wait=True)
+
+        self.assertFalse(os.path.isfile(self.storage.journal_path()))
+        self.assertFalse(os.path.isfile(self.storage.compacting_path()))
+        data = self.read_file()
+        self.assertIn('User.{}'.format(user.id), data)
+        self.assertNotIn('Review.{}'.format(review.id), data)
+
+    def test_compact_without_journal(self):
+        '''Test 'compact' without journal does nothing'''
+        self.storage.compact(wait=True)
+        self.assertEqual(self.read_file(), {})
+
+    def test_compact_interrupted(self):
+        '''Test 'reload' replays a journal left by an interrupted compaction'''
+        amenity = Amenity()
+        amenity.save()
+        os.replace(self.storage.journal_path(),
+                   self.storage.compacting_path())
+        state = State()
+        state.save()
+
+        self.storage.reload()
+        self.assertIn('Amenity.{}'.format(amenity.id), self.storage.all())
+
+        self.storage.compact(wait=True)
+        data = self.read_file()
+        self.assertIn('Amenity.{}'.format(amenity.id), data)
+        self.assertIn('State.{}'.format(state.id), data)
+
+    def test_automatic_compaction(self):
+        '''Test the journal is compacted once over the thresholds'''
+        self.storage.update_compaction(0, 0)
+        city = City()
+        city.save()
+        self.storage.compact(wait=True)
+
+        self.assertFalse(os.path.isfile(self.storage.journal_path()))
+        self.assertIn('City.{}'.format(city.id), self.read_file())
+
+
+class TestFileStorageLazy(unittest.TestCase):
+    '''Unit tests for the lazy mode'''
+
+    def setUp(self):
+        '''Create a saved storage'''
+        models.storage.update_file_path('test_file.json')
+        models.storage.reset()
+        self.user_1 = User()
+        self.user_2 = User()
+        self.state = State()
+        self.state.name = 'Texas'
+        models.storage.save()
+
+        self.storage = FileStorage()
+        self.storage.update_file_path('test_file.json')
+        self.storage.update_lazy_mode(True)
+
+    def tearDown(self):
+        '''Reset storage'''
+        self.storage.close_lazy_file()
+        models.storage.reset()
+
+    def loaded(self):
+        '''Returns the keys of the created objects'''
+        return set(getattr(self.storage, '_FileStorage__objects'))
+
+    def test_reload(self):
+        '''Test 'reload' doesn't create any object'''
+        self.storage.reload()
+
+        self.assertEqual(self.loaded(), set())
+        self.assertEqual(self.storage.count(), 3)
+        self.assertEqual(self.storage.count(User), 2)
+        self.assertEqual(self.storage.count('State'), 1)
+
+    def test_all_class(self):
+        '''Test 'all' with a class only creates the objects of the class'''
+        self.storage.reload()
+
+        users = self.storage.all(User)
+        self.assertEqual(set(users), {'User.{}'.format(self.user_1.id),
+                                      'User.{}'.format(self.user_2.id)})
+        self.assertEqual(self.loaded(), set(users))
+        self.assertEqual(self.storage.count(), 3)
+
+    def test_all(self):
+        '''Test 'all' creates every object'''
+        self.storage.reload()
+
+        objects = self.storage.all()
+        self.assertEqual(len(objects), 3)
+        state = objects['State.{}'.format(self.state.id)]
+        self.assertEqual(state.to_dict(), self.state.to_dict())
+
+    def test_get_exists(self):
+        '''Test 'get' only creates the object, 'exists' creates none'''
+        self.storage.reload()
+
+        self.assertTrue(self.storage.exists(User, self.user_1.id))
+        self.assertFalse(self.storage.exists(State, self.user_1.id))
+        self.assertEqual(self.loaded(), set())
+
+        user = self.storage.get(User, self.user_1.id)
+        self.assertEqual(user.to_dict(), self.user_1.to_dict())
+        self.assertEqual(self.loaded(), {'User.{}'.format(self.user_1.id)})
+        self.assertIs(self.storage.get(User, self.user_1.id), user)
+        self.assertTrue(self.storage.exists(User, self.user_1.id))
+        self.assertIsNone(self.storage.get(User, self.state.id))
+
+    def test_journal(self):
+        '''Test 'reload' applies the journal'''
+        models.storage.update_journal_mode(True)
+        self.state.name = 'Nevada'
+        models.storage.save()
+        models.storage.delete(self.user_1)
+        models.storage.save()
+        models.storage.update_journal_mode(False)
+
+        self.storage.reload()
+        self.assertEqual(self.loaded(), {'State.{}'.format(self.state.id)})
+        self.assertEqual(self.storage.count(User), 1)
+        self.assertEqual(self.storage.count(), 2)
+
+        state = self.storage.all(State)['State.{}'.format(self.state.id)]
+        self.assertEqual(state.name, 'Nevada')
+
+    def test_not_indexable(self):
+        '''Test 'reload' creates every object if the file can't be indexed'''
+        with open('test_file.json', 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        with open('test_file.json', 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+
+        self.storage.reload()
+        self.assertEqual(len(self.loaded()), 3)
+
+    def test_dump(self):
+        '''Test 'dump' keeps the objects not created yet'''
+        self.storage.reload()
+        self.storage.all(User)
+        self.storage.dump()
+
+        with open('test_file.json', 'r', encoding='utf-8') as f:
+            self.assertEqual(len(json.load(f)), 3)
+
+
+class TestFileStorageBinary(unittest.TestCase):
+    '''Unit tests for the binary format'''
+
+    def setUp(self):
+        '''Create storage'''
+        self.storage = models.storage
+        self.storage.update_file_path('test_file.json')
+        self.storage.update_serializer('binary')
+        self.storage.reset()
+
+    def tearDown(self):
+        '''Reset storage'''
+        self.storage.update_journal_mode(False)
+        self.storage.update_serializer('json')
+        self.storage.reset()
+
+    def fresh_storage(self):
+        '''Returns an empty storage using the same file'''
+        storage = FileStorage()
+        storage.update_file_path('test_file.json')
+        storage.update_serializer('binary')
+        return storage
+
+    def test_save_reload(self):
+        '''Test 'save' and 'reload' in binary format'''
+        place = Place()
+        place.number_rooms = 3
+        place.amenity_ids = ['1', '2']
+        place.save()
+
+        with open('test_file.json', 'rb') as f:
+            self.assertTrue(f.read().startswith(b'HBNB'))
+
+        storage = self.fresh_storage()
+        storage.reload()
+        loaded = storage.all()['Place.{}'.format(place.id)]
+        self.assertEqual(loaded.to_dict(), place.to_dict())
+
+    def test_lazy(self):
+        '''Test the lazy mode in binary format'''
+        user = User()
+        user.first_name = 'Betty'
+        State().save()
+
+        storage = self.fresh_storage()
+        storage.update_lazy_mode(True)
+        storage.reload()
+        self.assertEqual(storage.count(), 2)
+
+        loaded = storage.all(User)['User.{}'.format(user.id)]
+        self.assertEqual(loaded.first_name, 'Betty')
+        storage.close_lazy_file()
+
+    def test_journal(self):
+        '''Test the journal compaction in binary format'''
+        self.storage.update_journal_mode(True)
+        city = City()
+        city.save()
+        city.name = 'Austin'
+        city.save()
+        self.storage.compact(wait=True)
+
+        storage = self.fresh_storage()
+        storage.reload()
+        self.assertEqual(storage.all()['City.{}'.format(city.id)].name,
+                         'Austin')
+
+
+class TestFileStorageParallelReload(unittest.TestCase):
+    '''Unit tests for the parallel reload'''
+
+    def setUp(self):
+        '''Create storage'''
+        self.storage = models.storage
+        self.storage.update_file_path('test_file.json')
+        self.storage.reset()
+
+    def tearDown(self):
+        '''Reset storage'''
+        self.storage.update_journal_mode(False)
+        self.storage.update_serializer('json')
+        self.storage.reset()
+
+    def fresh_storage(self):
+        '''Returns an empty storage reloading with 2 processes'''
+        storage = FileStorage()
+        storage.update_file_path('test_file.json')
+        storage.update_parallel_reload(2, 3)
+        return storage
+
+    def test_reload(self):
+        '''Test the objects are created in chunks'''
+        objs = [User() for _ in range(10)]
+        objs[3].first_name = 'Betty'
+        self.storage.save()
+
+        storage = self.fresh_storage()
+        chunks = []
+        load_chunks = FileStorage.load_chunks
+        with patch.object(FileStorage, 'load_chunks', autospec=True,
+                          side_effect=lambda *args: chunks.append(
+                              load_chunks(*args)) or chunks[-1]):
+            storage.reload()
+        self.assertEqual(len(chunks[0]), 10)
+
+        self.assertEqual(storage.count(), 10)
+        loaded = storage.all()['User.{}'.format(objs[3].id)]
+        self.assertEqual(loaded.to_dict(), objs[3].to_dict())
+
+    def test_reload_journal(self):
+        '''Test the journal changes are applied over the chunks'''
+        city = City()
+        state = State()
+        self.storage.save()
+
+        self.storage.update_journal_mode(True)
+        city.name = 'Austin'
+        city.save()
+        self.storage.delete(state)
+        self.storage.save()
+
+        storage = self.fresh_storage()
+        storage.reload()
+        self.assertEqual(list(storage.all()), ['City.{}'.format(city.id)])
+        self.assertEqual(storage.all()['City.{}'.format(city.id)].name,
+                         'Austin')
+
+    def import_models(self, env, setup='', count=50):
+        '''Returns the number of objects of 'models.storage' imported in
+        a new process, in a directory whose JSON file has count users,
+        and the number of processes forked by the import
+
+        Args:
+            env (dict): the environment variables set.
+            setup (str): code run before the import.
+            count (int): number of users.
+        '''
+        root = os.path.dirname(os.path.dirname(
+            os.path.abspath(models.__file__)))
+        with TemporaryDirectory() as tmp:
+            storage = FileStorage()
+            storage.update_file_path(os.path.join(tmp, 'file.json'))
+            for i in range(count):
+                storage.new(User.from_dict({'id': str(i)}))
+            storage.save()
+            if 'HBNB_STORAGE_SHARDS' in env:
+                storage.update_shards(int(env['HBNB_STORAGE_SHARDS']))
+                storage.save()
+
+            code = setup + 'import multiprocessing.context as context\n' + \
+                'forked = []\n' + \
+                'start = context.ForkProcess.start\n' + \
+                'context.ForkProcess.start = \\\n' + \
+                '    lambda self: forked.append(self) or start(self)\n' + \
+                'from models import storage\n' + \
+                'print(storage.count(), len(forked))'
+            res = subprocess.run(
+                [sys.executable, '-c', code], cwd=tmp, timeout=60,
+                capture_output=True, text=True,
+                env={**os.environ, 'PYTHONPATH': root, **env})
+        self.assertEqual(res.returncode, 0, res.stderr)
+        return tuple(int(v) for v in res.stdout.split())
+
+    def test_import(self):
+        '''Test importing 'models' reloads with the reload workers'''
+        res = self.import_models({'HBNB_STORAGE_RELOAD_WORKERS': '2'},
+                                 count=20001)
+        self.assertEqual(res, (20001, 2))
+
+    def test_import_spawn(self):
+        '''Test the reload workers are forked with another default start
+        method
+        '''
+        res = self.import_models(
+            {'HBNB_STORAGE_RELOAD_WORKERS': '2'},
+            'import multiprocessing\n'
+            'multiprocessing.set_start_method("spawn")\n', 20001)
+        self.assertEqual(res, (20001, 2))
+
+    def test_import_shards(self):
+        '''Test importing 'models' in sharded mode with several CPUs'''
+        res = self.import_models({'HBNB_STORAGE_SHARDS': '4'},
+                                 'import os\nos.cpu_count = lambda: 4\n')
+        self.assertEqual(res, (50, 4))
+
+    def test_reload_binary(self):
+        '''Test the parallel reload in binary format'''
+        self.storage.update_serializer('binary')
+        places = [Place() for _ in range(7)]
+        self.storage.save()
+
+        storage = self.fresh_storage()
+        storage.update_serializer('binary')
+        storage.reload()
+        self.assertEqual(set(storage.all()),
+                         {'Place.{}'.format(p.id) for p in places})
+
+
+class TestFileStorageShards(unittest.TestCase):
+    '''Unit tests for the sharded mode'''
+
+    def setUp(self):
+        '''Create storage'''
+        self.storage = models.storage
+        self.storage.update_file_path('test_file.json')
+        self.storage.update_shards(4, 2)
+        self.storage.reset()
+
+    def tearDown(self):
+        '''Reset storage'''
+        for i in range(4):
+            os.remove(self.storage.shard_path(i))
+        self.storage.update_shards(0)
+        self.storage.reset()
+
+    def fresh_storage(self):
+        '''Returns an empty storage using the same shards'''
+        storage = FileStorage()
+        storage.update_file_path('test_file.json')
+        storage.update_shards(4, 2)
+        return storage
+
+    def read_shard(self, i):
+        '''Returns the content of a shard file'''
+        with open(self.storage.shard_path(i), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def test_save(self):
+        '''Test the objects are saved in the shard of their key'''
+        objs = [User() for _ in range(20)]
+        self.storage.save()
+
+        for obj in objs:
+            k = 'User.{}'.format(obj.id)
+            self.assertIn(k, self.read_shard(self.storage.shard(k)))
+        self.assertEqual(sum(len(self.read_shard(i)) for i in range(4)), 20)
+
+    def test_save_changed_shards(self):
+        '''Test 'save' only rewrites the changed shards'''
+        place = Place()
+        for _ in range(20):
+            City()
+        self.storage.save()
+
+        place.name = 'Loft'
+        with patch.object(FileStorage, 'write_file', autospec=True,
+                          side_effect=FileStorage.write_file) as write_file:
+            self.storage.save()
+        shard = self.storage.shard('Place.{}'.format(place.id))
+        self.assertEqual(write_file.call_count, 1)
+        self.assertEqual(write_file.call_args[0][1],
+                         self.storage.shard_path(shard) + '.tmp')
+
+    def test_save_failure(self):
+        '''Test the shards of a failing 'save' are written by the next one
+        '''
+        place = Place()
+        self.storage.save()
+
+        place.name = 'Loft'
+        with patch('models.engine.file_storage.replace',
+                   side_effect=OSError):
+            with self.assertRaises(OSError):
+                self.storage.save()
+        self.storage.save()
+
+        storage = self.fresh_storage()
+        storage.reload()
+        loaded = storage.all()['Place.{}'.format(place.id)]
+        self.assertEqual(loaded.name, 'Loft')
+
+    def test_reload(self):
+        '''Test the shards are read by the reload processes'''
+        objs = [Place() for _ in range(10)] + [Review() for _ in range(10)]
+        objs[0].name = 'Loft'
+        self.storage.save()
+
+        storage = self.fresh_storage()
+        storage.reload()
+        self.assertEqual(storage.count(), 20)
+        self.assertEqual(storage.count(Review), 10)
+        loaded = storage.all()['Place.{}'.format(objs[0].id)]
+        self.assertEqual(loaded.to_dict(), objs[0].to_dict())
+
+    def test_reload_invalid_shard(self):
+        '''Test the valid shards are read and the invalid one is kept'''
+        objs = [User() for _ in range(40)]
+        self.storage.save()
+        with open(self.storage.shard_path(0), 'w', encoding='utf-8') as f:
+            f.write('{garbage')
+
+        storage = self.fresh_storage()
+        storage.reload()
+        self.assertEqual(set(storage.all()), {
+            'User.{}'.format(obj.id) for obj in objs
+            if self.storage.shard('User.{}'.format(obj.id)) != 0})
+
+        users = {}
+        for i in range(20):
+            users[storage.shard('User.{}'.format(i)) == 0] = \
+                User.from_dict({'id': str(i)})
+        storage.new(users[False])
+        storage.save()
+        storage.new(users[True])
+        with self.assertRaises(ValueError):
+            storage.save()
+
+        with open(self.storage.shard_path(0), 'r', encoding='utf-8') as f:
+            self.assertEqual(f.read(), '{garbage')
+        storage = self.fresh_storage()
+        storage.reload()
+        self.assertIn('User.{}'.format(users[False].id), storage.all())
+
+    def test_reload_single_file(self):
+        '''Test the JSON file is read when there is no shard yet'''
+        self.storage.update_shards(0)
+        state = State()
+        state.save()
+        self.storage.update_shards(4, 2)
+
+        storage = self.fresh_storage()
+        for i in range(4):
+            os.remove(storage.shard_path(i))
+        storage.reload()
+        self.assertIn('State.{}'.format(state.id), storage.all())
+
+        storage.save()
+        self.assertEqual(sum(len(self.read_shard(i)) for i in range(4)), 1)
+
+
+class TestFileStorageMmap(unittest.TestCase):
+    '''Unit tests for the read-only mmap mode'''
+
+    def setUp(self):
+        '''Write an indexed file of a saved storage'''
+        models.storage.update_file_path('test_file.json')
+        models.storage.reset()
+        self.user = User()
+        self.user.first_name = 'Betty'
+        self.place = Place()
+        self.place.city_id = 'c1'
+        self.other = Place()
+        models.storage.write_mapped_file('test_file.map')
+
+        self.storage = FileStorage()
+        self.storage.update_file_path('test_file.map')
+        self.storage.update_mmap_mode(True)
+        self.storage.reload()
+
+    def tearDown(self):
+        '''Reset storage'''
+        self.storage.update_mmap_mode(False)
+        os.remove('test_file.map')
+        models.storage.reset()
+
+    def test_all(self):
+        '''Test 'all' decodes the objects from the mapped file'''
+        objs = self.storage.all()
+        self.assertEqual(set(objs), set(models.storage.all()))
+        k = 'User.{}'.format(self.user.id)
+        self.assertIsInstance(objs[k], User)
+        self.assertEqual(objs[k].to_dict(), self.user.to_dict())
+        self.assertEqual(getattr(self.storage, '_FileStorage__objects'), {})
+
+    def test_all_class(self):
+        '''Test 'all' and 'count' with a class'''
+        places = self.storage.all(Place)
+        self.assertEqual(set(places), {'Place.{}'.format(self.place.id),
+                                       'Place.{}'.format(self.other.id)})
+        self.assertEqual(self.storage.count(), 3)
+        self.assertEqual(self.storage.count('Place'), 2)
+        self.assertEqual(self.storage.count(State), 0)
+        self.assertEqual(dict(self.storage.snapshot(User)).keys(),
+                         {'User.{}'.format(self.user.id)})
+
+    def test_lookup_range(self):
+        '''Test 'lookup_range' sorts the mapped objects'''
+        self.place.price_by_night = 50
+        models.storage.write_mapped_file('test_file.map')
+        self.storage.reload()
+        res = self.storage.lookup_range(Place, 'price_by_night', 10)
+        self.assertEqual([v.id for v in res], [self.place.id])
+
+    def test_lookup_bbox_nearest(self):
+        '''Test 'lookup_bbox' and 'lookup_nearest' on the mapped objects'''
+        self.place.latitude = 37.77
+        self.place.longitude = -122.41
+        models.storage.write_mapped_file('test_file.map')
+        self.storage.reload()
+        res = self.storage.lookup_bbox(Place, 37, -123, 38, -122)
+        self.assertEqual([v.id for v in res], [self.place.id])
+        res = self.storage.lookup_nearest(Place, 37.7, -122.4)
+        self.assertEqual(res[0][1].id, self.place.id)
+
+    def test_get_exists(self):
+        '''Test 'get' and 'exists' use the index of the mapped file'''
+        place = self.storage.get(Place, self.place.id)
+        self.assertEqual(place.to_dict(), self.place.to_dict())
+        self.assertIsNone(self.storage.get(User, self.place.id))
+        self.assertTrue(self.storage.exists('User', self.user.id))
+        self.assertFalse(self.storage.exists(Place, self.user.id))
+
+    def test_lookup(self):
+        '''Test 'lookup' scans the mapped objects'''
+        res = self.storage.lookup(Place, 'city_id', 'c1')
+        self.assertEqual(set(res), {'Place.{}'.format(self.place.id)})
+
+    def test_read_only(self):
+        '''Test the changes raise PermissionError'''
+        obj = self.storage.all()['User.{}'.format(self.user.id)]
+        with self.assertRaises(PermissionError):
+            self.storage.new(obj)
+        with self.assertRaises(PermissionError):
+            self.storage.delete(obj)
+        with self.assertRaises(PermissionError):
+            self.storage.save()
+
+    def test_reload_close(self):
+        '''Test 'reload' and 'reset' close the file mapped before'''
+        mapped = getattr(self.storage, '_FileStorage__mapped')
+        self.storage.reload()
+        self.assertTrue(mapped.map.closed)
+        self.assertTrue(mapped.file.closed)
+
+        mapped = getattr(self.storage, '_FileStorage__mapped')
+        self.storage.reset()
+        self.assertTrue(mapped.map.closed)
+        self.assertIsNone(getattr(self.storage, '_FileStorage__mapped'))
+
+    def test_reload_invalid(self):
+        '''Test 'reload' of a file which is not an indexed file'''
+        mapped = getattr(self.storage, '_FileStorage__mapped')
+        self.storage.update_file_path('test_file.json')
+        with self.assertRaisesRegex(ValueError, 'test_file.json'):
+            self.storage.reload()
+        self.assertIs(getattr(self.storage, '_FileStorage__mapped'), mapped)
+        self.assertEqual(self.storage.count(), 3)
+
+    def test_import(self):
+        '''Test importing 'models' in mmap mode'''
+        root = os.path.dirname(os.path.dirname(
+            os.path.abspath(models.__file__)))
+        code = 'from models import storage\nprint(storage.count())'
+        with TemporaryDirectory() as tmp:
+            models.storage.save()
+            models.storage.write_mapped_file(os.path.join(tmp, 'file.map'))
+            with open('test_file.json', 'r', encoding='utf-8') as src:
+                with open(os.path.join(tmp, 'file.json'), 'w',
+                          encoding='utf-8') as dst:
+                    dst.write(src.read())
+
+            results = [subprocess.run(
+                [sys.executable, '-c', code], cwd=tmp, timeout=60,
+                capture_output=True, text=True,
+                env={**os.environ, 'PYTHONPATH': root,
+                     'HBNB_STORAGE_MMAP': '1', **env})
+                for env in ({'HBNB_STORAGE_MMAP_PATH': 'file.map'}, {})]
+
+        self.assertEqual(results[0].returncode, 0, results[0].stderr)
+        self.assertEqual(int(results[0].stdout), 3)
+        self.assertEqual(results[1].returncode, 1)
+        self.assertIn('file.json is not an indexed storage file',
+                      results[1].stderr)
+        self.assertNotIn('Traceback', results[1].stderr)
+
+    def test_shared(self):
+        '''Test the storages mapping the file decode the same objects'''
+        storage = FileStorage()
+        storage.update_file_path('test_file.map')
+        storage.update_mmap_mode(True)
+        storage.reload()
+        try:
+            k = 'Place.{}'.format(self.place.id)
+            self.assertEqual(storage.all()[k].to_dict(),
+                             self.storage.all()[k].to_dict())
+        finally:
+            storage.update_mmap_mode(False)
+
+
 if __name__ == '__main__':
     unittest.main()
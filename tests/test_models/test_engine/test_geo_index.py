@@ -0,0 +1,110 @@
+#!/usr/bin/python3
+'''Unit tests for geo_index module'''
+import unittest
+from random import Random
+from models.engine.geo_index import GeoIndex, distance, is_position
+
+
+class TestGeoIndex(unittest.TestCase):
+    '''Unit tests for 'GeoIndex' class'''
+
+    def setUp(self):
+        '''Create an index'''
+        self.index = GeoIndex([('sf', 37.77, -122.41),
+                               ('oakland', 37.80, -122.27),
+                               ('ny', 40.71, -74.0),
+                               ('fiji', -17.7, 178.0),
+                               ('samoa', -13.8, -172.1),
+                               ('nowhere', 'x', 0), ('pole', 91, 0)])
+
+    def test_is_position(self):
+        '''Test the valid positions'''
+        for lat, lon in ((0, 0), (-90, 180), (90, -180), (1.5, 2)):
+            self.assertTrue(is_position(lat, lon))
+        for lat, lon in ((91, 0), (0, 181), ('1', 0), (None, 0),
+                         (True, 0)):
+            self.assertFalse(is_position(lat, lon))
+
+    def test_distance(self):
+        '''Test the great-circle distance'''
+        self.assertAlmostEqual(distance(0, 0, 0, 1), 111.195, 3)
+        self.assertAlmostEqual(distance(90, 0, 90, 120), 0)
+        self.assertAlmostEqual(distance(0, 179.5, 0, -179.5),
+                               distance(0, 0, 0, 1))
+
+    def test_bbox(self):
+        '''Test the keys in a bounding box, edges included'''
+        self.assertEqual(len(self.index), 5)
+        self.assertEqual(sorted(self.index.bbox(37, -123, 38, -122.27)),
+                         ['oakland', 'sf'])
+        self.assertEqual(self.index.bbox(37, -122, 38, 0), [])
+        self.assertEqual(self.index.bbox(38, -123, 37, -122), [])
+        self.assertEqual(sorted(self.index.bbox(-90, -180, 90, 180)),
+                         ['fiji', 'ny', 'oakland', 'samoa', 'sf'])
+
+    def test_bbox_antimeridian(self):
+        '''Test a bounding box crossing the antimeridian'''
+        self.assertEqual(sorted(self.index.bbox(-20, 170, -10, -170)),
+                         ['fiji', 'samoa'])
+
+    def test_nearest(self):
+        '''Test the nearest keys and their distance'''
+        res = self.index.nearest(37.78, -122.40, 2)
+        self.assertEqual([k for _, k in res], ['sf', 'oakland'])
+        self.assertAlmostEqual(res[0][0], distance(37.78, -122.40,
+                                                   37.77, -122.41))
+        self.assertEqual(self.index.nearest(37.78, -122.40, 2, 5)[0][1],
+                         'sf')
+        self.assertEqual(len(self.index.nearest(37.78, -122.40, 2, 5)), 1)
+        self.assertEqual([k for _, k in self.index.nearest(-15, 179, 2)],
+                         ['fiji', 'samoa'])
+        self.assertEqual(len(self.index.nearest(0, 0, 10)), 5)
+        self.assertEqual(self.index.nearest(0, 0, 0), [])
+        with self.assertRaises(ValueError):
+            self.index.nearest(0, 200)
+
+    def test_add_remove(self):
+        '''Test moving and removing keys'''
+        self.index.add('sf', 40.7, -74.1)
+        self.index.add('fiji', None, None)
+        self.index.remove('samoa')
+        self.index.remove('unknown')
+        self.assertEqual(sorted(self.index.bbox(40, -75, 41, -73)),
+                         ['ny', 'sf'])
+        self.assertEqual(len(self.index), 3)
+        self.assertEqual(sum(len(v) for v in self.index.cells.values()), 3)
+
+    def test_random(self):
+        '''Test the index against a linear scan'''
+        rand = Random(0)
+        for cell in (0.3, 7, 100):
+            positions = {}
+            for i in range(300):
+                if rand.random() < 0.2:
+                    lat = rand.choice((-90, 90, 0, 89.9))
+                    lon = rand.choice((-180, 180, 179.9, -179.9))
+                else:
+                    lat, lon = rand.uniform(-90, 90), rand.uniform(-180, 180)
+                positions[str(i)] = (lat, lon)
+            index = GeoIndex(((k, *v) for k, v in positions.items()), cell)
+
+            for _ in range(20):
+                lat, lon = rand.uniform(-90, 90), rand.uniform(-180, 180)
+                expected = sorted((distance(lat, lon, *v), k)
+                                  for k, v in positions.items())
+                res = index.nearest(lat, lon, 5)
+                self.assertEqual([round(d, 6) for d, _ in res],
+                                 [round(d, 6) for d, _ in expected[:5]])
+
+                south, north = sorted(rand.uniform(-90, 90) for _ in 'sn')
+                west, east = (rand.uniform(-180, 180) for _ in 'we')
+                expected = {k for k, (lat, lon) in positions.items()
+                            if south <= lat <= north and
+                            (west <= lon <= east if west <= east else
+                             not east < lon < west)}
+                self.assertEqual(set(index.bbox(south, west, north, east)),
+                                 expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+#!/usr/bin/python3
+'''Unit tests for json stream module'''
+import unittest
+import json
+from io import BytesIO, StringIO
+from models.engine.json_stream import iter_items, iter_lines, write_items
+
+
+class TestIterItems(unittest.TestCase):
+    '''Unit tests for 'iter_items' function'''
+
+    data = {'BaseModel.1': {'id': '1', 'number': 98, 'ratio': 1.5,
+                            'names': ['a', 'b'], 'none': None,
+                            'text': 'a, "b": {c}'},
+            'User.2': {'id': '2', 'nested': {'a': {'b': []}}},
+            'count': 12345}
+
+    def items(self, text, chunk_size=64 * 1024):
+        '''Returns the items read from text'''
+        return list(iter_items(StringIO(text), chunk_size))
+
+    def test_empty(self):
+        '''Test an empty object'''
+        self.assertEqual(self.items('{}'), [])
+        self.assertEqual(self.items(' \n{ \n} '), [])
+
+    def test_items(self):
+        '''Test an object with members'''
+        text = json.dumps(self.data)
+        self.assertEqual(self.items(text), list(self.data.items()))
+
+    def test_small_chunks(self):
+        '''Test members spanning several chunks'''
+        for indent in (None, 2):
+            text = json.dumps(self.data, indent=indent)
+            for chunk_size in (1, 2, 3, 7):
+                self.assertEqual(self.items(text, chunk_size),
+                                 list(self.data.items()))
+
+    def test_lazy(self):
+        '''Test members are yielded before the end is read'''
+        items = iter_items(StringIO('{"a": 1, "b": '), 1)
+        self.assertEqual(next(items), ('a', 1))
+        with self.assertRaises(json.JSONDecodeError):
+            next(items)
+
+    def test_invalid(self):
+        '''Test invalid JSON'''
+        for text in ('', '[]', '{"a" 1}', '{"a": 1', '{1: 1}',
+                     '{"a": 1 "b": 2}', '{"a": }'):
+            with self.assertRaises(json.JSONDecodeError):
+                self.items(text, 2)
+
+
+class TestWriteItems(unittest.TestCase):
+    '''Unit tests for 'write_items' and 'iter_lines' functions'''
+
+    def write(self, items):
+        '''Returns the text written for items'''
+        f = StringIO()
+        write_items(f, ((k, json.dumps(v)) for k, v in items))
+        return f.getvalue()
+
+    def test_write(self):
+        '''Test the written text is the JSON object'''
+        items = [('User.1', {'id': '1'}), ('State.2', {'name': 'a\nb'})]
+        text = self.write(items)
+
+        self.assertEqual(json.loads(text), dict(items))
+        self.assertEqual(len(text.splitlines()), 4)
+        self.assertEqual(json.loads(self.write([])), {})
+
+    def test_iter_lines(self):
+        '''Test the offsets of the values'''
+        items = [('User.1', {'id': '1'}), ('State.é', {'name': 'é'}),
+                 ('a"b', [1, 2])]
+        data = self.write(items).encode('utf-8')
+
+        res = []
+        for k, offset, length in iter_lines(BytesIO(data)):
+            res.append((k, json.loads(data[offset:offset + length])))
+        self.assertEqual(res, items)
+        self.assertEqual(list(iter_lines(BytesIO(b'{\n\n}\n'))), [])
+
+    def test_iter_lines_invalid(self):
+        '''Test files without one member per line'''
+        for data in (b'', b'{"a": 1}', b'{\n"a": 1,\n', b'{\n1: 1\n}'):
+            with self.assertRaises(ValueError):
+                list(iter_lines(BytesIO(data)))
+
+
+if __name__ == '__main__':
+    unittest.main()
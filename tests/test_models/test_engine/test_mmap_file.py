@@ -0,0 +1,107 @@
+#!/usr/bin/python3
+'''Unit tests for mmap_file module'''
+import unittest
+import json
+import os
+from models.engine.mmap_file import MappedFile, MappedObjects, convert, \
+    write_file
+
+
+class TestMappedFile(unittest.TestCase):
+    '''Unit tests for the indexed files'''
+
+    def setUp(self):
+        '''Write an indexed file'''
+        self.items = {
+            'User.2': {'__class__': 'User', 'id': '2', 'email': 'a@b.c'},
+            'Place.1': {'__class__': 'Place', 'id': '1', 'name': 'é',
+                        'number_rooms': 3, 'latitude': 1.5,
+                        'amenity_ids': ['a']},
+            'User.1': {'__class__': 'User', 'id': '1', 'first_name': None},
+            'State.1': {'__class__': 'State', 'id': '1', 'name': 'Texas'}}
+        write_file('test_file.map', self.items.items())
+        self.mapped = MappedFile('test_file.map')
+
+    def tearDown(self):
+        '''Remove the indexed file'''
+        self.mapped.close()
+        os.remove('test_file.map')
+
+    def test_keys_sorted(self):
+        '''Test the records are indexed in key order'''
+        self.assertEqual(self.mapped.count, 4)
+        self.assertEqual([self.mapped.key(i) for i in range(4)],
+                         [b'Place.1', b'State.1', b'User.1', b'User.2'])
+
+    def test_record(self):
+        '''Test the records are decoded from the mapping'''
+        for i in range(4):
+            k, v = self.mapped.record(i)
+            self.assertEqual(v, self.items[k])
+
+    def test_find(self):
+        '''Test 'find' returns the record of a key'''
+        self.assertEqual(self.mapped.record(self.mapped.find('User.1'))[0],
+                         'User.1')
+        self.assertEqual(self.mapped.find('User.3'), -1)
+        self.assertEqual(self.mapped.find('A.1'), -1)
+        self.assertEqual(self.mapped.find('Z.1'), -1)
+
+    def test_prefix_range(self):
+        '''Test 'prefix_range' returns the records of a class'''
+        self.assertEqual(self.mapped.prefix_range('User.'), (2, 4))
+        self.assertEqual(self.mapped.prefix_range('Place.'), (0, 1))
+        lo, hi = self.mapped.prefix_range('Review.')
+        self.assertEqual(lo, hi)
+
+    def test_mapped_objects(self):
+        '''Test the mapping of a range of records'''
+        users = MappedObjects(self.mapped, 2, 4, lambda v: v['id'])
+        self.assertEqual(len(users), 2)
+        self.assertEqual(list(users), ['User.1', 'User.2'])
+        self.assertEqual(users['User.2'], '2')
+        self.assertEqual(dict(users.items()), {'User.1': '1', 'User.2': '2'})
+        self.assertIn('User.1', users)
+        self.assertNotIn('Place.1', users)
+        with self.assertRaises(KeyError):
+            users['Place.1']
+
+    def test_empty(self):
+        '''Test an indexed file without record'''
+        write_file('test_file.empty', [])
+        try:
+            mapped = MappedFile('test_file.empty')
+            self.assertEqual(mapped.count, 0)
+            self.assertEqual(mapped.find('User.1'), -1)
+            mapped.close()
+        finally:
+            os.remove('test_file.empty')
+
+    def test_not_indexed(self):
+        '''Test mapping another file raises ValueError'''
+        for content in ('', '{}'):
+            with open('test_file.empty', 'w', encoding='utf-8') as f:
+                f.write(content)
+            try:
+                with self.assertRaises(ValueError):
+                    MappedFile('test_file.empty')
+            finally:
+                os.remove('test_file.empty')
+
+    def test_convert(self):
+        '''Test 'convert' function'''
+        with open('test_file.empty', 'w', encoding='utf-8') as f:
+            json.dump(self.items, f)
+        try:
+            convert('test_file.empty', 'json', 'test_file.conv')
+            mapped = MappedFile('test_file.conv')
+            self.assertEqual(dict(mapped.record(i) for i in range(4)),
+                             self.items)
+            mapped.close()
+        finally:
+            os.remove('test_file.empty')
+            os.remove('test_file.conv')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+#!/usr/bin/python3
+'''Unit tests for processes module'''
+import unittest
+import multiprocessing
+import os
+from models.engine.processes import map_processes
+
+STARTED = []
+
+
+def parent_state(arg):
+    '''Returns arg, the process id and the state of this module'''
+    return arg, os.getpid(), len(STARTED)
+
+
+class TestMapProcesses(unittest.TestCase):
+    '''Unit tests for 'map_processes' function'''
+
+    def test_results(self):
+        '''Test the results are in argument order'''
+        factor = 3
+        res = map_processes(lambda arg: [arg * factor], list(range(10)), 4)
+        self.assertEqual(res, [[i * 3] for i in range(10)])
+
+    def test_forked(self):
+        '''Test the arguments are run by forked processes, which keep
+        the state of this process
+        '''
+        method = multiprocessing.get_start_method(allow_none=True)
+        multiprocessing.set_start_method('spawn', force=True)
+        STARTED.append(True)
+        try:
+            res = map_processes(parent_state, list(range(6)), 3)
+        finally:
+            STARTED.clear()
+            multiprocessing.set_start_method(method, force=True)
+
+        self.assertEqual([arg for arg, _, _ in res], list(range(6)))
+        self.assertEqual(len({pid for _, pid, _ in res}), 3)
+        self.assertNotIn(os.getpid(), {pid for _, pid, _ in res})
+        self.assertEqual({state for _, _, state in res}, {1})
+
+    def test_single_worker(self):
+        '''Test a single worker runs the arguments in this process'''
+        res = map_processes(parent_state, [1, 2], 1)
+        self.assertEqual(res, [(1, os.getpid(), 0), (2, os.getpid(), 0)])
+
+    def test_error(self):
+        '''Test the errors of the processes are raised'''
+        def fail(arg):
+            if arg == 3:
+                raise ValueError('invalid')
+            return arg
+
+        with self.assertRaisesRegex(ValueError, 'invalid'):
+            map_processes(fail, list(range(6)), 2)
+
+    def test_exit(self):
+        '''Test a process exiting without result'''
+        with self.assertRaises(ChildProcessError):
+            map_processes(os._exit, [1, 2], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
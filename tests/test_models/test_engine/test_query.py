@@ -0,0 +1,91 @@
+#!/usr/bin/python3
+'''Unit tests for query module'''
+import unittest
+from models.engine.query import check_predicates, coerce_value, \
+    index_predicate, matches, order, select
+from models.place import Place
+
+
+class Item():
+    '''Object with the given attributes'''
+
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+    def __repr__(self):
+        return 'Item({})'.format(self.__dict__)
+
+
+class TestQuery(unittest.TestCase):
+    '''Unit tests for the query functions'''
+
+    def setUp(self):
+        '''Create the objects to query'''
+        self.items = [Item(id='a', price=80), Item(id='b', price=120),
+                      Item(id='c'), Item(id='d', price=60),
+                      Item(id='e', price='90'), Item(id='f', price=80)]
+
+    def ids(self, items):
+        '''Returns the ids of items'''
+        return [v.id for v in items]
+
+    def test_check_predicates(self):
+        '''Test the operators are checked'''
+        self.assertEqual(check_predicates((('a', '<', 1),)), [('a', '<', 1)])
+        with self.assertRaises(ValueError):
+            check_predicates([('a', '=~', 1)])
+
+    def test_index_predicate(self):
+        '''Test the first equality predicate on an indexed attribute'''
+        where = [('a', '<', 1), ('b', '==', 2), ('c', '==', 3)]
+        self.assertEqual(index_predicate(where, ('c', 'b')), ('b', 2))
+        self.assertIsNone(index_predicate(where, ('a',)))
+
+    def test_matches(self):
+        '''Test missing attributes and other types don't match'''
+        where = [('price', '<', 100)]
+        self.assertEqual([matches(v, where) for v in self.items],
+                         [True, False, False, True, False, True])
+        self.assertTrue(matches(self.items[2], []))
+
+    def test_order(self):
+        '''Test the objects without the attribute are last'''
+        self.assertEqual(self.ids(order(self.items[:4], 'price')),
+                         ['d', 'a', 'b', 'c'])
+        self.assertEqual(self.ids(order(self.items[:4], '-price')),
+                         ['b', 'a', 'd', 'c'])
+        with self.assertRaises(ValueError):
+            order(self.items, 'price')
+
+    def test_order_count(self):
+        '''Test the first objects are the ones of the full sort'''
+        items = self.items[:4] + self.items[5:]
+        for order_by in ('price', '-price'):
+            for count in range(6):
+                self.assertEqual(order(items, order_by, count),
+                                 order(items, order_by)[:count])
+
+    def test_select(self):
+        '''Test filtering, paging and projection'''
+        where = [('price', '>=', 80)]
+        self.assertEqual(self.ids(select(self.items, where)),
+                         ['a', 'b', 'f'])
+        self.assertEqual(self.ids(select(self.items, limit=2, offset=1)),
+                         ['b', 'c'])
+        res = select(self.items, where, fields=['id', 'name'],
+                     order_by='-price', limit=2)
+        self.assertEqual(res, [{'id': 'b'}, {'id': 'a'}])
+
+    def test_coerce_value(self):
+        '''Test the values are converted to the declared type'''
+        self.assertEqual(coerce_value(Place, 'max_guest', '4'), 4)
+        self.assertEqual(coerce_value(Place, 'max_guest', '4.5'), 4.5)
+        self.assertEqual(coerce_value(Place, 'latitude', '1'), 1.0)
+        self.assertIsInstance(coerce_value(Place, 'latitude', '1'), float)
+        self.assertEqual(coerce_value(Place, 'max_guest', 'x'), 'x')
+        self.assertEqual(coerce_value(Place, 'name', '4'), '4')
+        self.assertEqual(coerce_value(Place, 'other', '4'), '4')
+
+
+if __name__ == '__main__':
+    unittest.main()
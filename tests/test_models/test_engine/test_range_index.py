@@ -0,0 +1,85 @@
+#!/usr/bin/python3
+'''Unit tests for range_index module'''
+import unittest
+from random import Random
+from unittest.mock import patch
+from models.engine.range_index import RangeIndex, is_number
+
+
+class TestRangeIndex(unittest.TestCase):
+    '''Unit tests for 'RangeIndex' class'''
+
+    def setUp(self):
+        '''Create an index'''
+        self.index = RangeIndex([('a', 80), ('b', 120), ('c', 60),
+                                 ('d', 80.0), ('e', '90'), ('f', None)])
+
+    def test_is_number(self):
+        '''Test only ints and floats are numbers'''
+        for value in (0, -1, 2.5, 2 ** 70):
+            self.assertTrue(is_number(value))
+        for value in (True, '1', None, float('nan'), [1]):
+            self.assertFalse(is_number(value))
+
+    def test_init(self):
+        '''Test the values that aren't numbers are not indexed'''
+        self.assertEqual(len(self.index), 4)
+        self.assertEqual(self.index.range(), ['c', 'a', 'd', 'b'])
+
+    def test_range(self):
+        '''Test the bounds are included'''
+        self.assertEqual(self.index.range(80, 120), ['a', 'd', 'b'])
+        self.assertEqual(self.index.range(61, 80), ['a', 'd'])
+        self.assertEqual(self.index.range(high=79.5), ['c'])
+        self.assertEqual(self.index.range(low=121), [])
+        self.assertEqual(self.index.range(100, 90), [])
+
+    def test_range_limit(self):
+        '''Test the top-k in both orders'''
+        self.assertEqual(self.index.range(limit=2), ['c', 'a'])
+        self.assertEqual(self.index.range(limit=2, reverse=True),
+                         ['b', 'd'])
+        self.assertEqual(self.index.range(high=80, limit=5, reverse=True),
+                         ['d', 'a', 'c'])
+        self.assertEqual(self.index.range(limit=0), [])
+
+    def test_add_remove(self):
+        '''Test updating and removing keys'''
+        self.index.add('a', 130)
+        self.index.add('c', 'free')
+        self.index.add('g', 70)
+        self.index.remove('b')
+        self.index.remove('unknown')
+        self.assertEqual(self.index.range(), ['g', 'd', 'a'])
+
+    @patch('models.engine.range_index.LOAD', 4)
+    def test_random(self):
+        '''Test the index against sorting, after random changes'''
+        rand = Random(0)
+        values = {}
+        index = RangeIndex((str(i), i % 7) for i in range(30))
+        values.update((str(i), i % 7) for i in range(30))
+        for _ in range(3000):
+            k = str(rand.randrange(200))
+            if rand.random() < 0.3:
+                index.remove(k)
+                values.pop(k, None)
+            else:
+                values[k] = rand.choice([rand.randrange(50), rand.random()])
+                index.add(k, values[k])
+
+        self.assertGreater(len(index.lists), 10)
+        self.assertEqual(len(index), len(values))
+        for low, high, limit in ((None, None, None), (10, 30, None),
+                                 (10, 30, 5), (0.5, 12, 50), (60, 70, 1)):
+            expected = [k for v, k in sorted((v, k) for k, v in
+                                             values.items())
+                        if (low is None or low <= v) and
+                        (high is None or v <= high)]
+            self.assertEqual(index.range(low, high, limit),
+                             expected[:limit])
+            self.assertEqual(index.range(low, high, limit, True),
+                             expected[::-1][:limit])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+#!/usr/bin/python3
+'''Unit tests for rwlock module'''
+import unittest
+from threading import Event, Thread
+from models.engine.rwlock import RWLock
+
+
+class TestRWLock(unittest.TestCase):
+    '''Unit tests for 'RWLock' class'''
+
+    def run_thread(self, target):
+        '''Runs target in a thread and returns the thread'''
+        thread = Thread(target=target, daemon=True)
+        thread.start()
+        return thread
+
+    def test_shared_readers(self):
+        '''Test readers hold the lock at the same time'''
+        lock = RWLock()
+        entered = Event()
+
+        def read():
+            with lock.read():
+                entered.set()
+
+        with lock.read():
+            self.run_thread(read).join(1)
+            self.assertTrue(entered.is_set())
+
+    def test_writer_excludes_readers(self):
+        '''Test a reader waits for the writer'''
+        lock = RWLock()
+        entered = Event()
+
+        def read():
+            with lock.read():
+                entered.set()
+
+        with lock.write():
+            thread = self.run_thread(read)
+            self.assertFalse(entered.wait(0.1))
+        thread.join(1)
+        self.assertTrue(entered.is_set())
+
+    def test_readers_exclude_writer(self):
+        '''Test a writer waits for the readers'''
+        lock = RWLock()
+        entered = Event()
+
+        def write():
+            with lock.write():
+                entered.set()
+
+        with lock.read():
+            thread = self.run_thread(write)
+            self.assertFalse(entered.wait(0.1))
+        thread.join(1)
+        self.assertTrue(entered.is_set())
+
+    def test_reads_not_behind_writers(self):
+        '''Test a reader doesn't wait for a waiting writer'''
+        lock = RWLock()
+        entered = Event()
+
+        def read():
+            with lock.read():
+                entered.set()
+
+        with lock.read():
+            writer = self.run_thread(lambda: lock.write().__enter__())
+            self.run_thread(read).join(1)
+            self.assertTrue(entered.is_set())
+        writer.join(1)
+        self.assertEqual(lock.writer, writer.ident)
+
+    def test_reentrant_writer(self):
+        '''Test the writer acquires the lock again'''
+        lock = RWLock()
+        with lock.write():
+            with lock.write():
+                with lock.read():
+                    self.assertEqual(lock.depth, 3)
+            self.assertIsNotNone(lock.writer)
+        self.assertIsNone(lock.writer)
+        self.assertEqual(lock.readers, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,141 @@
+#!/usr/bin/python3
+'''Unit tests for serializers module'''
+import unittest
+import json
+import os
+import sys
+from datetime import datetime
+from io import BytesIO, StringIO
+from threading import Barrier, Thread
+from models.base_model import BaseModel
+from models.engine.serializers import BinarySerializer, JSONSerializer, \
+    convert, get_serializer
+
+
+class TestSerializers(unittest.TestCase):
+    '''Unit tests for the storage formats'''
+
+    def setUp(self):
+        '''Create the objects to serialize'''
+        bm = BaseModel(id='1', created_at='2017-09-28T21:03:54.052298',
+                       updated_at='2017-09-28T21:03:54.052302')
+        self.items = [
+            ('BaseModel.1', bm.to_dict()),
+            ('Place.2', {'__class__': 'Place', 'id': '2', 'name': 'é',
+                         'number_rooms': 3, 'latitude': 1.5,
+                         'amenity_ids': ['a', 'b'], 'big': 2 ** 70,
+                         'flag': True, 'other': False, 'none': None,
+                         'created_at': 'not a date'})]
+
+    def isoformat(self, items):
+        '''Returns the items with the datetimes in ISO format'''
+        res = []
+        for k, v in items:
+            v = {name: value.isoformat() if isinstance(value, datetime)
+                 else value for name, value in v.items()}
+            res.append((k, v))
+        return res
+
+    def write(self, serializer):
+        '''Returns the file written by serializer'''
+        f = StringIO() if serializer.text else BytesIO()
+        serializer.dump(f, ((k, serializer.encode(v))
+                            for k, v in self.items))
+        f.seek(0)
+        return f
+
+    def test_get_serializer(self):
+        '''Test 'get_serializer' function'''
+        self.assertIsInstance(get_serializer('json'), JSONSerializer)
+        self.assertIsInstance(get_serializer('binary'), BinarySerializer)
+        with self.assertRaises(ValueError):
+            get_serializer('xml')
+
+    def test_load(self):
+        '''Test the loaded items are the dumped ones'''
+        for serializer in (JSONSerializer(), BinarySerializer()):
+            f = self.write(serializer)
+            self.assertEqual(self.isoformat(serializer.load(f)), self.items)
+
+    def test_index(self):
+        '''Test the indexed records decode to the dumped items'''
+        for serializer in (JSONSerializer(), BinarySerializer()):
+            f = self.write(serializer)
+            data = f.getvalue()
+            if serializer.text:
+                data = data.encode('utf-8')
+
+            names = []
+            res = []
+            for k, offset, length in serializer.index(BytesIO(data), names):
+                record = data[offset:offset + length]
+                res.append((k, serializer.decode(record, names)))
+            self.assertEqual(self.isoformat(res), self.items)
+
+    def test_binary_datetime(self):
+        '''Test the binary format decodes datetimes'''
+        serializer = BinarySerializer()
+        _, v = list(serializer.load(self.write(serializer)))[0]
+        self.assertEqual(v['created_at'],
+                         datetime(2017, 9, 28, 21, 3, 54, 52298))
+
+    def test_binary_smaller(self):
+        '''Test the binary file is smaller than the JSON file'''
+        items = [('User.{}'.format(i), {
+            '__class__': 'User', 'id': str(i), 'first_name': 'Betty',
+            'created_at': '2017-09-28T21:03:54.052298',
+            'updated_at': '2017-09-28T21:03:54.052302'})
+            for i in range(100)]
+        self.items = items
+
+        json_size = len(self.write(JSONSerializer()).getvalue())
+        binary_size = len(self.write(BinarySerializer()).getvalue())
+        self.assertLess(binary_size, json_size / 2)
+
+    def test_binary_invalid(self):
+        '''Test invalid binary files'''
+        data = self.write(BinarySerializer()).getvalue()
+        for invalid in (b'', b'{}', data[:-1], data + b'X'):
+            with self.assertRaises(ValueError):
+                list(BinarySerializer().load(BytesIO(invalid)))
+
+    def test_binary_threads(self):
+        '''Test the field names defined by concurrent encodes'''
+        dictionary = {'field_{}'.format(i): i for i in range(2000)}
+        switch = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            for _ in range(20):
+                serializer = BinarySerializer()
+                barrier = Barrier(8)
+
+                def encode():
+                    barrier.wait()
+                    serializer.encode(dictionary)
+
+                threads = [Thread(target=encode) for _ in range(8)]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+
+                self.assertEqual(serializer.names, list(dictionary))
+        finally:
+            sys.setswitchinterval(switch)
+
+    def test_convert(self):
+        '''Test 'convert' function'''
+        with open('test_file.json', 'w', encoding='utf-8') as f:
+            json.dump(dict(self.items), f)
+
+        try:
+            convert('test_file.json', 'json', 'test_file.bin', 'binary')
+            convert('test_file.bin', 'binary', 'test_file.json', 'json')
+            with open('test_file.json', 'r', encoding='utf-8') as f:
+                self.assertEqual(json.load(f), dict(self.items))
+        finally:
+            os.remove('test_file.bin')
+
+
+if __name__ == '__main__':
+    unittest.main()